@@ -1,12 +1,12 @@
 import logging
 import time
-from datetime import timedelta
 from typing import Tuple
 
 from django.utils import timezone
 
 from app_prime_league.models import Match, Split, Team
 from core.update_schedule_command import UpdateScheduleCommand
+from core.updater.call_executors import PRIORITY_WINDOW, prefetch_teams_and_matches, retain_responses_to_update
 from core.updater.matches_check_executor import update_uncompleted_matches
 from core.updater.teams_check_executor import update_teams
 
@@ -65,7 +65,7 @@ def get_priority_teams_and_matches() -> Tuple[set[Team], set[Match]]:
                 teams_to_update.add(match.enemy_team)
                 update_count += 1
 
-    three_weeks_later = now + timedelta(weeks=3)
+    three_weeks_later = now + PRIORITY_WINDOW
     all_matches = Match.current_split_objects.get_matches_to_update().order_by('updated_at')  # oldest updated first
     high_priority_matches = all_matches.filter(begin__lte=three_weeks_later)
     low_priority_matches = all_matches.filter(begin__gt=three_weeks_later)
@@ -84,6 +84,7 @@ class Command(UpdateScheduleCommand):
     def func(notify=True):
         start_time = time.time()
         teams, uncompleted_matches = get_priority_teams_and_matches()
+        prefetch_teams_and_matches(teams, uncompleted_matches)
         logger.info(f"Updating {len(teams)} teams...")
         update_teams(teams=teams, notify=notify)
         logger.info(f"Updated {len(teams)} teams in {time.time() - start_time:.2f} seconds")
@@ -92,6 +93,7 @@ class Command(UpdateScheduleCommand):
         logger.info(f"Checking {len(uncompleted_matches)} uncompleted matches...")
         update_uncompleted_matches(matches=uncompleted_matches, notify=notify)
         logger.info(f"Checked {len(uncompleted_matches)} uncompleted matches in {time.time() - start_time:.2f} seconds")
+        retain_responses_to_update()
         return {
             "TEAMS": teams,
             "MATCHES": uncompleted_matches,
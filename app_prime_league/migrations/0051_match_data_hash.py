@@ -0,0 +1,18 @@
+# Generated by Django 5.0.12 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_prime_league', '0050_alter_channel_options_channel_name_alter_match_begin_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='data_hash',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
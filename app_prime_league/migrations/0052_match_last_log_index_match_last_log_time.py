@@ -0,0 +1,23 @@
+# Generated by Django 5.0.12 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_prime_league', '0051_match_data_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='last_log_index',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='last_log_time',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -247,6 +247,10 @@ class Match(models.Model):
     split = models.ForeignKey(
         "app_prime_league.Split", on_delete=models.CASCADE, null=True, blank=True, related_name="matches"
     )
+    data_hash = models.CharField(max_length=32, null=True, blank=True)  # Hash of the last processed match data
+    # Cursor of the processed match logs: number of processed log entries and log_time of the last one
+    last_log_index = models.IntegerField(null=True, blank=True)
+    last_log_time = models.IntegerField(null=True, blank=True)
 
     objects = MatchManager()
     current_split_objects = CurrentSplitMatchManager()
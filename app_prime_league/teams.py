@@ -2,14 +2,15 @@ import concurrent.futures
 import logging
 import sys
 import traceback
-from itertools import repeat
 
 from django.conf import settings
 
 from app_prime_league.models import Match, Team
 from bots.telegram_interface.tg_singleton import send_message_to_devs
 from core.processors.team_processor import TeamDataProcessor
+from core.providers.base import Provider
 from core.providers.get import get_provider
+from core.providers.prefetched import PrefetchedProvider
 from core.updater.matches_check_executor import update_match
 from utils.messages_logger import log_exception
 
@@ -55,18 +56,19 @@ def create_or_update_team(*, processor) -> Team:
 
 
 @log_exception
-def create_match_and_enemy_team(team: Team, match_id: int, notify):
+def create_match_and_enemy_team(team: Team, match_id: int, notify, provider: Provider = None):
     """
     Create Match, Enemy Team, Enemy Players, Enemy Lineup, Suggestions and Comments.
     :param team: Primary Team of the match
     :param match_id: Match ID
     :param notify: if True send notifications
+    :param provider: Optional provider, e.g. a ``PrefetchedProvider`` holding the already fetched match.
     """
     match, created = Match.objects.get_or_create(
         match_id=match_id,
         team=team,
     )
-    update_match(match, notify=notify, priority=0)
+    update_match(match, notify=notify, priority=0, provider=provider)
 
 
 def create_matches(
@@ -76,21 +78,22 @@ def create_matches(
     use_concurrency: bool = not settings.DEBUG,
 ):
     """
-    Used for registering new teams. Can be parallelized with threads if ``use_concurrency`` is True.
+    Used for registering new teams. All matches are fetched in one batch, every match is created as soon as its
+    data arrived. Can be parallelized with threads if ``use_concurrency`` is True.
     :param match_ids: List of match ids
     :param team: Primary Team of the matches
     :param notify: if True send notifications
     :param use_concurrency: if True use threads to parallelize every match
     """
+    batch_provider = get_provider(priority=0)
+    results = batch_provider.get_matches(match_ids)
     if use_concurrency:
         with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            executor.map(
-                create_match_and_enemy_team,
-                repeat(team),
-                match_ids,
-                repeat(notify),
-            )
+            for match_id, data in results:
+                provider = PrefetchedProvider(batch_provider, matches=[(match_id, data)])
+                executor.submit(create_match_and_enemy_team, team, match_id, notify, provider=provider)
         return
 
-    for i in match_ids:
-        create_match_and_enemy_team(team, match_id=i, notify=notify)
+    for match_id, data in results:
+        provider = PrefetchedProvider(batch_provider, matches=[(match_id, data)])
+        create_match_and_enemy_team(team, match_id=match_id, notify=notify, provider=provider)
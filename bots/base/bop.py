@@ -1,9 +1,8 @@
 import random
 from abc import abstractmethod
 
-import niquests
-
 from bots.telegram_interface.tg_singleton import send_message_to_devs
+from core.http import get_session
 
 
 class AnimalAPI:
@@ -23,7 +22,7 @@ class CatAPI(AnimalAPI):
 class DogAPI(AnimalAPI):
     @classmethod
     def get_url(cls):
-        contents = niquests.get('https://api.thedogapi.com/v1/images/search?mime_types=gif').json()
+        contents = get_session().get('https://api.thedogapi.com/v1/images/search?mime_types=gif').json()
         url = contents[0]['url']
         return url
 
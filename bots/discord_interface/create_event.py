@@ -1,3 +1,4 @@
+import asyncio
 import io
 import logging
 from datetime import timedelta
@@ -13,6 +14,7 @@ from app_prime_league.models import ChannelTeam, Match, Team
 from bots.discord_interface.discord_bot import DiscordBot
 from bots.messages.helpers import MatchDisplayHelper
 from core.cluster_job import Job
+from core.http import create_async_session
 
 logger = logging.getLogger("discord")
 
@@ -22,18 +24,17 @@ async def get_default():
         return f.read()
 
 
-async def fetch_logo(url: Optional[str]) -> bytes:
-    async with AsyncSession() as s:
-        try:
-            response = await s.get(url)
-        except Exception as e:
-            logger.exception(f"Could not fetch logo from {url}, using default", e)
-            return await get_default()
-        else:
-            if response.ok:
-                return response.content
-            logger.error(f"{url} returned status code {response.status_code}, using default")
-            return await get_default()
+async def fetch_logo(url: Optional[str], session: AsyncSession) -> bytes:
+    try:
+        response = await session.get(url)
+    except Exception as e:
+        logger.exception(f"Could not fetch logo from {url}, using default", e)
+        return await get_default()
+    else:
+        if response.ok:
+            return response.content
+        logger.error(f"{url} returned status code {response.status_code}, using default")
+        return await get_default()
 
 
 def draw_line(draw, cover_width, cover_height, color):
@@ -43,8 +44,10 @@ def draw_line(draw, cover_width, cover_height, color):
 
 
 async def create_cover_image(team1_url, team2_url):
-    team1_image_bytes = await fetch_logo(team1_url)
-    team2_image_bytes = await fetch_logo(team2_url)
+    async with create_async_session() as session:
+        team1_image_bytes, team2_image_bytes = await asyncio.gather(
+            fetch_logo(team1_url, session), fetch_logo(team2_url, session)
+        )
     team1_image = Image.open(io.BytesIO(team1_image_bytes))
     team2_image = Image.open(io.BytesIO(team2_image_bytes))
 
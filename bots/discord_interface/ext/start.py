@@ -24,7 +24,7 @@ from utils.exceptions import (
     PrimeLeagueConnectionException,
     TeamWebsite404Exception,
 )
-from utils.utils import get_valid_team_id
+from utils.validation import get_valid_team_id
 
 
 class TeamIDConverter(commands.Converter):
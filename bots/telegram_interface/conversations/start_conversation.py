@@ -15,7 +15,7 @@ from utils.exceptions import (
     TeamWebsite404Exception,
 )
 from utils.messages_logger import log_callbacks, log_command
-from utils.utils import get_valid_team_id
+from utils.validation import get_valid_team_id
 
 
 def channel_has_at_least_one_team(update: Update) -> ChannelTeam:
@@ -1,6 +1,7 @@
 import niquests
 from django.conf import settings
 
+from core.http import get_session
 from utils.exceptions import PrimeLeagueConnectionException
 
 
@@ -10,10 +11,10 @@ class PrimeLeagueAPI:
     BASE_URL = settings.GAME_SPORTS_BASE_URL
 
     @classmethod
-    def request(cls, endpoint, request_method=niquests.get, query_params=None, **kwargs):
+    def request(cls, endpoint, request_method=None, query_params=None, **kwargs):
         """
         :param endpoint:
-        :param request_method:
+        :param request_method: defaults to GET with the shared session
         :param query_params: optional list of strings
         :param kwargs: optional params passed to niquests method
         :return:
@@ -29,6 +30,8 @@ class PrimeLeagueAPI:
         default_requests_params = {
             "timeout": 10,
         }
+        if request_method is None:
+            request_method = get_session().get
         try:
             response = request_method(url=path, **{**default_requests_params, **kwargs})
         except niquests.exceptions.ConnectionError:
@@ -36,8 +39,8 @@ class PrimeLeagueAPI:
         return response
 
     @classmethod
-    def request_match(cls, match_id):
-        return cls.request(cls._MATCH % match_id)
+    def request_match(cls, match_id, **kwargs):
+        return cls.request(cls._MATCH % match_id, **kwargs)
 
     @classmethod
     def request_team(cls, team_id, **kwargs):
@@ -51,3 +54,24 @@ class PrimeLeagueAPI:
 
         """
         return cls.request(cls._TEAM % team_id, **kwargs)
+
+    @staticmethod
+    def conditional_headers(etag: str = None, last_modified: str = None) -> dict[str, str]:
+        """Headers so the API answers with 304 Not Modified if the resource is unchanged since it was fetched."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    @staticmethod
+    def validators(response, etag: str = None, last_modified: str = None) -> dict[str, str | None]:
+        """
+        ``ETag`` and ``Last-Modified`` of a response, pass them to ``conditional_headers`` on the next request.
+        The given validators are kept if the response omits them (allowed for 304 Not Modified).
+        """
+        return {
+            "etag": response.headers.get("ETag") or etag,
+            "last_modified": response.headers.get("Last-Modified") or last_modified,
+        }
@@ -266,6 +266,9 @@ class MatchComparer:
         self.match.closed = self.tmd.closed
         self.match.has_side_choice = self.tmd.has_side_choice
         self.match.split = self.tmd.split
+        if self.tmd.log_cursor is not None:
+            self.match.last_log_index = self.tmd.log_cursor.index
+            self.match.last_log_time = self.tmd.log_cursor.log_time
         self.match.save()
 
     def notify(self):
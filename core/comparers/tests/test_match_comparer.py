@@ -7,6 +7,7 @@ from core.comparers.match_comparer import (
     NewSuggestionComparer,
     SchedulingConfirmationComparer,
 )
+from core.parsing.logs import BaseLog
 from core.test_utils import create_temporary_match_data, string_to_datetime
 
 
@@ -357,6 +358,28 @@ class CompareNewLineupTest(TestCase):
         cp = LineupConfirmationComparer(match=match, tmd=md, of_enemy_team=True)
         self.assertTrue(cp.compare(), "Enemy has new lineup, but was not recognized")
 
+    def test_unparsable_lineup_submit(self):
+        match = Match.objects.create(
+            match_id=1,
+            match_day=1,
+            match_type=Match.MATCH_TYPE_LEAGUE,
+            team=self.team,
+            enemy_team=self.enemy_team,
+            has_side_choice=True,
+        )
+        md = create_temporary_match_data(
+            team=self.team,
+            enemy_team=self.enemy_team,
+            enemy_lineup=[(1, "Player: 1", "Summonername 1", None)],
+        )
+        # The submit of a name containing ":" cannot be parsed, so it is missing in the new logs
+        self.assertIsNone(
+            BaseLog.return_specified_log(timestamp=1633000000, user_id=1, action="lineup_submit", details="1:Player: 1")
+        )
+        md.new_logs = []
+        cp = LineupConfirmationComparer(match=match, tmd=md, of_enemy_team=True)
+        self.assertTrue(cp.compare(), "Enemy has new lineup, but was not recognized")
+
 
 class CompareEnemyTeamIDTest(TestCase):
     def setUp(self) -> None:
@@ -2,10 +2,11 @@ import logging
 from dataclasses import dataclass
 from typing import Union
 
-import niquests
 from django.conf import settings
 from django.core.cache import cache
 
+from core.http import get_session
+
 logger = logging.getLogger("django")
 
 
@@ -42,7 +43,7 @@ class GitHub:
         headers = {}
         if settings.GITHUB_API_TOKEN is not None:
             headers["Authorization"] = "token " + settings.GITHUB_API_TOKEN
-        response = niquests.get(url, headers=headers)
+        response = get_session().get(url, headers=headers)
         if response.status_code == 200:
             return response.json()
         if response.status_code == 403:
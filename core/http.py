@@ -0,0 +1,78 @@
+"""
+Shared HTTP sessions for all outgoing requests.
+Requests through these sessions reuse pooled keep-alive connections instead of doing a new TCP and TLS handshake
+each time, retry connection errors with exponential backoff and are counted per host in ``HTTP_CONNECTIONS``.
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import niquests
+from django.conf import settings
+
+from request_queue.metrics import REGISTRY
+
+HTTP_CONNECTIONS = REGISTRY.counter(
+    "http_connections_total",
+    "Requests per host that opened a new connection or reused a pooled one",
+    labels=("host", "connection"),
+)
+
+_session: niquests.Session | None = None
+_lock = threading.Lock()
+
+
+def _record_connection(response: niquests.Response, **kwargs):
+    conn_info = response.conn_info
+    if conn_info is None:
+        return
+    # urllib3 resets the latencies of a connection to zero when it is reused
+    connection = "reused" if not conn_info.established_latency else "new"
+    HTTP_CONNECTIONS.inc(host=urlsplit(response.url).netloc, connection=connection)
+
+
+def _session_kwargs(**overrides) -> dict:
+    retries = niquests.RetryConfiguration(
+        total=settings.HTTP_RETRIES,
+        connect=settings.HTTP_RETRIES,
+        read=False,
+        status=0,
+        backoff_factor=settings.HTTP_RETRY_BACKOFF,
+    )
+    return {
+        "pool_maxsize": settings.HTTP_POOL_MAXSIZE,
+        "multiplexed": settings.HTTP_MULTIPLEXED,
+        "retries": retries,
+        **overrides,
+    }
+
+
+def create_session(**overrides) -> niquests.Session:
+    """New pooled session, the caller has to close it."""
+    session = niquests.Session(**_session_kwargs(**overrides))
+    session.hooks["response"].append(_record_connection)
+    return session
+
+
+def create_async_session(**overrides) -> niquests.AsyncSession:
+    """New pooled async session, the caller has to close it."""
+    session = niquests.AsyncSession(**_session_kwargs(**overrides))
+    session.hooks["response"].append(_record_connection)
+    return session
+
+
+def get_session() -> niquests.Session:
+    """Session shared by all threads of the process, created on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def connection_reuse_stats() -> dict[str, dict[str, int]]:
+    """Number of new and reused connections per host, e.g. ``{"api.github.com": {"new": 1, "reused": 4}}``."""
+    stats = {}
+    for labels, value in HTTP_CONNECTIONS.samples():
+        stats.setdefault(labels["host"], {"new": 0, "reused": 0})[labels["connection"]] = int(value)
+    return stats
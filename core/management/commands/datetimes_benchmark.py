@@ -0,0 +1,69 @@
+import glob
+import json
+import os
+import timeit
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from utils import datetimes
+
+
+# The conversions before utils.datetimes, for comparison
+def _legacy_timestamp_to_datetime(x):
+    if not isinstance(x, int):
+        x = int(x)
+    return datetime.fromtimestamp(x).astimezone(ZoneInfo("UTC"))
+
+
+def _legacy_string_to_datetime(x, timestamp_format=datetimes.RFC_2822):
+    return datetime.strptime(x, timestamp_format).astimezone(ZoneInfo("UTC"))
+
+
+class Command(BaseCommand):
+    help = "Compare the timestamp and date string conversions with the former ones on the match fixtures"
+    requires_system_checks = []
+    requires_migrations_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=20, help="Measured runs over all values (default: 20)")
+
+    def handle(self, *args, **options):
+        timestamps, strings = [], []
+        for path in glob.glob(os.path.join(settings.STORAGE_DIR, "match_*.json")):
+            with open(path) as f:
+                data = json.load(f)
+            match = data.get("match") or {}
+            timestamps += [v for k, v in match.items() if k.startswith("match_scheduling_suggest_") and v]
+            timestamps += [x["comment_time"] for x in data.get("comments") or []]
+            timestamps += [x["log_time"] for x in data.get("logs") or []]
+            for log in data.get("logs") or []:
+                if log["log_action"] == "scheduling_suggest":
+                    strings += [x[3:] for x in log["log_details"].split("<br>")]
+                elif log["log_action"] == "scheduling_confirm":
+                    strings.append(log["log_details"])
+        if not timestamps:
+            raise CommandError(f"No match fixtures in {settings.STORAGE_DIR}.")
+
+        if [_legacy_timestamp_to_datetime(x) for x in timestamps] != datetimes.timestamps_to_datetimes(timestamps):
+            raise CommandError("The timestamps are converted differently.")
+        if [_legacy_string_to_datetime(x) for x in strings] != [datetimes.string_to_datetime(x) for x in strings]:
+            raise CommandError("The date strings are parsed differently.")
+
+        cases = {
+            f"{len(timestamps)} timestamps": {
+                "former": lambda: [_legacy_timestamp_to_datetime(x) for x in timestamps],
+                "single": lambda: [datetimes.timestamp_to_datetime(x) for x in timestamps],
+                "batch": lambda: datetimes.timestamps_to_datetimes(timestamps),
+            },
+            f"{len(strings)} date strings": {
+                "former": lambda: [_legacy_string_to_datetime(x) for x in strings],
+                "memoized": lambda: [datetimes.string_to_datetime(x) for x in strings],
+            },
+        }
+        for case, variants in cases.items():
+            for name, convert in variants.items():
+                seconds = min(timeit.repeat(convert, number=10, repeat=options["runs"])) / 10
+                self.stdout.write(f"{case}, {name}: {seconds * 1e6:.1f} µs")
@@ -0,0 +1,76 @@
+import glob
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from core.processors.match_processor import MatchDataProcessor
+from core.providers.prefetched import PrefetchedProvider
+from core.providers.prime_league import PrimeLeagueProvider
+
+
+def _getters(processor: MatchDataProcessor) -> tuple:
+    # The getters TemporaryMatchData.create_from_website called before it used the compiled match
+    return (
+        processor.get_match_day(),
+        processor.get_match_type(),
+        processor.get_enemy_team_id(),
+        processor.get_enemy_lineup(),
+        processor.get_team_lineup(),
+        processor.get_match_closed(),
+        processor.get_match_result(),
+        processor.get_team_made_latest_suggestion(),
+        processor.get_latest_suggestions(),
+        processor.get_match_begin(),
+        processor.get_match_begin_confirmed(),
+        processor.get_datetime_until_auto_confirmation(),
+        processor.get_latest_match_begin_log(),
+        processor.has_side_choice(),
+        processor.get_comments(),
+    )
+
+
+class Command(BaseCommand):
+    help = "Measure how long the match processor needs for the match fixtures in the storage folder"
+    requires_system_checks = []
+    requires_migrations_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=200, help="Measured runs over all fixtures (default: 200)")
+
+    def handle(self, *args, **options):
+        matches = {}
+        for path in sorted(glob.glob(os.path.join(settings.STORAGE_DIR, "match_*.json"))):
+            with open(path) as f:
+                matches[int(os.path.basename(path)[len("match_") : -len(".json")])] = json.load(f)
+        if not matches:
+            raise CommandError(f"No match fixtures in {settings.STORAGE_DIR}.")
+        provider = PrefetchedProvider(PrimeLeagueProvider(), matches=list(matches.items()))
+        # Point of view of the first team, like the updates of registered teams
+        teams = {x: data.get("match", {}).get("team_id_1") for x, data in matches.items()}
+
+        def construct():
+            return [MatchDataProcessor(x, y, provider=provider) for x, y in teams.items()]
+
+        # Extraction is measured on fresh processors, the compiled result is cached per processor
+        modes = {
+            "construct": lambda processors: None,
+            "getters": lambda processors: [_getters(x) for x in processors],
+            "compiled": lambda processors: [x.compile() for x in processors],
+        }
+        for name, extract in modes.items():
+            timings = []
+            for _ in range(options["runs"]):
+                start = time.perf_counter()
+                processors = construct()
+                if name != "construct":
+                    start = time.perf_counter()
+                extract(processors)
+                timings.append((time.perf_counter() - start) / len(teams) * 1e6)
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            self.stdout.write(
+                f"{name}: p50 {statistics.median(timings):.1f} µs, p95 {p95:.1f} µs per match ({len(teams)} matches)"
+            )
@@ -1,10 +1,38 @@
-from utils.utils import string_to_datetime, timestamp_to_datetime
+from dataclasses import dataclass
+from typing import Sequence
+
+from utils.datetimes import string_to_datetime, timestamp_to_datetime
 
 
 class ParseLogException(Exception):
     pass
 
 
+@dataclass(frozen=True, slots=True)
+class LogCursor:
+    """
+    Position in the logs of a match up to which they were processed. Logs only grow, so the entries after the cursor
+    are the new ones.
+    """
+
+    index: int = 0  # number of processed log entries
+    log_time: int | None = None  # log_time of the last processed entry
+
+    @classmethod
+    def after(cls, entries: Sequence) -> "LogCursor":
+        """The cursor after the last of the log entries."""
+        return cls(len(entries), entries[-1].log_time if entries else None)
+
+    def new_entries(self, entries: Sequence) -> Sequence:
+        """
+        The log entries after the cursor. If the entries do not continue the processed ones (e.g. logs were removed),
+        all entries are new.
+        """
+        if self.index and (self.index > len(entries) or entries[self.index - 1].log_time != self.log_time):
+            return entries
+        return entries[self.index :]
+
+
 class BaseLog:
     def __init__(self, timestamp, user_id, details):
         self.timestamp = timestamp_to_datetime(timestamp)
@@ -16,23 +44,7 @@ class BaseLog:
 
     @staticmethod
     def return_specified_log(timestamp, user_id, action, details):
-        log_dict = {
-            "scheduling_suggest": LogSuggestion,
-            "scheduling_confirm": LogSchedulingConfirmation,
-            "lineup_submit": LogLineupSubmit,
-            "played": LogPlayed,
-            "scheduling_autoconfirm": LogSchedulingAutoConfirmation,
-            "disqualify": LogDisqualified,
-            "lineup_missing": LogLineupMissing,
-            "lineup_notready": LogLineupNotReady,
-            "change_time": LogChangeTime,
-            "change_status": LogChangeStatus,
-            "change_score": LogChangeScore,
-            "score_report": LogScoreReport,
-            "lineup_fail": LogLineupFail,
-            "change_score_status": LogChangeScoreStatus,
-        }
-        LogClass = log_dict.get(action, None)
+        LogClass = LOG_CLASSES.get(action, None)
         if LogClass is None:
             return
         try:
@@ -146,3 +158,27 @@ class LogChangeTime(BaseLog):
         super().__init__(timestamp, user_id, details)
         prefix = "Manually adjusted time to "
         self.details = string_to_datetime(self.details[len(prefix) :], timestamp_format="%Y-%m-%d %H:%M %z")
+
+
+# Log class of every parsed log_action, other actions are ignored
+LOG_CLASSES = {
+    "scheduling_suggest": LogSuggestion,
+    "scheduling_confirm": LogSchedulingConfirmation,
+    "lineup_submit": LogLineupSubmit,
+    "played": LogPlayed,
+    "scheduling_autoconfirm": LogSchedulingAutoConfirmation,
+    "disqualify": LogDisqualified,
+    "lineup_missing": LogLineupMissing,
+    "lineup_notready": LogLineupNotReady,
+    "change_time": LogChangeTime,
+    "change_status": LogChangeStatus,
+    "change_score": LogChangeScore,
+    "score_report": LogScoreReport,
+    "lineup_fail": LogLineupFail,
+    "change_score_status": LogChangeScoreStatus,
+}
+
+
+def actions_of(*log_classes: type[BaseLog]) -> set[str]:
+    """The log actions whose logs are instances of one of ``log_classes``."""
+    return {action for action, log_class in LOG_CLASSES.items() if issubclass(log_class, log_classes)}
@@ -0,0 +1,178 @@
+"""
+Typed payloads of the ``/match/`` and ``/team/`` responses of the Prime League API.
+Payloads are decoded in one pass into slotted, immutable dataclasses. Fields the API omits or sets to null are None
+(or empty for lists), values whose type is not the declared type of their field raise ``PrimeLeagueParseException``,
+so changes of the upstream schema are noticed when a response is decoded and not somewhere in a comparer.
+"""
+
+from dataclasses import dataclass, fields
+from functools import cache
+from types import UnionType
+from typing import get_args, get_origin
+
+from utils.exceptions import PrimeLeagueParseException
+
+
+@cache
+def _field_types(cls) -> tuple[tuple[str, tuple[type, ...]], ...]:
+    """Name and accepted types of every field of the dataclass ``cls``, e.g. ``int | None`` accepts int and None."""
+    result = []
+    for field in fields(cls):
+        annotations = get_args(field.type) if isinstance(field.type, UnionType) else (field.type,)
+        result.append((field.name, tuple(get_origin(x) or x for x in annotations)))
+    return tuple(result)
+
+
+def _typed(cls, values: dict, context: str):
+    """
+    Create ``cls`` of ``values`` by field name. Types are compared exactly, so e.g. a bool is no int.
+    :raise PrimeLeagueParseException: if a value does not have the declared type of its field
+    """
+    for name, types in _field_types(cls):
+        if type(values[name]) not in types:
+            value_type = type(values[name]).__name__
+            raise PrimeLeagueParseException(msg=f"{context}: {cls.__name__}.{name} is a {value_type}")
+    return cls(**values)
+
+
+def _section(data: dict, key: str, kind: type, context: str):
+    """The nested object or list ``key`` of ``data``, empty if it is missing."""
+    value = data.get(key)
+    if value is None:
+        return kind()
+    if not isinstance(value, kind):
+        raise PrimeLeagueParseException(msg=f"{context}: {key} is a {type(value).__name__}, expected {kind.__name__}")
+    return value
+
+
+def _items(data: dict, key: str, decode, context: str) -> tuple:
+    items = []
+    for item in _section(data, key, list, context):
+        if not isinstance(item, dict):
+            raise PrimeLeagueParseException(msg=f"{context}: {key} contains a {type(item).__name__}")
+        try:
+            items.append(decode(item, context))
+        except KeyError as e:
+            raise PrimeLeagueParseException(msg=f"{context}: {key} without {e}")
+    return tuple(items)
+
+
+@dataclass(frozen=True, slots=True)
+class MatchInfo:
+    team_id_1: int | None = None
+    team_id_2: int | None = None
+    match_status: str | None = None  # upcoming, pending or finished
+    match_score_1: int | None = None
+    match_score_2: int | None = None
+    match_time: int | None = None
+    match_playday: int | None = None
+    match_scheduling_mode: str | None = None  # fixed, free or regulated
+    match_scheduling_status: int | None = None  # 0: no suggestion, 1 or 2: team 1 or team 2 made the last one
+    match_scheduling_time: int | None = None  # hours until a suggestion is confirmed automatically, 0: confirmed
+    match_scheduling_start: int | None = None
+    match_scheduling_suggest_time: int | None = None
+    match_scheduling_suggest_0: int | None = None
+    match_scheduling_suggest_1: int | None = None
+    match_scheduling_suggest_2: int | None = None
+
+    @classmethod
+    def decode(cls, data: dict, context: str = "") -> "MatchInfo":
+        return _typed(cls, {name: data.get(name) for name, _ in _field_types(cls)}, context)
+
+
+@dataclass(frozen=True, slots=True)
+class LineupEntry:
+    team_id: int
+    user_id: int
+    user_name: str
+    account_value: str  # summoner name
+
+    @classmethod
+    def decode(cls, data: dict, context: str = "") -> "LineupEntry":
+        return _typed(cls, {name: data[name] for name, _ in _field_types(cls)}, context)
+
+
+@dataclass(frozen=True, slots=True)
+class LogEntry:
+    log_time: int | None
+    user_id: int | None
+    log_action: str | None
+    log_details: str | None
+
+    @classmethod
+    def decode(cls, data: dict, context: str = "") -> "LogEntry":
+        return _typed(cls, {name: data.get(name) for name, _ in _field_types(cls)}, context)
+
+
+@dataclass(frozen=True, slots=True)
+class MatchPayload:
+    match: MatchInfo
+    stage_type: str | None
+    lineups: tuple[LineupEntry, ...]
+    logs: tuple[LogEntry, ...]  # oldest first
+    comments: list[dict]
+
+    @classmethod
+    def decode(cls, data: dict, match_id: int = None) -> "MatchPayload":
+        """:raise PrimeLeagueParseException: if a part of the payload has an unexpected type"""
+        context = f"Match {match_id}"
+        if not isinstance(data, dict):
+            raise PrimeLeagueParseException(msg=f"{context}: payload is a {type(data).__name__}")
+        return _typed(
+            cls,
+            dict(
+                match=MatchInfo.decode(_section(data, "match", dict, context), context),
+                stage_type=_section(data, "stage", dict, context).get("stage_type"),
+                lineups=_items(data, "lineups", LineupEntry.decode, context),
+                logs=_items(data, "logs", LogEntry.decode, context),
+                comments=_section(data, "comments", list, context),
+            ),
+            context,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Member:
+    user_id: int
+    user_name: str
+    account_value: str  # summoner name
+    tu_status: int  # role in the team
+
+    @classmethod
+    def decode(cls, data: dict, context: str = "") -> "Member":
+        return _typed(cls, {name: data[name] for name, _ in _field_types(cls)}, context)
+
+
+@dataclass(frozen=True, slots=True)
+class TeamPayload:
+    team_name: str | None
+    team_short: str | int | None  # numeric tags are sent as numbers
+    team_logo_img_url: str | None
+    members: tuple[Member, ...]
+    matches: list[int]
+    current_division: str | None  # group title of the latest stage
+
+    @classmethod
+    def decode(cls, data: dict, team_id: int = None) -> "TeamPayload":
+        """:raise PrimeLeagueParseException: if a part of the payload has an unexpected type"""
+        context = f"Team {team_id}"
+        if not isinstance(data, dict):
+            raise PrimeLeagueParseException(msg=f"{context}: payload is a {type(data).__name__}")
+        team = _section(data, "team", dict, context)
+        stages = _section(data, "stages", list, context)
+        current_stage = stages[-1] if stages and isinstance(stages[-1], dict) else {}
+        matches = _section(data, "matches", list, context)
+        if any(type(x) is not int for x in matches):
+            raise PrimeLeagueParseException(msg=f"{context}: matches contains a value that is no match ID")
+        return _typed(
+            cls,
+            dict(
+                team_name=team.get("team_name"),
+                team_short=team.get("team_short"),
+                team_logo_img_url=team.get("team_logo_img_url"),
+                members=_items(data, "members", Member.decode, context),
+                matches=matches,
+                current_division=current_stage.get("group_title"),
+            ),
+            context,
+        )
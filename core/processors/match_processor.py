@@ -1,11 +1,21 @@
 from abc import abstractmethod
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Union
-
-from core.parsing.logs import BaseLog, LogChangeTime, LogSchedulingAutoConfirmation, LogSchedulingConfirmation
+from functools import cached_property
+from typing import Iterator, Union
+
+from core.parsing.logs import (
+    BaseLog,
+    LogChangeTime,
+    LogCursor,
+    LogSchedulingAutoConfirmation,
+    LogSchedulingConfirmation,
+    actions_of,
+)
+from core.parsing.payloads import MatchPayload
 from core.providers.base import Provider
 from core.providers.prime_league import PrimeLeagueProvider
-from utils.utils import timestamp_to_datetime
+from utils.datetimes import timestamp_to_datetime, timestamps_to_datetimes
 
 
 class __MatchDataMethods:
@@ -70,15 +80,47 @@ class __MatchDataMethods:
         pass
 
 
+# Actions of the logs that set the match begin, the newest of them is the latest match begin log
+MATCH_BEGIN_ACTIONS = actions_of(LogSchedulingConfirmation, LogSchedulingAutoConfirmation, LogChangeTime)
+
+
+@dataclass(slots=True)
+class CompiledMatch:
+    """
+    Everything ``TemporaryMatchData`` reads from a match, extracted once from the team's point of view. The fields
+    are the results of the equally named getters of ``MatchDataProcessor``.
+    """
+
+    match_day: int | None
+    match_type: str | None
+    enemy_team_id: int | None
+    enemy_lineup: list[tuple]
+    team_lineup: list[tuple]
+    closed: bool
+    result: str | None
+    team_made_latest_suggestion: bool | None
+    latest_suggestions: list[datetime]
+    begin: datetime | None
+    match_begin_confirmed: bool
+    datetime_until_auto_confirmation: datetime | None
+    latest_confirmation_log: BaseLog | None
+    has_side_choice: bool
+    comments: list[dict]
+
+
 class MatchDataProcessor(__MatchDataMethods):
     """
     Converting json data to functions and providing these.
+    The match is compiled on the first call of a getter: one pass over the payload extracts everything the getters
+    return, so further getters only read the cached ``CompiledMatch``.
     """
 
-    def __init__(self, match_id: int, team_id: int, provider: Provider = None):
+    def __init__(self, match_id: int, team_id: int, provider: Provider = None, log_cursor: LogCursor = None):
         """
         :param match_id:
         :param team_id: team's point of view to the match. For example to determine enemy_team of the match.
+        :param log_cursor: position up to which the logs were processed by the last update, only the logs after it
+            are ``new_logs``. Default: all logs are new.
         :raises PrimeLeagueConnectionException:
         :raise PrimeLeagueParseException:
         :raise Match404Exception:
@@ -86,42 +128,130 @@ class MatchDataProcessor(__MatchDataMethods):
         if provider is None:
             provider = PrimeLeagueProvider()
         self.data = provider.get_match(match_id=match_id)
+        self.payload = MatchPayload.decode(self.data, match_id)
+        self.match = self.payload.match
         self.team_id = team_id
-        self.team_is_team_1 = self.data_match.get("team_id_1") == team_id
-        self.logs = []
-        self.__parse_logs()
+        self.team_is_team_1 = self.match.team_id_1 == team_id
+        self.log_cursor = log_cursor
+        self.new_log_entries = (log_cursor or LogCursor()).new_entries(self.payload.logs)
+        self.__compiled = None
 
-    def has_side_choice(self):
-        """
-        Returns whether the team has side choice in their first game or not.
-        Returns: Boolean
+    @cached_property
+    def logs(self) -> list[BaseLog]:
+        """All parsed logs, newest first. Prefer ``iter_logs`` if only some logs are needed."""
+        return list(self.iter_logs())
 
-        """
-        return self.team_is_team_1
+    @cached_property
+    def new_logs(self) -> list[BaseLog]:
+        """The logs after the log cursor, oldest first. Only these entries are parsed."""
+        return list(self.iter_logs(new_only=True))[::-1]
 
-    def __parse_logs(self):
-        logs = self.data.get("logs", [])
-        for i in reversed(logs):
+    @property
+    def next_log_cursor(self) -> LogCursor:
+        """The cursor after all logs, pass it to the processor of the next update."""
+        return LogCursor.after(self.payload.logs)
+
+    def iter_logs(self, actions: set[str] = None, new_only: bool = False) -> Iterator[BaseLog]:
+        """
+        Parse the logs on demand, newest first. Stop iterating as soon as the wanted log was found.
+        :param actions: only parse logs of these actions (see ``actions_of``), default: all
+        :param new_only: stop at the log cursor
+        """
+        for i in reversed(self.new_log_entries if new_only else self.payload.logs):
+            if actions is not None and i.log_action not in actions:
+                continue
             log = BaseLog.return_specified_log(
-                timestamp=i.get("log_time"),
-                user_id=i.get("user_id"),
-                action=i.get("log_action"),
-                details=i.get("log_details"),
+                timestamp=i.log_time,
+                user_id=i.user_id,
+                action=i.log_action,
+                details=i.log_details,
             )
             if log is not None:
-                self.logs.append(log)
+                yield log
 
-    @property
-    def data_match(self):
-        return self.data.get("match", {})
+    def compile(self) -> CompiledMatch:
+        """
+        All getters at once, the result is cached. Use it instead of the getters if most of them are needed.
+        """
+        if self.__compiled is None:
+            self.__compiled = self.__compile()
+        return self.__compiled
+
+    def __compile(self) -> CompiledMatch:
+        match = self.match
+        team_is_team_1 = self.team_is_team_1
+
+        team_lineup, enemy_lineup = [], []
+        for x in self.payload.lineups:
+            (team_lineup if x.team_id == self.team_id else enemy_lineup).append(
+                (x.user_id, x.user_name, x.account_value, None)
+            )
 
-    @property
-    def data_stage(self):
-        return self.data.get("stage", {})
+        # If match_result is set, the first number indicates the score that the team reached.
+        score_1, score_2 = match.match_score_1, match.match_score_2
+        if not score_1 and not score_2:
+            result = None
+        else:
+            result = f"{score_1}:{score_2}" if team_is_team_1 else f"{score_2}:{score_1}"
+
+        # status can be 0 (no suggestion), 1 or 2 (team 1 or team 2)
+        status = match.match_scheduling_status
+        team_made_latest_suggestion = None if status == 0 else (status == 1) == team_is_team_1
+
+        # The time a team has until the suggestion is auto confirmed
+        mode = match.match_scheduling_mode  # fixed, free, regulated
+        hours_until_auto_confirm = match.match_scheduling_time
+        suggestion_made_at = match.match_scheduling_suggest_time
+        if (
+            mode in ["fixed", "free", None]
+            or hours_until_auto_confirm in [0, None]
+            or suggestion_made_at in [0, None]  # 0 happens, when suggested time is in the past
+        ):
+            datetime_until_auto_confirmation = None
+        else:
+            datetime_until_auto_confirmation = max(
+                timestamp_to_datetime(suggestion_made_at), timestamp_to_datetime(match.match_scheduling_start)
+            ) + timedelta(hours=hours_until_auto_confirm)
+
+        enemy_team_id = match.team_id_2 if team_is_team_1 else match.team_id_1
+        suggestions = (
+            match.match_scheduling_suggest_0,
+            match.match_scheduling_suggest_1,
+            match.match_scheduling_suggest_2,
+        )
+        return CompiledMatch(
+            match_day=match.match_playday,
+            match_type=self.payload.stage_type,
+            enemy_team_id=enemy_team_id if enemy_team_id != 0 else None,
+            enemy_lineup=enemy_lineup,
+            team_lineup=team_lineup,
+            closed=match.match_status == "finished",  # possible match_status: ["upcoming", "pending", "finished"]
+            result=result,
+            team_made_latest_suggestion=team_made_latest_suggestion,
+            latest_suggestions=timestamps_to_datetimes(x for x in suggestions if x),
+            begin=None if match.match_time is None else timestamp_to_datetime(match.match_time),
+            match_begin_confirmed=hours_until_auto_confirm == 0,
+            datetime_until_auto_confirmation=datetime_until_auto_confirmation,
+            latest_confirmation_log=self.__latest_match_begin_log(hours_until_auto_confirm == 0),
+            has_side_choice=team_is_team_1,
+            comments=self.payload.comments,
+        )
 
-    @property
-    def data_group(self):
-        return self.data.get("group", {})
+    def __latest_match_begin_log(self, match_begin_confirmed: bool) -> BaseLog | None:
+        # With a log cursor, the confirmation is usually one of the new logs
+        log = next(self.iter_logs(MATCH_BEGIN_ACTIONS, new_only=self.log_cursor is not None), None)
+        if log is None and self.log_cursor is not None and match_begin_confirmed:
+            # Confirmed by a log that was processed before, e.g. the confirmation was delayed
+            log = next(self.iter_logs(MATCH_BEGIN_ACTIONS), None)
+        return log
+
+    def has_side_choice(self):
+        """
+        Returns whether the team has side choice in their first game or not.
+        Returns: Boolean
+
+        """
+        return self.team_is_team_1
 
     def get_enemy_lineup(self):
         """
@@ -129,10 +259,7 @@ class MatchDataProcessor(__MatchDataMethods):
         Returns: A list of enemy player tuples. Structure of tuple: (user_id, user_name, summoner_name, None)
 
         """
-        lineup = self.data.get("lineups", [])
-        return [
-            (x["user_id"], x["user_name"], x["account_value"], None) for x in lineup if x["team_id"] != self.team_id
-        ]
+        return self.compile().enemy_lineup
 
     def get_team_lineup(self):
         """
@@ -140,16 +267,13 @@ class MatchDataProcessor(__MatchDataMethods):
         Returns: A list of team player tuples. Structure of tuple: (user_id, user_name, summoner_name, None)
 
         """
-        lineup = self.data.get("lineups", [])
-        return [
-            (x["user_id"], x["user_name"], x["account_value"], None) for x in lineup if x["team_id"] == self.team_id
-        ]
+        return self.compile().team_lineup
 
     def get_match_closed(self):
         """
         possible match_status: ["upcoming", "pending", "finished"]
         """
-        return self.data_match.get("match_status", None) == "finished"
+        return self.compile().closed
 
     def get_match_result(self):
         """
@@ -157,41 +281,25 @@ class MatchDataProcessor(__MatchDataMethods):
         Returns:
             `None`, if match_score_1 and match_score_2 are None else String
         """
-        match_score_1 = self.data_match.get('match_score_1', None)
-        match_score_2 = self.data_match.get('match_score_2', None)
-        if not match_score_1 and not match_score_2:
-            return None
-        return f"{match_score_1}:{match_score_2}" if self.team_is_team_1 else f"{match_score_2}:{match_score_1}"
+        return self.compile().result
 
     def get_latest_suggestions(self):
         """
         :return: A list of suggestions, every suggestion is of type `datetime`. List can be empty.
         """
-        suggestions = [
-            self.data_match.get("match_scheduling_suggest_0"),
-            self.data_match.get("match_scheduling_suggest_1"),
-            self.data_match.get("match_scheduling_suggest_2"),
-        ]
-        return [timestamp_to_datetime(x) for x in suggestions if x]
+        return self.compile().latest_suggestions
 
     def get_team_made_latest_suggestion(self):
         """
         Returns: True if team made latest suggestion, else False. Returns None if no suggestion was made at all.
         """
-        status = self.data_match.get("match_scheduling_status")
-        if status == 0:
-            return None
-        status = True if status == 1 else False  # status can be 1 or 2 (team 1 or team 2)
-        return status == self.team_is_team_1
+        return self.compile().team_made_latest_suggestion
 
     def get_match_begin(self):
         """
         Returns: datetime if set, else None
         """
-        timestamp = self.data_match.get("match_time", None)
-        if timestamp is None:
-            return None
-        return timestamp_to_datetime(timestamp)
+        return self.compile().begin
 
     def get_match_begin_confirmed(self) -> bool:
         """
@@ -200,42 +308,20 @@ class MatchDataProcessor(__MatchDataMethods):
         Returns: True, if match_scheduling_time is 0
 
         """
-        return self.data_match.get("match_scheduling_time", None) == 0
+        return self.compile().match_begin_confirmed
 
     def get_datetime_until_auto_confirmation(self) -> Union[None, datetime]:
         """
         Returns the time a team has until the suggestion is auto confirmed or None if suggestion is already confirmed.
         """
-        match_scheduling_mode = self.data_match.get("match_scheduling_mode", None)  # fixed, free, regulated
-        hours_until_auto_confirm = self.data_match.get("match_scheduling_time", None)
-        suggestion_made_at = self.data_match.get("match_scheduling_suggest_time", None)
-        if (
-            match_scheduling_mode in ["fixed", "free", None]
-            or hours_until_auto_confirm in [0, None]
-            or suggestion_made_at in [0, None]  # 0 happens, when suggested time is in the past
-        ):
-            return None
-        scheduling_start = self.data_match.get("match_scheduling_start")
-        dt = max(timestamp_to_datetime(suggestion_made_at), timestamp_to_datetime(scheduling_start)) + timedelta(
-            hours=hours_until_auto_confirm
-        )
-        return dt
+        return self.compile().datetime_until_auto_confirmation
 
     def get_latest_match_begin_log(self):
         """
         Returns: Return latest log if begin is set and a log exists, else None
+        With a log cursor, logs before it are only searched if the match begin is confirmed.
         """
-        for log in self.logs:
-            if isinstance(
-                log,
-                (
-                    LogSchedulingConfirmation,
-                    LogSchedulingAutoConfirmation,
-                    LogChangeTime,
-                ),
-            ):
-                return log
-        return None
+        return self.compile().latest_confirmation_log
 
     def get_enemy_team_id(self):
         """
@@ -243,14 +329,13 @@ class MatchDataProcessor(__MatchDataMethods):
         Returns: Integer or None
 
         """
-        team_id = self.data_match.get("team_id_2") if self.team_is_team_1 else self.data_match.get("team_id_1")
-        return team_id if team_id != 0 else None
+        return self.compile().enemy_team_id
 
     def get_match_day(self):
-        return self.data_match.get("match_playday")
+        return self.compile().match_day
 
     def get_match_type(self):
-        return self.data_stage.get("stage_type")
+        return self.compile().match_type
 
     def get_comments(self):
-        return self.data.get("comments", [])
+        return self.compile().comments
@@ -1,6 +1,7 @@
 from abc import abstractmethod
 
 from app_prime_league.models import Split
+from core.parsing.payloads import TeamPayload
 from core.providers.base import Provider
 from core.providers.prime_league import PrimeLeagueProvider
 
@@ -42,43 +43,23 @@ class TeamDataProcessor(__TeamDataMethods):
 
     def __init__(self, team_id: int, provider: Provider = None):
         """
-        :raises PrimeLeagueConnectionException, TeamWebsite404Exception
+        :raises PrimeLeagueConnectionException, TeamWebsite404Exception, PrimeLeagueParseException
         :param team_id:
         """
         if provider is None:
             provider = PrimeLeagueProvider()
         self.data = provider.get_team(team_id=team_id)
+        self.payload = TeamPayload.decode(self.data, team_id)
         self.team_id = team_id
 
-    @property
-    def data_team(self):
-        return self.data.get("team", {})
-
-    @property
-    def data_stages(self):
-        return self.data.get("stages", [])
-
-    @property
-    def data_current_stage(self):
-        try:
-            return self.data_stages[-1]
-        except IndexError:
-            return {}
-
     def get_team_tag(self):
-        return self.data_team.get("team_short")
+        return self.payload.team_short
 
     def get_members(self):
-        def _parse_member(x):
-            return (
-                x["user_id"],
-                x["user_name"],
-                x["account_value"],
-                x["tu_status"] in [self.ROLE_LEADER, self.ROLE_CAPTAIN],
-            )
-
-        members = [_parse_member(x) for x in self.data.get("members", [])]
-        return members
+        return [
+            (x.user_id, x.user_name, x.account_value, x.tu_status in [self.ROLE_LEADER, self.ROLE_CAPTAIN])
+            for x in self.payload.members
+        ]
 
     def get_matches(self):
         """
@@ -86,16 +67,16 @@ class TeamDataProcessor(__TeamDataMethods):
         :return: List: [1,2,3]
 
         """
-        return self.data.get("matches", [])
+        return self.payload.matches
 
     def get_team_name(self):
-        return self.data_team.get("team_name")
+        return self.payload.team_name
 
     def get_current_division(self):
-        return self.data_current_stage.get("group_title", None)
+        return self.payload.current_division
 
     def get_logo(self):
-        return self.data_team.get("team_logo_img_url")
+        return self.payload.team_logo_img_url
 
     def get_split(self):
         """Currently we don't get the split from the API, so we have to get it from our own database."""
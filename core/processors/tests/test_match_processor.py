@@ -4,9 +4,12 @@ from zoneinfo import ZoneInfo
 
 from django.test import TestCase
 
+from core.parsing.logs import BaseLog, LogChangeTime, LogCursor, LogSchedulingConfirmation, LogSuggestion
 from core.processors.match_processor import MatchDataProcessor
+from core.processors.team_processor import TeamDataProcessor
 from core.providers.prime_league import PrimeLeagueProvider
 from core.test_utils import string_to_datetime
+from utils.exceptions import PrimeLeagueParseException
 
 
 class MatchBeginTest(TestCase):
@@ -534,3 +537,193 @@ class LatestMatchBeginLogTest(TestCase):
         }
         processor = MatchDataProcessor(1, 100)
         self.assertEqual(processor.get_match_day(), 1)
+
+
+class PayloadDecodingTest(TestCase):
+    databases = []
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_match_missing_fields(self, get_match):
+        get_match.return_value = {"match": {"team_id_1": 1}, "stage": None, "logs": None}
+        processor = MatchDataProcessor(1, 1)
+        self.assertTrue(processor.has_side_choice())
+        self.assertIsNone(processor.match.match_status)
+        self.assertIsNone(processor.get_match_type())
+        self.assertEqual(processor.logs, [])
+        self.assertEqual(processor.get_comments(), [])
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_match_schema_drift(self, get_match):
+        get_match.return_value = {"match": []}
+        with self.assertRaises(PrimeLeagueParseException):
+            MatchDataProcessor(1, 1)
+
+        get_match.return_value = {"lineups": [{"team_id": 1, "user_id": 1, "user_name": "Grayknife"}]}
+        with self.assertRaises(PrimeLeagueParseException):
+            MatchDataProcessor(1, 1)
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_match_field_type_drift(self, get_match):
+        for payload in [
+            {"match": {"team_id_1": "1"}},
+            {"match": {"match_time": "1633266000"}},
+            {"match": {"match_score_1": True}},
+            {"logs": [{"log_time": 1633266000, "user_id": 1, "log_action": 1, "log_details": ""}]},
+            {"lineups": [{"team_id": 1, "user_id": "1", "user_name": "Grayknife", "account_value": "Grayknife"}]},
+        ]:
+            get_match.return_value = payload
+            with self.subTest(payload=payload), self.assertRaises(PrimeLeagueParseException):
+                MatchDataProcessor(1, 1)
+
+    @patch.object(PrimeLeagueProvider, 'get_team')
+    def test_team(self, get_team):
+        get_team.return_value = {
+            "team": {"team_name": "Team", "team_short": "T"},
+            "members": [
+                {"user_id": 1, "user_name": "Grayknife", "account_value": "Grayknife", "tu_status": 30},
+                {"user_id": 2, "user_name": "Player", "account_value": "Player", "tu_status": 10},
+            ],
+            "stages": [{"group_title": "Division 1"}, {"group_title": "Division 2"}],
+        }
+        processor = TeamDataProcessor(1)
+        self.assertEqual(processor.get_team_tag(), "T")
+        self.assertIsNone(processor.get_logo())
+        self.assertEqual(processor.get_current_division(), "Division 2")
+        self.assertEqual(processor.get_matches(), [])
+        self.assertListEqual(
+            processor.get_members(),
+            [(1, "Grayknife", "Grayknife", True), (2, "Player", "Player", False)],
+        )
+
+        get_team.return_value = {"members": {"user_id": 1}}
+        with self.assertRaises(PrimeLeagueParseException):
+            TeamDataProcessor(1)
+
+        get_team.return_value = {"team": {"team_short": 123}, "matches": [1, 2]}
+        self.assertEqual(TeamDataProcessor(1).get_team_tag(), 123)
+        for payload in [
+            {"team": {"team_name": 1}},
+            {"members": [{"user_id": 1, "user_name": "Grayknife", "account_value": "Grayknife", "tu_status": "30"}]},
+            {"matches": ["1"]},
+        ]:
+            get_team.return_value = payload
+            with self.subTest(payload=payload), self.assertRaises(PrimeLeagueParseException):
+                TeamDataProcessor(1)
+
+
+class CompiledMatchTest(TestCase):
+    databases = []
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_compile(self, get_match):
+        get_match.return_value = {
+            "match": {
+                "team_id_1": 2,
+                "team_id_2": 1,
+                "match_score_1": 2,
+                "match_score_2": 0,
+                "match_status": "finished",
+                "match_scheduling_mode": "regulated",
+                "match_scheduling_status": 2,
+                "match_scheduling_time": 24,
+                "match_scheduling_start": 1633000000,
+                "match_scheduling_suggest_time": 1633266000,
+                "match_scheduling_suggest_0": 1633266000,
+            },
+            "lineups": [
+                {"team_id": 1, "user_id": 1, "user_name": "Grayknife", "account_value": "Grayknife"},
+                {"team_id": 2, "user_id": 2, "user_name": "One Enemy", "account_value": "One Enemy"},
+            ],
+        }
+        processor = MatchDataProcessor(1, 1)
+        match = processor.compile()
+        self.assertIs(processor.compile(), match)
+        self.assertEqual(match.enemy_team_id, 2)
+        self.assertEqual(match.team_lineup, [(1, "Grayknife", "Grayknife", None)])
+        self.assertEqual(match.enemy_lineup, [(2, "One Enemy", "One Enemy", None)])
+        self.assertEqual(match.result, "0:2")
+        self.assertTrue(match.closed)
+        self.assertTrue(match.team_made_latest_suggestion)
+        self.assertFalse(match.has_side_choice)
+        self.assertEqual(match.latest_suggestions, [string_to_datetime("2021-10-03 15:00")])
+        self.assertEqual(match.datetime_until_auto_confirmation, string_to_datetime("2021-10-04 15:00"))
+        self.assertEqual(processor.get_datetime_until_auto_confirmation(), match.datetime_until_auto_confirmation)
+
+
+class LazyLogsTest(TestCase):
+    databases = []
+
+    LOGS = [
+        {
+            "log_time": 1633000000,
+            "user_id": 1,
+            "log_action": "scheduling_confirm",
+            "log_details": "Sun, 03 Oct 2021 15:00:00 +0200",
+        },
+        {
+            "log_time": 1633100000,
+            "user_id": 0,
+            "log_action": "change_time",
+            "log_details": "Manually adjusted time to 2021-10-04 15:00 +0200",
+        },
+        {
+            "log_time": 1633200000,
+            "user_id": 2,
+            "log_action": "scheduling_suggest",
+            "log_details": "1: Tue, 05 Oct 2021 15:00:00 +0200",
+        },
+        {"log_time": 1633300000, "user_id": 2, "log_action": "unknown_action", "log_details": ""},
+    ]
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_latest_match_begin_log(self, get_match):
+        get_match.return_value = {"logs": self.LOGS}
+        processor = MatchDataProcessor(1, 1)
+        with patch.object(BaseLog, "return_specified_log", wraps=BaseLog.return_specified_log) as parse:
+            log = processor.get_latest_match_begin_log()
+        self.assertIsInstance(log, LogChangeTime)
+        # Neither the newer suggestion nor the older confirmation are parsed
+        parse.assert_called_once()
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_iter_logs(self, get_match):
+        get_match.return_value = {"logs": self.LOGS}
+        processor = MatchDataProcessor(1, 1)
+        self.assertEqual([type(x) for x in processor.logs], [LogSuggestion, LogChangeTime, LogSchedulingConfirmation])
+        self.assertEqual([type(x) for x in processor.iter_logs({"scheduling_confirm"})], [LogSchedulingConfirmation])
+
+
+class LogCursorTest(TestCase):
+    databases = []
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_new_logs(self, get_match):
+        get_match.return_value = {"logs": LazyLogsTest.LOGS}
+        processor = MatchDataProcessor(1, 1)
+        self.assertEqual(
+            [type(x) for x in processor.new_logs], [LogSchedulingConfirmation, LogChangeTime, LogSuggestion]
+        )
+        self.assertEqual(processor.next_log_cursor, LogCursor(4, 1633300000))
+
+        processor = MatchDataProcessor(1, 1, log_cursor=LogCursor(2, 1633100000))
+        with patch.object(BaseLog, "return_specified_log", wraps=BaseLog.return_specified_log) as parse:
+            self.assertEqual([type(x) for x in processor.new_logs], [LogSuggestion])
+        self.assertEqual(parse.call_count, 2)
+        # No new confirmation and the match begin is not confirmed, older logs are not parsed
+        self.assertIsNone(processor.get_latest_match_begin_log())
+
+        processor = MatchDataProcessor(1, 1, log_cursor=LogCursor(4, 1633300000))
+        self.assertEqual(processor.new_logs, [])
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_confirmation_before_cursor(self, get_match):
+        get_match.return_value = {"match": {"match_scheduling_time": 0}, "logs": LazyLogsTest.LOGS}
+        processor = MatchDataProcessor(1, 1, log_cursor=LogCursor(4, 1633300000))
+        self.assertIsInstance(processor.get_latest_match_begin_log(), LogChangeTime)
+
+    @patch.object(PrimeLeagueProvider, 'get_match')
+    def test_logs_do_not_continue_cursor(self, get_match):
+        get_match.return_value = {"logs": LazyLogsTest.LOGS[:2]}
+        for cursor in [LogCursor(3, 1633200000), LogCursor(2, 1633000000)]:
+            processor = MatchDataProcessor(1, 1, log_cursor=cursor)
+            self.assertEqual(len(processor.new_logs), 2)
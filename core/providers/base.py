@@ -1,4 +1,18 @@
+import asyncio
+import hashlib
+import json
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+BatchResult = tuple[int, dict | Exception]
+
+
+def payload_hash(payload: dict | None) -> str | None:
+    """Hash of the canonical JSON of a payload, independent of the order of keys."""
+    if payload is None:
+        return None
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
 
 
 class Provider(ABC):
@@ -9,3 +23,100 @@ class Provider(ABC):
     @abstractmethod
     def get_match(self, match_id: int):
         pass
+
+    def get_match_hash(self, match_id: int) -> str:
+        """
+        ``payload_hash`` of the match data, if it equals the hash of the last processed data, the match is
+        unchanged. Raises like ``get_match``.
+        """
+        return payload_hash(self.get_match(match_id))
+
+    def known_match_hash(self, match_id: int) -> str | None:
+        """Hash of the match data the provider already knows without hashing the data, else None."""
+        return None
+
+    def get_teams(self, team_ids: Iterable[int]) -> Iterator[BatchResult]:
+        """
+        Fetch several teams and yield ``(team_id, data)`` as soon as each team arrived. If a team could not be
+        fetched, ``data`` is the exception ``get_team`` would have raised, so one failing team does not end the whole
+        batch. Providers that can fetch teams in one batch override this, the default fetches them one by one.
+        """
+        for team_id in team_ids:
+            try:
+                yield team_id, self.get_team(team_id)
+            except Exception as e:
+                yield team_id, e
+
+    def get_matches(self, match_ids: Iterable[int]) -> Iterator[BatchResult]:
+        """Like ``get_teams`` for matches."""
+        for match_id in match_ids:
+            try:
+                yield match_id, self.get_match(match_id)
+            except Exception as e:
+                yield match_id, e
+
+    def prefetch(self, team_ids: Iterable[int] = (), match_ids: Iterable[int] = ()) -> int:
+        """
+        Start fetching teams and matches that are requested soon without waiting for them, in the given order.
+        Providers that fetch on demand do nothing.
+        :return: number of teams and matches that are fetched in the background
+        """
+        return 0
+
+
+class AsyncProvider(ABC):
+    """
+    Asynchronous counterpart of ``Provider``. ``get_teams`` and ``get_matches`` run all fetches concurrently on the
+    event loop, but never more than ``concurrency`` at once. Use it as an async context manager to release its
+    connections afterwards.
+    """
+
+    def __init__(self, concurrency: int = 50):
+        self.concurrency = concurrency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get_team(self, team_id: int):
+        pass
+
+    @abstractmethod
+    async def get_match(self, match_id: int):
+        pass
+
+    async def get_teams(self, team_ids: Iterable[int]) -> AsyncIterator[BatchResult]:
+        """Like ``Provider.get_teams``, the teams are yielded in the order they arrived."""
+        async for result in self._fetch_many(self.get_team, team_ids):
+            yield result
+
+    async def get_matches(self, match_ids: Iterable[int]) -> AsyncIterator[BatchResult]:
+        """Like ``Provider.get_matches``, the matches are yielded in the order they arrived."""
+        async for result in self._fetch_many(self.get_match, match_ids):
+            yield result
+
+    async def _fetch_many(
+        self, fetch: Callable[[int], Awaitable[dict]], detail_ids: Iterable[int]
+    ) -> AsyncIterator[BatchResult]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(detail_id):
+            async with semaphore:
+                try:
+                    return detail_id, await fetch(detail_id)
+                except Exception as e:
+                    return detail_id, e
+
+        tasks = [asyncio.ensure_future(fetch_one(x)) for x in dict.fromkeys(detail_ids)]
+        try:
+            for result in asyncio.as_completed(tasks):
+                yield await result
+        finally:  # The caller stopped iterating early
+            for task in tasks:
+                task.cancel()
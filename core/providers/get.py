@@ -1,7 +1,7 @@
 from django.conf import settings
 
-from .prime_league import PrimeLeagueProvider
-from .request_queue_provider import RequestQueueProvider
+from .prime_league import AsyncPrimeLeagueProvider, PrimeLeagueProvider
+from .request_queue_provider import AsyncRequestQueueProvider, RequestQueueProvider
 
 
 def get_provider(**provider_kwargs):
@@ -9,3 +9,13 @@ def get_provider(**provider_kwargs):
     if settings.FILES_FROM_STORAGE:
         return PrimeLeagueProvider()
     return RequestQueueProvider(**provider_kwargs)
+
+
+def get_async_provider(**provider_kwargs):
+    """
+    Asynchronous counterpart of ``get_provider``. Like the synchronous updaters, the API is only requested by the
+    request queue worker, which respects its rate limit, so there is no asynchronous HTTP client for it.
+    """
+    if settings.FILES_FROM_STORAGE:
+        return AsyncPrimeLeagueProvider()
+    return AsyncRequestQueueProvider(**provider_kwargs)
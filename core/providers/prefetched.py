@@ -0,0 +1,35 @@
+from core.providers.base import BatchResult, Provider, payload_hash
+
+
+class PrefetchedProvider(Provider):
+    """
+    Serves teams and matches that were already fetched in a batch (see ``Provider.get_teams``) and falls back to
+    another provider for everything else. Stored exceptions are raised like the fallback would have raised them.
+    """
+
+    def __init__(self, fallback: Provider, teams: list[BatchResult] = None, matches: list[BatchResult] = None):
+        self.fallback = fallback
+        self.teams = dict(teams or [])
+        self.matches = dict(matches or [])
+
+    @staticmethod
+    def _get(prefetched: dict, detail_id: int, fetch):
+        if detail_id not in prefetched:
+            return fetch(detail_id)
+        data = prefetched[detail_id]
+        if isinstance(data, Exception):
+            raise data
+        return data
+
+    def get_team(self, team_id: int):
+        return self._get(self.teams, team_id, self.fallback.get_team)
+
+    def get_match(self, match_id: int):
+        return self._get(self.matches, match_id, self.fallback.get_match)
+
+    def get_match_hash(self, match_id: int) -> str:
+        if match_id not in self.matches:
+            return self.fallback.get_match_hash(match_id)
+        data = self.get_match(match_id)
+        # The batch provider knows the hash if the data was fetched by it
+        return self.fallback.known_match_hash(match_id) or payload_hash(data)
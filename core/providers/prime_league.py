@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 
@@ -5,7 +6,7 @@ from django.conf import settings
 from rest_framework import status
 
 from core.api import PrimeLeagueAPI
-from core.providers.base import Provider
+from core.providers.base import AsyncProvider, Provider
 from utils.exceptions import (
     Match404Exception,
     PrimeLeagueConnectionException,
@@ -43,12 +44,29 @@ class PrimeLeagueProvider(Provider):
         :raise PrimeLeagueParseException:
         :raise Match404Exception:
         """
-        file_name = f"match_{match_id}.json"
         if LOCAL:
             return self.__get_local_json(self.__MATCH_FILE_PATTERN % match_id)
 
-        resp = self.api.request_match(match_id)
+        return self._match_from_response(match_id, self.api.request_match(match_id))
 
+    def get_match_if_modified(self, match_id, etag=None, last_modified=None) -> tuple[dict | None, dict]:
+        """
+        Conditional variant of ``get_match``.
+        :param etag: ``ETag`` of the last response of this match
+        :param last_modified: ``Last-Modified`` of the last response of this match
+        :return: ``(None, validators)`` if the match is unchanged since the last response, else
+            ``(match data, validators)``. Store the validators for the next call.
+        """
+        if LOCAL:
+            return self.get_match(match_id), {}
+        resp = self.api.request_match(match_id, headers=self.api.conditional_headers(etag, last_modified))
+        if resp.status_code == status.HTTP_304_NOT_MODIFIED:
+            return None, self.api.validators(resp, etag, last_modified)
+        return self._match_from_response(match_id, resp), self.api.validators(resp)
+
+    def _match_from_response(self, match_id, resp) -> dict:
+        """Parses a match response of the API, raises like ``get_match``."""
+        file_name = f"match_{match_id}.json"
         if not status.is_success(resp.status_code):
             if resp.status_code == status.HTTP_404_NOT_FOUND:
                 raise Match404Exception(status_code=resp.status_code, msg=f"Match {match_id}")
@@ -76,7 +94,19 @@ class PrimeLeagueProvider(Provider):
             text_json = self.__get_local_json(self.__TEAM_FILE_PATTERN % team_id)
             return text_json
 
-        resp = self.api.request_team(team_id)
+        return self._team_from_response(team_id, self.api.request_team(team_id))
+
+    def get_team_if_modified(self, team_id, etag=None, last_modified=None) -> tuple[dict | None, dict]:
+        """Conditional variant of ``get_team``, see ``get_match_if_modified``."""
+        if LOCAL:
+            return self.get_team(team_id), {}
+        resp = self.api.request_team(team_id, headers=self.api.conditional_headers(etag, last_modified))
+        if resp.status_code == status.HTTP_304_NOT_MODIFIED:
+            return None, self.api.validators(resp, etag, last_modified)
+        return self._team_from_response(team_id, resp), self.api.validators(resp)
+
+    def _team_from_response(self, team_id, resp) -> dict:
+        """Parses a team response of the API, raises like ``get_team``."""
         if not status.is_success(resp.status_code):
             if resp.status_code == status.HTTP_404_NOT_FOUND:
                 raise TeamWebsite404Exception(msg=f"Team {team_id}")
@@ -115,3 +145,27 @@ class PrimeLeagueProvider(Provider):
         file_path = os.path.join(settings.STORAGE_DIR, file_name)
         with open(file_path, 'w+', encoding='utf8') as f:
             f.write(obj)
+
+
+class AsyncPrimeLeagueProvider(AsyncProvider):
+    """
+    Asynchronous counterpart of ``PrimeLeagueProvider`` for ``settings.FILES_FROM_STORAGE``. Files of the storage are
+    read directly on the event loop. Only requests to the API run ``PrimeLeagueProvider`` in a thread, the API is
+    requested by the request queue worker in production anyway (see ``get_async_provider``).
+    """
+
+    def __init__(self, concurrency: int = 50, provider: PrimeLeagueProvider = None):
+        super().__init__(concurrency=concurrency)
+        self.provider = provider or PrimeLeagueProvider()
+
+    async def get_match(self, match_id) -> dict:
+        """See ``PrimeLeagueProvider.get_match``."""
+        if LOCAL:
+            return self.provider.get_match(match_id)
+        return await asyncio.to_thread(self.provider.get_match, match_id)
+
+    async def get_team(self, team_id) -> dict:
+        """See ``PrimeLeagueProvider.get_team``."""
+        if LOCAL:
+            return self.provider.get_team(team_id)
+        return await asyncio.to_thread(self.provider.get_team, team_id)
@@ -1,10 +1,16 @@
+import asyncio
+import logging
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from time import sleep
+from typing import AsyncIterator, Iterator
 
+from django.conf import settings
 from rest_framework import status
 
-from core.providers.base import Provider
-from request_queue import EndpointType, RequestQueue, push
+from core.providers.base import AsyncProvider, BatchResult, Provider, payload_hash
+from request_queue import EndpointType, get_queue, push
+from request_queue.base import response_payload
 from utils.exceptions import (
     Match404Exception,
     PrimeLeagueConnectionException,
@@ -12,6 +18,36 @@ from utils.exceptions import (
     UnauthorizedException,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def record_cache_lookups(queue, endpoint: EndpointType, results: dict[str, int]):
+    """
+    Count lookups in the responses collection (hit, stale, miss or bypass if forced). The counts are stored in the
+    queue and not in this process, because only the worker serves metrics (``provider_cache_lookups``).
+    """
+    results = {result: count for result, count in results.items() if count}
+    if not results:
+        return
+    try:
+        queue.record_cache_lookups(endpoint.value, results)
+    except Exception as e:
+        logger.warning(f"Could not record cache lookups: {e}")
+
+
+def response_ttl(endpoint: EndpointType, response: dict) -> timedelta:
+    """
+    Time a successful response is served from the responses collection without requesting it again.
+    Matches starting soon (or just started) change more often, so they expire faster.
+    """
+    if endpoint == EndpointType.MATCH:
+        match_time = response.get("match_time")
+        if match_time is None:  # Responses saved before the worker stored match_time
+            match_time = ((response.get("payload") or {}).get("match") or {}).get("match_time")
+        if match_time and abs(match_time - time.time()) <= settings.REQUEST_QUEUE_MATCH_SOON_WINDOW:
+            return timedelta(seconds=settings.REQUEST_QUEUE_MATCH_SOON_TTL)
+    return timedelta(seconds=settings.REQUEST_QUEUE_RESPONSE_TTL[endpoint.value])
+
 
 class RequestQueueProvider(Provider):
     """
@@ -22,6 +58,7 @@ class RequestQueueProvider(Provider):
     def __init__(self, priority, force=False):
         self.priority = priority
         self.force = force
+        self.match_hashes: dict[int, str] = {}
 
     def get_match(self, match_id) -> dict:
         """
@@ -31,19 +68,21 @@ class RequestQueueProvider(Provider):
         :raise PrimeLeagueParseException:
         :raise Match404Exception:
         """
-        response = self._get_or_wait(EndpointType.MATCH, match_id)
+        return self._match_payload(match_id, self._get_or_wait(EndpointType.MATCH, match_id))
 
-        if response is None:
-            raise PrimeLeagueConnectionException(msg=f"Match {match_id}: Job disappeared, WTF?")
+    def get_match_hash(self, match_id) -> str:
+        """
+        The hash the worker stored with the response, see ``Provider.get_match_hash``. The payload is not decoded,
+        so unchanged matches are never decoded if their payload is stored raw.
+        """
+        if match_id not in self.match_hashes:
+            response = self._get_or_wait(EndpointType.MATCH, match_id)
+            self._raise_for_match(match_id, response)
+            self._remember_hash(match_id, response)
+        return self.match_hashes[match_id]
 
-        if status.is_success(response["status_code"]):
-            return response["payload"]
-        else:
-            if response["status_code"] == status.HTTP_404_NOT_FOUND:
-                raise Match404Exception(status_code=response["status_code"], msg=f"Match {match_id}")
-            elif response["status_code"] == status.HTTP_403_FORBIDDEN:
-                raise UnauthorizedException()
-            raise PrimeLeagueConnectionException(status_code=response["status_code"], msg=f"Match {match_id}")
+    def known_match_hash(self, match_id) -> str | None:
+        return self.match_hashes.get(match_id)
 
     def get_team(self, team_id) -> dict[str, str]:
         """
@@ -53,12 +92,70 @@ class RequestQueueProvider(Provider):
         :raise PrimeLeagueParseException:
         :raise TeamWebsite404Exception:
         """
-        response = self._get_or_wait(EndpointType.TEAM, team_id)
+        return self._team_payload(team_id, self._get_or_wait(EndpointType.TEAM, team_id))
+
+    def get_matches(self, match_ids) -> Iterator[BatchResult]:
+        """Pushes all missing matches at once and yields them as soon as they are crawled."""
+        for match_id, response in self._get_or_wait_many(EndpointType.MATCH, match_ids):
+            try:
+                yield match_id, self._match_payload(match_id, response)
+            except Exception as e:
+                yield match_id, e
+
+    def get_teams(self, team_ids) -> Iterator[BatchResult]:
+        """Pushes all missing teams at once and yields them as soon as they are crawled."""
+        for team_id, response in self._get_or_wait_many(EndpointType.TEAM, team_ids):
+            try:
+                yield team_id, self._team_payload(team_id, response)
+            except Exception as e:
+                yield team_id, e
+
+    def prefetch(self, team_ids=(), match_ids=()) -> int:
+        """Pushes the teams and matches without a fresh response with one bulk write per endpoint."""
+        queue = get_queue()
+        pushed = 0
+        for endpoint, detail_ids in ((EndpointType.TEAM, team_ids), (EndpointType.MATCH, match_ids)):
+            detail_ids = list(dict.fromkeys(detail_ids))
+            if not self.force:
+                latest_responses = queue.get_responses(endpoint, detail_ids)
+                detail_ids = [x for x in detail_ids if self._cache_result(endpoint, latest_responses.get(x)) != "hit"]
+            if detail_ids:
+                pushed += len(queue.push_many(endpoint, detail_ids, priority=self.priority))
+        return pushed
+
+    def _match_payload(self, match_id, response: dict | None) -> dict:
+        self._raise_for_match(match_id, response)
+        payload = response_payload(response)
+        self._remember_hash(match_id, response, payload)
+        return payload
+
+    def _remember_hash(self, match_id, response: dict, payload: dict = None):
+        if response.get("payload_hash") is None:
+            # Responses crawled before hashes were stored have none
+            payload = response_payload(response) if payload is None else payload
+            self.match_hashes[match_id] = payload_hash(payload)
+        else:
+            self.match_hashes[match_id] = response["payload_hash"]
+
+    @staticmethod
+    def _raise_for_match(match_id, response: dict | None):
+        if response is None:
+            raise PrimeLeagueConnectionException(msg=f"Match {match_id}: Job disappeared, WTF?")
+        if status.is_success(response["status_code"]):
+            return
+        if response["status_code"] == status.HTTP_404_NOT_FOUND:
+            raise Match404Exception(status_code=response["status_code"], msg=f"Match {match_id}")
+        elif response["status_code"] == status.HTTP_403_FORBIDDEN:
+            raise UnauthorizedException()
+        raise PrimeLeagueConnectionException(status_code=response["status_code"], msg=f"Match {match_id}")
+
+    @staticmethod
+    def _team_payload(team_id, response: dict | None) -> dict:
         if response is None:
             raise PrimeLeagueConnectionException(msg=f"Team {team_id}: Job disappeared, WTF?")
 
         if status.is_success(response["status_code"]):
-            return response["payload"]
+            return response_payload(response)
         else:
             if response["status_code"] == status.HTTP_404_NOT_FOUND:
                 raise TeamWebsite404Exception(msg=f"Team {team_id}")
@@ -68,29 +165,128 @@ class RequestQueueProvider(Provider):
 
     def _get_or_wait(self, endpoint: EndpointType, detail_id: int) -> dict[str, str | dict | datetime] | None:
         """
-        Get the latest response from responses if the entry's
-        - last_crawled timestamp is less than 15 minutes,
-        - entry is not None,
+        Get the latest response from responses if
+        - force is False,
         - status_code is 200 and
-        - force is False
-        or pushes the job and wait until it's done.
+        - the entry is younger than its ``response_ttl``.
+        If the entry expired less than ``REQUEST_QUEUE_STALE_WHILE_REVALIDATE`` seconds ago, it is returned anyway
+        and a refresh job is pushed without waiting for it.
+        Otherwise, pushes the job and waits until the worker notifies that it's done.
         :param endpoint: Endpoint that should be used
         :param detail_id: teamID or matchID
         :return:
         """
-        queue = RequestQueue()
-        if not self.force:
+        queue = get_queue()
+        if self.force:
+            record_cache_lookups(queue, endpoint, {"bypass": 1})
+        else:
             latest_response = queue.get_response(endpoint, detail_id)
-            if (
-                latest_response is not None
-                and status.is_success(latest_response["status_code"])
-                and latest_response["last_crawled"] > datetime.utcnow() + timedelta(minutes=15)
-            ):
+            result = self._cache_result(endpoint, latest_response)
+            record_cache_lookups(queue, endpoint, {result: 1})
+            logger.debug(f"Response cache {result} for {endpoint.value} {detail_id}")
+            if result == "hit":
+                return latest_response
+            if result == "stale":
+                push(endpoint, detail_id, priority=self.priority)
                 return latest_response
         job_id = push(endpoint, detail_id, priority=self.priority)
-
-        while queue.job_is_queued(job_id):
-            sleep(1)
+        queue.wait_for_job(job_id)
 
         response = queue.get_response(endpoint, detail_id)
         return response
+
+    def _get_or_wait_many(self, endpoint: EndpointType, detail_ids) -> Iterator[tuple[int, dict | None]]:
+        """
+        Batch version of ``_get_or_wait``: All jobs are pushed with one bulk write. Cached responses are yielded
+        first, the others as soon as their job is done.
+        """
+        detail_ids = list(dict.fromkeys(detail_ids))
+        queue = get_queue()
+        cached, to_fetch, to_revalidate = {}, [], []
+        if self.force:
+            record_cache_lookups(queue, endpoint, {"bypass": len(detail_ids)})
+            to_fetch = detail_ids
+        else:
+            latest_responses = queue.get_responses(endpoint, detail_ids)
+            results = Counter()
+            for detail_id in detail_ids:
+                response = latest_responses.get(detail_id)
+                result = self._cache_result(endpoint, response)
+                results[result] += 1
+                if result == "miss":
+                    to_fetch.append(detail_id)
+                    continue
+                if result == "stale":
+                    to_revalidate.append(detail_id)
+                cached[detail_id] = response
+            record_cache_lookups(queue, endpoint, dict(results))
+
+        job_ids = queue.push_many(endpoint, to_fetch + to_revalidate, priority=self.priority)
+        yield from cached.items()
+
+        detail_ids_by_job = {job_ids[x]: x for x in to_fetch if x in job_ids}
+        for detail_id in to_fetch:
+            if detail_id not in job_ids:  # Already done between pushing and looking up the job IDs
+                yield detail_id, queue.get_response(endpoint, detail_id)
+        for job_id in queue.wait_for_jobs(detail_ids_by_job):
+            detail_id = detail_ids_by_job[job_id]
+            yield detail_id, queue.get_response(endpoint, detail_id)
+
+    @staticmethod
+    def _cache_result(endpoint: EndpointType, response: dict | None) -> str:
+        """Returns "hit" if the response is fresh, "stale" if it can be revalidated in background, else "miss"."""
+        if response is None or not status.is_success(response["status_code"]):
+            return "miss"
+        age = datetime.utcnow() - response["last_crawled"]
+        ttl = response_ttl(endpoint, response)
+        if age <= ttl:
+            return "hit"
+        if age <= ttl + timedelta(seconds=settings.REQUEST_QUEUE_STALE_WHILE_REVALIDATE):
+            return "stale"
+        return "miss"
+
+
+class AsyncRequestQueueProvider(AsyncProvider):
+    """
+    Asynchronous counterpart of ``RequestQueueProvider``. The API is still only requested by the request queue
+    worker, so its rate limit is respected. Batches are pushed at once and waited for in one worker thread, which
+    hands every response to the event loop as soon as it arrived.
+    """
+
+    def __init__(self, priority, force=False, concurrency: int = 50):
+        super().__init__(concurrency=concurrency)
+        self.provider = RequestQueueProvider(priority=priority, force=force)
+
+    async def get_match(self, match_id) -> dict:
+        """See ``RequestQueueProvider.get_match``."""
+        return await asyncio.to_thread(self.provider.get_match, match_id)
+
+    async def get_team(self, team_id) -> dict:
+        """See ``RequestQueueProvider.get_team``."""
+        return await asyncio.to_thread(self.provider.get_team, team_id)
+
+    async def get_matches(self, match_ids) -> AsyncIterator[BatchResult]:
+        async for result in self._iterate_in_thread(self.provider.get_matches(match_ids)):
+            yield result
+
+    async def get_teams(self, team_ids) -> AsyncIterator[BatchResult]:
+        async for result in self._iterate_in_thread(self.provider.get_teams(team_ids)):
+            yield result
+
+    @staticmethod
+    async def _iterate_in_thread(results: Iterator[BatchResult]) -> AsyncIterator[BatchResult]:
+        loop = asyncio.get_running_loop()
+        received = asyncio.Queue()
+        done = object()
+
+        def consume():
+            try:
+                for result in results:
+                    loop.call_soon_threadsafe(received.put_nowait, result)
+            finally:
+                loop.call_soon_threadsafe(received.put_nowait, done)
+
+        consumer = asyncio.ensure_future(asyncio.to_thread(consume))
+        while (result := await received.get()) is not done:
+            yield result
+        await consumer  # Reraise exceptions of the consumer thread
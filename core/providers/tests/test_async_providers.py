@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from core.providers.base import AsyncProvider
+from core.providers.prime_league import AsyncPrimeLeagueProvider
+from core.providers.request_queue_provider import AsyncRequestQueueProvider
+from utils.exceptions import Match404Exception, PrimeLeagueConnectionException
+
+
+class FakeAsyncProvider(AsyncProvider):
+    def __init__(self, concurrency):
+        super().__init__(concurrency=concurrency)
+        self.running = 0
+        self.max_running = 0
+
+    async def get_team(self, team_id):
+        return await self.get_match(team_id)
+
+    async def get_match(self, match_id):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.001 * (match_id % 3))
+        finally:
+            self.running -= 1
+        if match_id == 13:
+            raise PrimeLeagueConnectionException(msg=f"Match {match_id}")
+        if match_id == 14:
+            raise KeyError("match")
+        return {"match_id": match_id}
+
+
+def response(status_code, payload=None):
+    resp = MagicMock(status_code=status_code, text="")
+    resp.json.return_value = payload
+    return resp
+
+
+class AsyncProviderTest(SimpleTestCase):
+    async def test_concurrency_is_bounded(self):
+        provider = FakeAsyncProvider(concurrency=5)
+        results = [x async for x in provider.get_matches(range(40))]
+        self.assertEqual(provider.max_running, 5)
+        self.assertEqual(sorted(x for x, _ in results), list(range(40)))
+
+    async def test_failures_are_yielded(self):
+        results = dict([x async for x in FakeAsyncProvider(concurrency=5).get_teams([12, 13, 12])])
+        self.assertEqual(results[12], {"match_id": 12})
+        self.assertIsInstance(results[13], PrimeLeagueConnectionException)
+        self.assertEqual(len(results), 2)
+
+    async def test_unexpected_failures_are_yielded(self):
+        results = dict([x async for x in FakeAsyncProvider(concurrency=5).get_matches([14, 12])])
+        self.assertIsInstance(results[14], KeyError)
+        self.assertEqual(results[12], {"match_id": 12})
+
+    async def test_pending_fetches_are_cancelled_when_stopping_early(self):
+        provider = FakeAsyncProvider(concurrency=5)
+        results = provider.get_matches(range(40))
+        await anext(results)
+        await results.aclose()
+        await asyncio.sleep(0.01)
+        self.assertEqual(provider.running, 0)
+
+
+@patch("core.providers.prime_league.LOCAL", False)
+@patch("core.providers.prime_league.SAVE_REQUEST", False)
+class AsyncPrimeLeagueProviderTest(SimpleTestCase):
+    def setUp(self):
+        self.provider = AsyncPrimeLeagueProvider()
+        self.provider.provider.api = MagicMock()
+
+    async def test_match_is_parsed(self):
+        self.provider.provider.api.request_match.side_effect = lambda x: response(200, {"match": x})
+        self.assertEqual(await self.provider.get_match(1), {"match": 1})
+
+    async def test_match_404_raises(self):
+        self.provider.provider.api.request_match.return_value = response(404)
+        with self.assertRaises(Match404Exception):
+            await self.provider.get_match(1)
+
+
+class AsyncRequestQueueProviderTest(SimpleTestCase):
+    async def test_batch_is_streamed_from_thread(self):
+        provider = AsyncRequestQueueProvider(priority=2)
+        error = PrimeLeagueConnectionException(msg="Team 2")
+        provider.provider = MagicMock()
+        provider.provider.get_teams.return_value = iter([(1, {"team": 1}), (2, error)])
+        results = [x async for x in provider.get_teams([1, 2])]
+        self.assertEqual(results, [(1, {"team": 1}), (2, error)])
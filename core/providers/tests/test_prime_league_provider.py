@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from core.api import PrimeLeagueAPI
+from core.providers.prime_league import PrimeLeagueProvider
+
+
+def response(status_code, payload=None, headers=None):
+    resp = MagicMock(status_code=status_code, text="", headers=headers or {})
+    resp.json.return_value = payload
+    return resp
+
+
+@patch("core.providers.prime_league.LOCAL", False)
+@patch("core.providers.prime_league.SAVE_REQUEST", False)
+class ConditionalRequestTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch.object(PrimeLeagueAPI, "request")
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = PrimeLeagueProvider()
+
+    def test_validators_are_sent(self):
+        self.request.return_value = response(200, {"match": 1}, headers={"ETag": '"b"'})
+        data, validators = self.provider.get_match_if_modified(1, etag='"a"', last_modified="Mon, 01 Jan 2024")
+        self.assertEqual(data, {"match": 1})
+        self.assertEqual(validators, {"etag": '"b"', "last_modified": None})
+        self.assertEqual(
+            self.request.call_args.kwargs["headers"],
+            {"If-None-Match": '"a"', "If-Modified-Since": "Mon, 01 Jan 2024"},
+        )
+
+    def test_first_request_is_unconditional(self):
+        self.request.return_value = response(200, {"team": {"team_id": 1}})
+        self.provider.get_team_if_modified(1)
+        self.assertEqual(self.request.call_args.kwargs["headers"], {})
+
+    def test_not_modified_keeps_validators(self):
+        self.request.return_value = response(304)
+        data, validators = self.provider.get_team_if_modified(1, etag='"a"')
+        self.assertIsNone(data)
+        self.assertEqual(validators, {"etag": '"a"', "last_modified": None})
+        self.request.return_value.json.assert_not_called()
@@ -0,0 +1,187 @@
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.providers.base import payload_hash
+from core.providers.prefetched import PrefetchedProvider
+from core.providers.request_queue_provider import RequestQueueProvider
+from request_queue import EndpointType
+from utils import fast_json
+from utils.exceptions import Match404Exception, PrimeLeagueConnectionException, TeamWebsite404Exception
+
+
+def response(minutes_ago: float, status_code=200, payload=None):
+    return {
+        "status_code": status_code,
+        "payload": payload or {"team": {"team_id": 1}},
+        "last_crawled": datetime.utcnow() - timedelta(minutes=minutes_ago),
+    }
+
+
+@override_settings(
+    REQUEST_QUEUE_RESPONSE_TTL={"team": 10 * 60, "match": 5 * 60},
+    REQUEST_QUEUE_MATCH_SOON_TTL=60,
+    REQUEST_QUEUE_MATCH_SOON_WINDOW=24 * 60 * 60,
+    REQUEST_QUEUE_STALE_WHILE_REVALIDATE=0,
+)
+class ResponseCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.queue = MagicMock()
+        patchers = [
+            patch("core.providers.request_queue_provider.get_queue", return_value=self.queue),
+            patch("core.providers.request_queue_provider.push", return_value="job"),
+        ]
+        self.push = patchers[1].start()
+        patchers[0].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_fresh_response_is_reused(self):
+        cached = response(minutes_ago=2)
+        self.queue.get_response.return_value = cached
+        self.assertEqual(RequestQueueProvider(priority=2).get_team(1), cached["payload"])
+        self.push.assert_not_called()
+        self.queue.wait_for_job.assert_not_called()
+        self.queue.record_cache_lookups.assert_called_once_with("team", {"hit": 1})
+
+    def test_expired_response_is_crawled_again(self):
+        self.queue.get_response.return_value = response(minutes_ago=11)
+        RequestQueueProvider(priority=2).get_team(1)
+        self.push.assert_called_once_with(EndpointType.TEAM, 1, priority=2)
+        self.queue.wait_for_job.assert_called_once_with("job")
+
+    def test_failed_response_is_not_reused(self):
+        self.queue.get_response.return_value = response(minutes_ago=0, status_code=500)
+        with self.assertRaises(PrimeLeagueConnectionException):
+            RequestQueueProvider(priority=2).get_team(1)
+        self.push.assert_called_once()
+
+    def test_force_bypasses_cache(self):
+        self.queue.get_response.return_value = response(minutes_ago=0)
+        RequestQueueProvider(priority=0, force=True).get_team(1)
+        self.push.assert_called_once()
+
+    def test_raw_payload_is_decoded_lazily(self):
+        payload = {"match": {"match_id": 1, "match_time": int(time.time()) + 60 * 60}}
+        raw = {**response(minutes_ago=0.5), "payload": None, "payload_raw": fast_json.dumps(payload)}
+        raw.update(payload_hash="stored", match_time=payload["match"]["match_time"])
+        self.queue.get_response.return_value = raw
+        provider = RequestQueueProvider(priority=2)
+
+        with patch("request_queue.base.fast_json.loads", wraps=fast_json.loads) as loads:
+            self.assertEqual(provider.get_match_hash(1), "stored")
+            loads.assert_not_called()
+            self.assertEqual(provider.get_match(1), payload)
+            loads.assert_called_once()
+        self.push.assert_not_called()
+
+    def test_match_starting_soon_expires_faster(self):
+        soon = {"match": {"match_time": int(time.time()) + 60 * 60}}
+        later = {"match": {"match_time": int(time.time()) + 7 * 24 * 60 * 60}}
+        self.assertEqual(
+            RequestQueueProvider._cache_result(EndpointType.MATCH, response(minutes_ago=2, payload=soon)), "miss"
+        )
+        self.assertEqual(
+            RequestQueueProvider._cache_result(EndpointType.MATCH, response(minutes_ago=2, payload=later)), "hit"
+        )
+
+    @override_settings(REQUEST_QUEUE_STALE_WHILE_REVALIDATE=10 * 60)
+    def test_stale_while_revalidate(self):
+        cached = response(minutes_ago=15)
+        self.queue.get_response.return_value = cached
+        self.assertEqual(RequestQueueProvider(priority=2).get_team(1), cached["payload"])
+        self.push.assert_called_once_with(EndpointType.TEAM, 1, priority=2)
+        self.queue.wait_for_job.assert_not_called()
+
+
+@override_settings(
+    REQUEST_QUEUE_RESPONSE_TTL={"team": 10 * 60, "match": 5 * 60},
+    REQUEST_QUEUE_STALE_WHILE_REVALIDATE=0,
+)
+class BatchTest(SimpleTestCase):
+    def setUp(self):
+        self.queue = MagicMock()
+        patcher = patch("core.providers.request_queue_provider.get_queue", return_value=self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_teams(self):
+        fresh = response(minutes_ago=1, payload={"team": {"team_id": 1}})
+        crawled = response(minutes_ago=0, payload={"team": {"team_id": 2}})
+        not_found = response(minutes_ago=0, status_code=404)
+        self.queue.get_responses.return_value = {1: fresh, 2: response(minutes_ago=60)}
+        self.queue.push_many.return_value = {2: "job2", 3: "job3"}
+        self.queue.wait_for_jobs.return_value = iter(["job3", "job2"])
+        self.queue.get_response.side_effect = lambda endpoint, detail_id: {2: crawled, 3: not_found}[detail_id]
+
+        results = list(RequestQueueProvider(priority=2).get_teams([1, 2, 3, 1]))
+
+        self.queue.push_many.assert_called_once_with(EndpointType.TEAM, [2, 3], priority=2)
+        self.queue.record_cache_lookups.assert_called_once_with("team", {"hit": 1, "miss": 2})
+        self.assertEqual([x for x, _ in results], [1, 3, 2])
+        self.assertEqual(results[0][1], fresh["payload"])
+        self.assertIsInstance(results[1][1], TeamWebsite404Exception)
+        self.assertEqual(results[2][1], crawled["payload"])
+
+    def test_broken_payload_does_not_end_batch(self):
+        broken = {**response(minutes_ago=1), "payload_raw": b"{"}
+        fresh = response(minutes_ago=1, payload={"team": {"team_id": 2}})
+        self.queue.get_responses.return_value = {1: broken, 2: fresh}
+        self.queue.push_many.return_value = {}
+        self.queue.wait_for_jobs.return_value = iter([])
+
+        results = list(RequestQueueProvider(priority=2).get_teams([1, 2]))
+
+        self.assertEqual([x for x, _ in results], [1, 2])
+        self.assertIsInstance(results[0][1], ValueError)
+        self.assertEqual(results[1][1], fresh["payload"])
+
+    def test_match_hashes_of_batch_are_kept(self):
+        stored = {**response(minutes_ago=1, payload={"match": {}}), "payload_hash": "stored"}
+        legacy = response(minutes_ago=1, payload={"match": {"a": 1, "b": 2}})
+        self.queue.get_responses.return_value = {1: stored, 2: legacy}
+        self.queue.push_many.return_value = {}
+        self.queue.wait_for_jobs.return_value = iter([])
+        provider = RequestQueueProvider(priority=2)
+
+        list(provider.get_matches([1, 2]))
+
+        self.assertEqual(provider.get_match_hash(1), "stored")
+        self.assertEqual(provider.get_match_hash(2), payload_hash({"match": {"b": 2, "a": 1}}))
+        self.queue.get_response.assert_not_called()
+
+    def test_prefetch_pushes_all_without_fresh_response_in_order(self):
+        self.queue.get_responses.side_effect = lambda endpoint, detail_ids: (
+            {1: response(minutes_ago=1)} if endpoint == EndpointType.TEAM else {}
+        )
+        self.queue.push_many.side_effect = lambda endpoint, detail_ids, priority: {x: f"job{x}" for x in detail_ids}
+
+        pushed = RequestQueueProvider(priority=2).prefetch(team_ids=[3, 1, 2], match_ids=[9, 8, 9])
+
+        self.assertEqual(pushed, 4)
+        self.queue.push_many.assert_any_call(EndpointType.TEAM, [3, 2], priority=2)
+        self.queue.push_many.assert_any_call(EndpointType.MATCH, [9, 8], priority=2)
+        self.queue.wait_for_jobs.assert_not_called()
+
+
+class PrefetchedProviderTest(SimpleTestCase):
+    def test_prefetched_and_fallback(self):
+        fallback = MagicMock()
+        fallback.get_match.return_value = {"match": {"match_id": 2}}
+        provider = PrefetchedProvider(fallback, matches=[(1, {"match": {"match_id": 1}}), (3, Match404Exception())])
+
+        self.assertEqual(provider.get_match(match_id=1), {"match": {"match_id": 1}})
+        self.assertEqual(provider.get_match(match_id=2), {"match": {"match_id": 2}})
+        with self.assertRaises(Match404Exception):
+            provider.get_match(match_id=3)
+        fallback.get_match.assert_called_once_with(2)
+
+    def test_hash_known_by_fallback_is_reused(self):
+        fallback = MagicMock()
+        fallback.known_match_hash.side_effect = lambda match_id: {1: "stored"}.get(match_id)
+        provider = PrefetchedProvider(fallback, matches=[(1, {"match": {}}), (2, {"match": {}})])
+
+        self.assertEqual(provider.get_match_hash(1), "stored")
+        self.assertEqual(provider.get_match_hash(2), payload_hash({"match": {}}))
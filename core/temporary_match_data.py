@@ -4,11 +4,23 @@ from datetime import datetime
 from typing import Union
 
 from app_prime_league.models import Split, Team
+from core.parsing.logs import BaseLog, LogCursor
 from core.processors.match_processor import MatchDataProcessor
 from core.processors.team_processor import TeamDataProcessor
 from core.providers.base import Provider
+from utils.datetimes import timestamp_to_datetime, timestamps_to_datetimes
 from utils.exceptions import TeamWebsite404Exception
-from utils.utils import timestamp_to_datetime
+
+
+def split_of(match_id: int, begin: datetime | None) -> Split | None:
+    """The current split if the match begins in it. The current split is a setting, not part of the match data."""
+    if begin is None:
+        return None
+    split = Split.objects.get_current_split()
+    if not split.in_range(begin):
+        logging.getLogger("updates").warning(f"Match {match_id=} is not in current split {split=}")
+        return None
+    return split
 
 
 @dataclass
@@ -21,6 +33,7 @@ class TemporaryComment:
     comment_flag_staff: bool
     comment_flag_official: bool
     content: str = field(default="")
+    _comment_time_as_datetime: datetime = field(default=None, repr=False, compare=False)
 
     def comment_as_dict(self):
         return {
@@ -35,7 +48,9 @@ class TemporaryComment:
 
     @property
     def comment_time_as_datetime(self):
-        return timestamp_to_datetime(self.comment_time)
+        if self._comment_time_as_datetime is None:
+            self._comment_time_as_datetime = timestamp_to_datetime(self.comment_time)
+        return self._comment_time_as_datetime
 
 
 class TemporaryMatchData:
@@ -61,6 +76,8 @@ class TemporaryMatchData:
         comments=None,
         datetime_until_auto_confirmation=None,
         split=None,
+        new_logs=None,
+        log_cursor=None,
     ):
         self.match_id = match_id
         self.match_day = match_day
@@ -82,6 +99,9 @@ class TemporaryMatchData:
         self.has_side_choice = has_side_choice
         self.comments: list = comments or []
         self.split: Union[None, Split] = split
+        # Logs since the last update, oldest first, and the cursor after them. None if unknown.
+        self.new_logs: Union[None, list[BaseLog]] = new_logs
+        self.log_cursor: Union[None, LogCursor] = log_cursor
 
     def __repr__(self):
         return (
@@ -106,10 +126,10 @@ class TemporaryMatchData:
 
     @classmethod
     def create_temporary_comments(cls, comment_list):
-        comments = []
-        for i in comment_list:
-            comment = TemporaryComment(**i)
-            comments.append(comment)
+        comments = [TemporaryComment(**i) for i in comment_list]
+        # Convert the comment times at once
+        for comment, dt in zip(comments, timestamps_to_datetimes(x.comment_time for x in comments)):
+            comment._comment_time_as_datetime = dt
         return comments
 
     @staticmethod
@@ -117,12 +137,14 @@ class TemporaryMatchData:
         team: Team,
         match_id: int,
         provider: Provider,
+        log_cursor: LogCursor = None,
     ) -> "TemporaryMatchData":
         """
         Method to initialize a TMD object from a MatchDataProcessor
         :param team: Team
         :param match_id: ID of the match
         :param provider: provider instance to use for the processors
+        :param log_cursor: cursor of the logs processed by the last update, see ``Match.last_log_index``
         :return: Initialized Temporary Match Data
         :raise PrimeLeagueConnectionException:
         :raise PrimeLeagueParseException:
@@ -133,32 +155,32 @@ class TemporaryMatchData:
             match_id=match_id,
             team_id=team.id,
             provider=provider,
+            log_cursor=log_cursor,
         )
 
+        match = processor.compile()
+
         tmd.match_id = match_id
-        tmd.match_day = processor.get_match_day()
-        tmd.match_type = processor.get_match_type()
+        tmd.match_day = match.match_day
+        tmd.match_type = match.match_type
         tmd.team = team
-        tmd.enemy_team_id = processor.get_enemy_team_id()
-        tmd.enemy_lineup = processor.get_enemy_lineup()
-        tmd.team_lineup = processor.get_team_lineup()
-        tmd.closed = processor.get_match_closed()
-        tmd.team_made_latest_suggestion = processor.get_team_made_latest_suggestion()
-        tmd.latest_suggestions = processor.get_latest_suggestions()
-        tmd.begin = processor.get_match_begin()
-        tmd.match_begin_confirmed = processor.get_match_begin_confirmed()
-        tmd.datetime_until_auto_confirmation = processor.get_datetime_until_auto_confirmation()
-        tmd.latest_confirmation_log = processor.get_latest_match_begin_log()
-        tmd.result = processor.get_match_result()
-        tmd.has_side_choice = processor.has_side_choice()
-        tmd.comments = TemporaryMatchData.create_temporary_comments(processor.get_comments())
-
-        split = Split.objects.get_current_split()
-        if split is not None and tmd.begin is not None:
-            if split.in_range(tmd.begin):
-                tmd.split = split
-            else:
-                logging.getLogger("updates").warning(f"Match {match_id=} is not in current split {split=}")
+        tmd.enemy_team_id = match.enemy_team_id
+        tmd.enemy_lineup = match.enemy_lineup
+        tmd.team_lineup = match.team_lineup
+        tmd.closed = match.closed
+        tmd.team_made_latest_suggestion = match.team_made_latest_suggestion
+        tmd.latest_suggestions = match.latest_suggestions
+        tmd.begin = match.begin
+        tmd.match_begin_confirmed = match.match_begin_confirmed
+        tmd.datetime_until_auto_confirmation = match.datetime_until_auto_confirmation
+        tmd.latest_confirmation_log = match.latest_confirmation_log
+        tmd.result = match.result
+        tmd.has_side_choice = match.has_side_choice
+        tmd.comments = TemporaryMatchData.create_temporary_comments(match.comments)
+        tmd.new_logs = processor.new_logs
+        tmd.log_cursor = processor.next_log_cursor
+
+        tmd.split = split_of(match_id, tmd.begin)
 
         if not Team.objects.filter(id=tmd.enemy_team_id).exists():
             tmd.create_enemy_team_data_from_website(provider)
@@ -0,0 +1,37 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from core.http import HTTP_CONNECTIONS, connection_reuse_stats, create_session
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(HTTP_RETRIES=0)
+class SessionTest(SimpleTestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.host = f"127.0.0.1:{server.server_address[1]}"
+
+    def test_connection_is_reused(self):
+        session = create_session()
+        self.addCleanup(session.close)
+        for _ in range(3):
+            self.assertEqual(session.get(f"http://{self.host}/").json(), {})
+        self.assertEqual(HTTP_CONNECTIONS.get(host=self.host, connection="new"), 1)
+        self.assertEqual(connection_reuse_stats()[self.host], {"new": 1, "reused": 2})
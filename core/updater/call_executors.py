@@ -1,31 +1,77 @@
 import logging
 import threading
 import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 
 from app_prime_league.models import Match, Team
+from core.providers.get import get_provider
 from core.updater.matches_check_executor import update_uncompleted_matches
 from core.updater.teams_check_executor import update_teams
+from request_queue import EndpointType, get_queue
 
 thread_local = threading.local()
 logger = logging.getLogger("updates")
 
+PRIORITY_WINDOW = timedelta(weeks=3)  # Matches beginning within this window are updated first
+
 
 def update_teams_and_matches(notify: bool):
     """Updates teams and matches."""
     start_time = time.time()
     teams = Team.objects.get_teams_to_update()
+    prefetch_teams_and_matches(teams, Match.current_split_objects.get_matches_to_update())
     logger.info(f"Updating {len(teams)} teams...")
     update_teams(teams=teams, notify=notify)
     logger.info(f"Updated {len(teams)} teams in {time.time() - start_time:.2f} seconds")
 
     start_time = time.time()
+    # Evaluated after the team updates, which may have created matches
     uncompleted_matches = Match.current_split_objects.get_matches_to_update()
     logger.info(f"Checking {len(uncompleted_matches)} uncompleted matches...")
     update_uncompleted_matches(matches=uncompleted_matches, notify=notify)
     logger.info(f"Checked {len(uncompleted_matches)} uncompleted matches in {time.time() - start_time:.2f} seconds")
+    retain_responses_to_update()
     updated_teams = [x.id for x in teams]
     updated_matches = [x.match_id for x in uncompleted_matches]
     return {
         "TEAMS": updated_teams,
         "MATCHES": updated_matches,
     }
+
+
+def prefetch_teams_and_matches(teams, matches) -> int:
+    """
+    Push all teams and matches of an update cycle into the request queue at once, so the worker crawls them while
+    the updaters are still busy and the updaters mostly find fresh responses. Teams are pushed least recently updated
+    first, matches beginning within the ``PRIORITY_WINDOW`` before all others, like ``get_priority_teams_and_matches``
+    picks them.
+    :return: number of teams and matches that are fetched in the background
+    """
+    later = timezone.now() + PRIORITY_WINDOW
+    teams = sorted(teams, key=lambda x: x.updated_at)
+    matches = sorted(matches, key=lambda x: (x.begin is None or x.begin > later, x.updated_at))
+    pushed = get_provider(priority=2).prefetch(team_ids=[x.id for x in teams], match_ids=[x.match_id for x in matches])
+    logger.info(f"Prefetching {pushed} of {len(teams)} teams and {len(matches)} matches")
+    return pushed
+
+
+def retain_responses_to_update():
+    """
+    Keep the crawled responses of all teams and matches that are still updated, the responses of all others expire
+    in the request queue (see ``RequestQueue.retain_responses``).
+    """
+    if settings.FILES_FROM_STORAGE:
+        return
+    team_ids = Team.objects.get_teams_to_update().values_list("id", flat=True)
+    match_ids = Match.current_split_objects.get_matches_to_update().values_list("match_id", flat=True).distinct()
+    try:
+        queue = get_queue()
+        expiring_teams = queue.retain_responses(EndpointType.TEAM, team_ids)
+        expiring_matches = queue.retain_responses(EndpointType.MATCH, match_ids)
+    except Exception as e:
+        logger.warning(f"Could not update the retention of crawled responses: {e}")
+        return
+    logger.info(f"Responses of {expiring_teams} teams and {expiring_matches} matches will expire")
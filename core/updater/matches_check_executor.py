@@ -1,9 +1,9 @@
 import concurrent.futures
 import logging
-import threading
-from itertools import repeat
+from collections import defaultdict
+from typing import Iterator
 
-import niquests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
 from app_prime_league.models import Match
@@ -16,24 +16,27 @@ from core.comparers.match_comparer import (
     NewSuggestionComparer,
     SchedulingConfirmationComparer,
 )
-from core.providers.get import get_provider
-from core.temporary_match_data import TemporaryMatchData
+from core.parsing.logs import LogCursor
+from core.providers.base import AsyncProvider, Provider
+from core.providers.get import get_async_provider, get_provider
+from core.providers.prefetched import PrefetchedProvider
+from core.temporary_match_data import TemporaryMatchData, split_of
 from utils.exceptions import Match404Exception
 from utils.messages_logger import log_exception
 
-thread_local = threading.local()
 update_logger = logging.getLogger("updates")
 notifications_logger = logging.getLogger("notifications")
 
 
-def get_session():
-    if not hasattr(thread_local, "session"):
-        thread_local.session = niquests.Session()
-    return thread_local.session
+def log_cursor_of(match: Match) -> LogCursor | None:
+    """The cursor of the logs processed by the last update of the match, None if they were not processed yet."""
+    if match.last_log_index is None:
+        return None
+    return LogCursor(match.last_log_index, match.last_log_time)
 
 
 @log_exception
-def update_match(match: Match, notify=True, priority=2):
+def update_match(match: Match, notify=True, priority=2, provider: Provider = None):
     """
     Checks if a match has new data on the website, updates the match accordingly and sends notifications.
 
@@ -48,12 +51,26 @@ def update_match(match: Match, notify=True, priority=2):
     :param match: Match that will be updated
     :param priority: Priority new data will be fetched.
     :param notify: If True, notifications will be sent.
+    :param provider: Optional provider, e.g. a ``PrefetchedProvider`` holding the already fetched match.
+
+    If the match data is unchanged since the last update (equal ``data_hash``), only ``updated_at`` and the fields
+    that do not come from the match data (``split``) are updated.
     """
+    provider = provider or get_provider(priority=priority)
     try:
+        data_hash = provider.get_match_hash(match.match_id)
+        # Without an enemy team, the data may not be processed completely, e.g. the enemy team was deleted
+        if data_hash == match.data_hash and match.enemy_team_id is not None:
+            # Fields that do not come from the match data are refreshed anyway
+            match.split = split_of(match.match_id, match.begin)
+            match.save(update_fields=["split", "updated_at"])
+            update_logger.debug(f"Match {match} unchanged, skipped processing.")
+            return
         tmd = TemporaryMatchData.create_from_website(
             team=match.team,
             match_id=match.match_id,
-            provider=get_provider(priority=priority),
+            provider=provider,
+            log_cursor=log_cursor_of(match),
         )
     except Match404Exception as e:
         match.delete()
@@ -78,6 +95,7 @@ def update_match(match: Match, notify=True, priority=2):
         ],
     )
     comparer.run()
+    match.data_hash = data_hash
     comparer.update()
 
     if not notify:
@@ -87,10 +105,62 @@ def update_match(match: Match, notify=True, priority=2):
     comparer.notify()
 
 
+def group_by_match_id(matches) -> dict[int, list[Match]]:
+    matches_by_id = defaultdict(list)
+    for match in matches:
+        matches_by_id[match.match_id].append(match)
+    return matches_by_id
+
+
+def prefetch_matches(matches, provider: Provider) -> Iterator[tuple[Match, PrefetchedProvider]]:
+    """
+    Fetches all matches in one batch and yields every match together with a provider holding its data as soon as
+    the data arrived. Matches with the same match_id (one per registered team) are fetched once.
+    """
+    matches_by_id = group_by_match_id(matches)
+    for match_id, data in provider.get_matches(list(matches_by_id)):
+        prefetched = PrefetchedProvider(provider, matches=[(match_id, data)])
+        for match in matches_by_id[match_id]:
+            yield match, prefetched
+
+
 def update_uncompleted_matches(matches, notify: bool, use_concurrency=not settings.DEBUG):
+    """Updates the matches, each match is updated as soon as its data arrived."""
+    prefetched_matches = prefetch_matches(matches, provider=get_provider(priority=2))
     if use_concurrency:
         with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            executor.map(update_match, matches, repeat(notify))
+            for match, provider in prefetched_matches:
+                executor.submit(update_match, match, notify, provider=provider)
     else:
-        for i in matches:
-            update_match(match=i, notify=notify)
+        for match, provider in prefetched_matches:
+            update_match(match=match, notify=notify, provider=provider)
+
+
+async def aupdate_match(match: Match, notify=True, priority=2, provider: AsyncProvider = None):
+    """
+    Asynchronous variant of ``update_match``. The match is fetched on the event loop, only processing the data and
+    accessing the database runs in a thread.
+    """
+    if provider is None:
+        async with get_async_provider(priority=priority) as provider:
+            return await aupdate_match(match, notify=notify, priority=priority, provider=provider)
+    try:
+        data = await provider.get_match(match.match_id)
+    except Exception as e:
+        data = e
+    prefetched = PrefetchedProvider(get_provider(priority=priority), matches=[(match.match_id, data)])
+    await sync_to_async(update_match)(match, notify=notify, priority=priority, provider=prefetched)
+
+
+async def aupdate_uncompleted_matches(matches, notify: bool, concurrency=50):
+    """
+    Asynchronous variant of ``update_uncompleted_matches``. Up to ``concurrency`` matches are fetched at once on the
+    event loop, each match is updated as soon as its data arrived.
+    """
+    matches_by_id = await sync_to_async(group_by_match_id)(matches)
+    fallback = get_provider(priority=2)
+    async with get_async_provider(priority=2, concurrency=concurrency) as provider:
+        async for match_id, data in provider.get_matches(list(matches_by_id)):
+            prefetched = PrefetchedProvider(fallback, matches=[(match_id, data)])
+            for match in matches_by_id[match_id]:
+                await sync_to_async(update_match)(match, notify=notify, provider=prefetched)
@@ -3,8 +3,8 @@ import logging
 import sys
 import threading
 import traceback
-from itertools import repeat
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.utils import timezone
 from django_q.models import Schedule
@@ -17,7 +17,9 @@ from bots.messages.team_deleted import TeamDeletedMessage
 from bots.telegram_interface.tg_singleton import send_message_to_devs
 from core.comparers.team_comparer import TeamComparer
 from core.processors.team_processor import TeamDataProcessor
-from core.providers.get import get_provider
+from core.providers.base import AsyncProvider, Provider
+from core.providers.get import get_async_provider, get_provider
+from core.providers.prefetched import PrefetchedProvider
 from utils.exceptions import TeamWebsite404Exception
 from utils.messages_logger import log_exception
 
@@ -36,9 +38,9 @@ def delete_team(team: Team):
 
 
 @log_exception
-def update_team(team: Team, notify: bool):
+def update_team(team: Team, notify: bool, provider: Provider = None):
     try:
-        processor = TeamDataProcessor(team.id, provider=get_provider(priority=2))
+        processor = TeamDataProcessor(team.id, provider=provider or get_provider(priority=2))
     except TeamWebsite404Exception:
         if not team.has_subscriptions():
             team.delete()
@@ -99,9 +101,45 @@ def update_team(team: Team, notify: bool):
 
 
 def update_teams(teams, notify: bool, use_concurrency=not settings.DEBUG):
+    """Fetches all teams in one batch and updates each team as soon as its data arrived."""
+    teams_by_id = {team.id: team for team in teams}
+    batch_provider = get_provider(priority=2)
+    results = batch_provider.get_teams(list(teams_by_id))
     if use_concurrency:
         with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            executor.map(update_team, teams, repeat(notify))
+            for team_id, data in results:
+                provider = PrefetchedProvider(batch_provider, teams=[(team_id, data)])
+                executor.submit(update_team, teams_by_id[team_id], notify, provider=provider)
     else:
-        for i in teams:
-            update_team(team=i, notify=notify)
+        for team_id, data in results:
+            provider = PrefetchedProvider(batch_provider, teams=[(team_id, data)])
+            update_team(team=teams_by_id[team_id], notify=notify, provider=provider)
+
+
+async def aupdate_team(team: Team, notify: bool, provider: AsyncProvider = None):
+    """
+    Asynchronous variant of ``update_team``. The team is fetched on the event loop, only processing the data and
+    accessing the database runs in a thread.
+    """
+    if provider is None:
+        async with get_async_provider(priority=2) as provider:
+            return await aupdate_team(team, notify=notify, provider=provider)
+    try:
+        data = await provider.get_team(team.id)
+    except Exception as e:
+        data = e
+    prefetched = PrefetchedProvider(get_provider(priority=2), teams=[(team.id, data)])
+    return await sync_to_async(update_team)(team, notify=notify, provider=prefetched)
+
+
+async def aupdate_teams(teams, notify: bool, concurrency=50):
+    """
+    Asynchronous variant of ``update_teams``. Up to ``concurrency`` teams are fetched at once on the event loop,
+    each team is updated as soon as its data arrived.
+    """
+    teams_by_id = await sync_to_async(lambda: {team.id: team for team in teams})()
+    fallback = get_provider(priority=2)
+    async with get_async_provider(priority=2, concurrency=concurrency) as provider:
+        async for team_id, data in provider.get_teams(list(teams_by_id)):
+            prefetched = PrefetchedProvider(fallback, teams=[(team_id, data)])
+            await sync_to_async(update_team)(teams_by_id[team_id], notify=notify, provider=prefetched)
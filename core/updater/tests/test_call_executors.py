@@ -0,0 +1,25 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from core.updater.call_executors import prefetch_teams_and_matches
+
+
+class PrefetchOrderTest(SimpleTestCase):
+    @patch("core.updater.call_executors.get_provider")
+    def test_matches_beginning_soon_are_pushed_first(self, get_provider):
+        now = timezone.now()
+        matches = [
+            SimpleNamespace(match_id=1, begin=now + timedelta(weeks=4), updated_at=now - timedelta(hours=3)),
+            SimpleNamespace(match_id=2, begin=now + timedelta(days=1), updated_at=now - timedelta(hours=1)),
+            SimpleNamespace(match_id=3, begin=None, updated_at=now - timedelta(hours=4)),
+            SimpleNamespace(match_id=4, begin=now + timedelta(weeks=2), updated_at=now - timedelta(hours=2)),
+        ]
+        teams = [SimpleNamespace(id=1, updated_at=now), SimpleNamespace(id=2, updated_at=now - timedelta(hours=1))]
+
+        prefetch_teams_and_matches(teams, matches)
+
+        get_provider.return_value.prefetch.assert_called_once_with(team_ids=[2, 1], match_ids=[4, 2, 3, 1])
@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+
+from app_prime_league.factories import MatchFactory, SplitFactory
+from app_prime_league.models import Match
+from core.updater.matches_check_executor import update_match
+
+
+class UnchangedMatchTest(TestCase):
+    def setUp(self):
+        self.match = MatchFactory(data_hash="a")
+        Match.objects.filter(pk=self.match.pk).update(updated_at="2024-01-01T00:00Z")
+        self.match.refresh_from_db()
+        self.provider = MagicMock()
+
+    @patch("core.updater.matches_check_executor.TemporaryMatchData")
+    def test_unchanged_match_is_skipped(self, tmd):
+        self.provider.get_match_hash.return_value = "a"
+        update_match(self.match, provider=self.provider)
+        tmd.create_from_website.assert_not_called()
+        self.match.refresh_from_db()
+        self.assertGreater(self.match.updated_at.year, 2024)
+
+    @patch("core.updater.matches_check_executor.TemporaryMatchData")
+    def test_changed_match_is_processed(self, tmd):
+        self.provider.get_match_hash.return_value = "b"
+        tmd.create_from_website.side_effect = Exception("processing")
+        update_match(self.match, provider=self.provider)
+        tmd.create_from_website.assert_called_once()
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.data_hash, "a")
+
+    @patch("core.updater.matches_check_executor.TemporaryMatchData")
+    def test_split_of_unchanged_match_is_refreshed(self, tmd):
+        split = SplitFactory()
+        Match.objects.filter(pk=self.match.pk).update(begin="2024-02-04T18:00Z")
+        self.match.refresh_from_db()
+        self.provider.get_match_hash.return_value = "a"
+        update_match(self.match, provider=self.provider)
+        tmd.create_from_website.assert_not_called()
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.split, split)
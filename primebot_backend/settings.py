@@ -165,6 +165,12 @@ MEDIA_ROOT = env.str("MEDIA_ROOT", None)
 
 GAME_SPORTS_BASE_URL = env.str("GAME_SPORTS_BASE_URL", None)
 
+# Shared HTTP sessions (see core/http.py)
+HTTP_POOL_MAXSIZE = env.int("HTTP_POOL_MAXSIZE", 10)  # connections kept alive per host
+HTTP_MULTIPLEXED = env.bool("HTTP_MULTIPLEXED", False)  # send concurrent requests over one HTTP/2 connection
+HTTP_RETRIES = env.int("HTTP_RETRIES", 3)  # retries on connection errors, not on error status codes
+HTTP_RETRY_BACKOFF = env.float("HTTP_RETRY_BACKOFF", 0.5)  # seconds, doubled after every retry
+
 PRM_BASE_URI = "https://www.primeleague.gg/de/leagues/"
 MATCH_URI = PRM_BASE_URI + "matches/"
 TEAM_URI = PRM_BASE_URI + "teams/"
@@ -231,6 +237,43 @@ if MONGODB_URI is None:
         f"@{env.str('MONGODB_HOST', '')}:{env.str('MONGODB_PORT', 27017)}"
     )
 
+# Storage of the request queue: "mongo" or "memory" (worker and providers in one process, e.g. load tests)
+REQUEST_QUEUE_BACKEND = env.str("REQUEST_QUEUE_BACKEND", "mongo")
+# How providers wait for queued jobs: "tailable" (capped collection), "local" (same process only) or "polling"
+REQUEST_QUEUE_WAIT_STRATEGY = env.str("REQUEST_QUEUE_WAIT_STRATEGY", "tailable")
+REQUEST_QUEUE_POLL_INTERVAL = env.float("REQUEST_QUEUE_POLL_INTERVAL", 1.0)  # seconds, "polling" strategy
+REQUEST_QUEUE_FALLBACK_POLL_INTERVAL = env.float("REQUEST_QUEUE_FALLBACK_POLL_INTERVAL", 10.0)  # seconds
+# Rate limit of the Prime League API: sustained requests per second and maximum burst of requests
+REQUEST_QUEUE_RATE = env.float("REQUEST_QUEUE_RATE", 1.0)
+REQUEST_QUEUE_BURST = env.int("REQUEST_QUEUE_BURST", 1)
+REQUEST_QUEUE_CONCURRENCY = env.int("REQUEST_QUEUE_CONCURRENCY", 1)  # requests in flight at the same time
+REQUEST_QUEUE_LEASE_SECONDS = env.int("REQUEST_QUEUE_LEASE_SECONDS", 60)  # claimed jobs are reclaimed after expiry
+REQUEST_QUEUE_MAX_ATTEMPTS = env.int("REQUEST_QUEUE_MAX_ATTEMPTS", 3)
+REQUEST_QUEUE_BACKOFF_BASE = env.float("REQUEST_QUEUE_BACKOFF_BASE", 10.0)  # seconds before the first retry
+REQUEST_QUEUE_BACKOFF_MAX = env.float("REQUEST_QUEUE_BACKOFF_MAX", 300.0)
+# Consecutive server or connection errors after which an endpoint is paused for the cooldown (seconds)
+REQUEST_QUEUE_BREAKER_THRESHOLD = env.int("REQUEST_QUEUE_BREAKER_THRESHOLD", 5)
+REQUEST_QUEUE_BREAKER_COOLDOWN = env.float("REQUEST_QUEUE_BREAKER_COOLDOWN", 60.0)
+# Share of the worker per priority class while several classes have jobs (0: registrations, 2: updates)
+REQUEST_QUEUE_PRIORITY_WEIGHTS = {0: 8, 1: 4, 2: 1}
+REQUEST_QUEUE_AGING_SECONDS = env.int("REQUEST_QUEUE_AGING_SECONDS", 120)  # waiting improves priority by one, 0: off
+# Store crawled payloads as encoded JSON, decoded only when a payload is read. This only pays off with orjson
+# installed (see requirements.txt): decoding with the json module is slower than decoding the nested BSON payload,
+# so the worker ignores the setting without orjson.
+REQUEST_QUEUE_RAW_PAYLOADS = env.bool("REQUEST_QUEUE_RAW_PAYLOADS", False)
+REQUEST_QUEUE_METRICS_PORT = env.int("REQUEST_QUEUE_METRICS_PORT", 0)  # Prometheus metrics of the worker, 0: off
+# Seconds a crawled response is reused by non-forced providers. Keep them below the update interval (15 minutes).
+REQUEST_QUEUE_RESPONSE_TTL = {
+    "team": env.int("REQUEST_QUEUE_TEAM_TTL", 10 * 60),
+    "match": env.int("REQUEST_QUEUE_MATCH_TTL", 5 * 60),
+}
+REQUEST_QUEUE_MATCH_SOON_TTL = env.int("REQUEST_QUEUE_MATCH_SOON_TTL", 60)  # matches beginning within the window
+REQUEST_QUEUE_MATCH_SOON_WINDOW = env.int("REQUEST_QUEUE_MATCH_SOON_WINDOW", 24 * 60 * 60)
+# Seconds an expired response is still served while it is refreshed in the background (0 disables it)
+REQUEST_QUEUE_STALE_WHILE_REVALIDATE = env.int("REQUEST_QUEUE_STALE_WHILE_REVALIDATE", 0)
+# Seconds after their last crawl that responses of teams and matches which are no longer updated are deleted
+REQUEST_QUEUE_RESPONSE_RETENTION = env.int("REQUEST_QUEUE_RESPONSE_RETENTION", 7 * 24 * 60 * 60)
+
 __MAXIMUM_TIMEOUT = 60 * 13  # 14,5 minutes for the updater
 Q_CLUSTER = {
     'timeout': __MAXIMUM_TIMEOUT,
@@ -1,2 +1,2 @@
-from .cluster import EndpointType, RequestQueue, run
+from .cluster import EndpointType, RequestQueue, get_queue, run
 from .pusher import push
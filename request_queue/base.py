@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, Iterator
+
+from bson import ObjectId
+
+from utils import fast_json
+
+from .notifier import CompletionNotifier
+
+
+class EndpointType(Enum):
+    MATCH = "match"
+    TEAM = "team"
+
+
+def response_payload(response: dict) -> dict | None:
+    """The payload of a stored response, responses saved with ``raw=True`` are decoded now."""
+    if response.get("payload_raw") is not None:
+        return fast_json.loads(response["payload_raw"])
+    return response.get("payload")
+
+
+class QueueBackend(ABC):
+    """
+    Storage of the request queue: the jobs, the latest response per endpoint and detail ID and the attempt
+    statistics. Jobs are documents like ``{"_id": ObjectId, "payload": {"endpoint": ..., "detail_id": ...},
+    "priority": ..., "effective_priority": ..., "created_at": ..., "attempts": ..., "leased_by": ...}``, responses
+    like the documents of the ``responses`` collection. Use ``get_queue`` to get the backend of the settings.
+    """
+
+    notifier: CompletionNotifier
+
+    @abstractmethod
+    def push(self, endpoint: EndpointType, detail_id, priority: int = 0) -> str:
+        """Add a job or raise the priority of the queued job. :return: the job ID"""
+        pass
+
+    @abstractmethod
+    def push_many(self, endpoint: EndpointType, detail_ids: list[int], priority: int = 0) -> dict[int, str]:
+        """Like ``push`` for several jobs. :return: Mapping of detail_id to job ID"""
+        pass
+
+    @abstractmethod
+    def next(self) -> dict | None:
+        """Return the job with the highest priority that can be claimed, without claiming it."""
+        pass
+
+    @abstractmethod
+    def claim(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        blocked_endpoints: Iterable[str] = (),
+        priority_class: int = None,
+    ) -> dict | None:
+        """Lease the job with the highest priority to a worker, see ``RequestQueue.claim``."""
+        pass
+
+    @abstractmethod
+    def extend_leases(self, job_ids: list[ObjectId], worker_id: str, lease_seconds: int):
+        pass
+
+    @abstractmethod
+    def release(
+        self,
+        job_id: ObjectId,
+        worker_id: str,
+        attempts: int = None,
+        attempt: dict = None,
+        retry_in_seconds: float = 0,
+    ):
+        pass
+
+    @abstractmethod
+    def bury(self, job: dict, attempt: dict):
+        """Keep a job that failed for the last time as dead letter, call ``delete_entry`` afterward."""
+        pass
+
+    @abstractmethod
+    def delete_entry(self, entry_id: ObjectId):
+        pass
+
+    @abstractmethod
+    def age_priorities(self, aging_seconds: float):
+        pass
+
+    @abstractmethod
+    def class_stats(self) -> dict[int, dict]:
+        pass
+
+    @abstractmethod
+    def record_attempt(self, endpoint: str, status_code: int):
+        pass
+
+    @abstractmethod
+    def failure_rates(self, since: datetime) -> dict[str, dict]:
+        pass
+
+    @abstractmethod
+    def record_cache_lookups(self, endpoint: str, results: dict[str, int]):
+        pass
+
+    @abstractmethod
+    def cache_lookups(self, since: datetime) -> dict[str, dict[str, int]]:
+        pass
+
+    @abstractmethod
+    def get_response(self, endpoint: EndpointType, detail_id: int) -> dict | None:
+        pass
+
+    @abstractmethod
+    def get_responses(self, endpoint: EndpointType, detail_ids: list[int]) -> dict[int, dict]:
+        pass
+
+    @abstractmethod
+    def save_response(
+        self,
+        endpoint: str,
+        detail_id: int,
+        data,
+        status_code: int,
+        validators: dict = None,
+        raw: bool = False,
+        fields: dict = None,
+    ):
+        """
+        Store the response of a request, ``validators`` are its ``etag`` and ``last_modified``.
+        :param raw: store the payload as encoded JSON in ``payload_raw``, read it with ``response_payload``
+        :param fields: additional fields of the response, e.g. fields that are read without decoding the payload
+        """
+        pass
+
+    @abstractmethod
+    def touch_response(self, endpoint: str, detail_id: int, validators: dict):
+        """The API answered 304 Not Modified: keep the payload, it is only marked as crawled again."""
+        pass
+
+    @abstractmethod
+    def retain_responses(self, endpoint: EndpointType, detail_ids: Iterable[int]) -> int:
+        pass
+
+    @abstractmethod
+    def queued_jobs(self, job_ids: Iterable[str]) -> set[str]:
+        """Return the subset of job IDs that are still queued."""
+        pass
+
+    def ensure_indexes(self, migrate: bool = False):
+        pass
+
+    def close(self):
+        pass
+
+    def job_is_queued(self, job_id: str) -> bool:
+        return bool(self.queued_jobs([job_id]))
+
+    def wait_for_job(self, job_id: str):
+        """
+        Block until the job is not queued anymore. The waiter is woken up by the worker's completion notification,
+        the queue is only polled every ``notifier.wait_interval`` seconds as a fallback.
+        """
+        for _ in self.wait_for_jobs([job_id]):
+            pass
+
+    def wait_for_jobs(self, job_ids: Iterable[str]) -> Iterator[str]:
+        """
+        Wait for several jobs at once and yield every job ID as soon as the job is not queued anymore.
+        """
+        job_ids = set(job_ids)
+        pending = set(job_ids)
+        event = self.notifier.subscribe(job_ids)
+        try:
+            while pending:
+                # Clear before checking the queue, so completions during the check are not missed
+                event.clear()
+                still_queued = self.queued_jobs(pending)
+                yield from pending - still_queued
+                pending = still_queued
+                if pending:
+                    event.wait(timeout=self.notifier.wait_interval)
+        finally:
+            self.notifier.unsubscribe(job_ids, event)
+
+    def notify_completion(self, job_id):
+        """Wake up everyone waiting for the job. Call after the response was saved and the job deleted."""
+        self.notifier.notify(str(job_id))
@@ -1,13 +1,21 @@
 import logging
+import os
+import socket
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from enum import Enum
-from typing import Tuple
+from typing import Iterable, Tuple
 
 from bson import ObjectId
-from pymongo import ASCENDING
+from django.conf import settings
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
+from core.providers.base import payload_hash
 from core.providers.prime_league import PrimeLeagueProvider
+from utils import fast_json
 from utils.exceptions import (
     Match404Exception,
     PrimeLeagueConnectionException,
@@ -15,19 +23,23 @@ from utils.exceptions import (
     TeamWebsite404Exception,
 )
 
+from .base import EndpointType, QueueBackend
+from .indexes import CLAIM_ORDER, migrate_indexes
+from .memory import MemoryRequestQueue
+from .metrics import REGISTRY
+from .metrics import serve as serve_metrics
 from .mongo import MongoConnector
+from .notifier import CompletionNotifier, WaitStrategy
+from .rate_limit import TokenBucket
+from .retry import CircuitBreaker, backoff_seconds
+from .scheduling import FairShare
 
-__all__ = ["EndpointType", "run", "RequestQueue"]
+__all__ = ["EndpointType", "get_queue", "run", "RequestQueue"]
 
 logger = logging.getLogger(__name__)
 
 
-class EndpointType(Enum):
-    MATCH = "match"
-    TEAM = "team"
-
-
-class RequestQueue:
+class RequestQueue(QueueBackend):
     """
     This class provides an interface for the request queue in MongoDB.
     """
@@ -35,61 +47,376 @@ class RequestQueue:
     _instance = None
     REQUEST_COL_NAME = "request_queue"
     RESPONSE_COL_NAME = "responses"
+    DEAD_LETTER_COL_NAME = "dead_letters"
+    ATTEMPT_STATS_COL_NAME = "attempt_stats"
+    CACHE_STATS_COL_NAME = "cache_stats"
+    SORT = CLAIM_ORDER
 
     def __init__(self, connector: MongoConnector = None):
+        if getattr(self, "_initialized", False):
+            # Singleton: waiters subscribed to the notifier must not lose it on the next ``RequestQueue()`` call
+            return
         self.connector = connector or MongoConnector()
         self.queue_collection = self.get_collection(RequestQueue.REQUEST_COL_NAME)
         self.response_collection = self.get_collection(RequestQueue.RESPONSE_COL_NAME)
+        self.dead_letter_collection = self.get_collection(RequestQueue.DEAD_LETTER_COL_NAME)
+        self.attempt_stats_collection = self.get_collection(RequestQueue.ATTEMPT_STATS_COL_NAME)
+        self.cache_stats_collection = self.get_collection(RequestQueue.CACHE_STATS_COL_NAME)
         self.ensure_indexes()
+        self.notifier = CompletionNotifier(
+            self.connector.db,
+            strategy=WaitStrategy(settings.REQUEST_QUEUE_WAIT_STRATEGY),
+            poll_interval=settings.REQUEST_QUEUE_POLL_INTERVAL,
+            fallback_interval=settings.REQUEST_QUEUE_FALLBACK_POLL_INTERVAL,
+        )
+        self._initialized = True
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    @classmethod
+    def on_database(cls, db) -> "RequestQueue":
+        """
+        Queue on another database, e.g. for benchmarks. It is not the singleton and has no notifier, so it cannot
+        wait for jobs.
+        """
+        queue = object.__new__(cls)
+        queue.queue_collection = db[cls.REQUEST_COL_NAME]
+        queue.response_collection = db[cls.RESPONSE_COL_NAME]
+        queue.dead_letter_collection = db[cls.DEAD_LETTER_COL_NAME]
+        queue.attempt_stats_collection = db[cls.ATTEMPT_STATS_COL_NAME]
+        queue.cache_stats_collection = db[cls.CACHE_STATS_COL_NAME]
+        return queue
+
     def get_collection(self, collection_name):
         return self.connector.db[collection_name]
 
-    def ensure_indexes(self):
-        """Ensure indexes for the priority queue."""
-        self.queue_collection.create_index([("priority", ASCENDING), ("timestamp", ASCENDING)])
-        self.response_collection.create_index([("endpoint", ASCENDING), ("detail_id", ASCENDING)])
-
-    def push(self, endpoint: EndpointType, detail_id, priority: int = 0):
-        """Add an item to the queue with a given priority and timestamp."""
-        timestamp = datetime.utcnow()
-        payload = {"endpoint": endpoint.value, "detail_id": detail_id}
-        document = self.queue_collection.insert_one(
-            {
-                "payload": payload,
-                "priority": priority,
-                "created_at": timestamp,
+    def ensure_indexes(self, migrate: bool = False):
+        """
+        Create missing indexes for the priority queue, see ``request_queue.indexes``.
+        :param migrate: also drop stale indexes and rebuild changed ones, only the worker does this on its start
+        """
+        for action in migrate_indexes(self.queue_collection.database, create_only=not migrate):
+            logger.info(f"Index migration: {action}")
+
+    def push(self, endpoint: EndpointType, detail_id, priority: int = 0) -> str:
+        """
+        Add a job to the queue with a given priority and timestamp. Jobs are unique per endpoint and detail_id: If
+        the job is already queued, its priority is raised to the minimum of both priorities and its ID is returned,
+        so every caller waits for the same job.
+        """
+        job_filter = {"payload.endpoint": endpoint.value, "payload.detail_id": detail_id}
+        update = {
+            "$min": {"priority": priority, "effective_priority": priority},
+            "$setOnInsert": {
+                "created_at": datetime.utcnow(),
                 "attempts": 0,
                 "last_processed": None,
-            }
-        )
-        print(f"Job with payload {payload} pushed to queue.")
-        return str(document.inserted_id)
-
-    def pop(self, retry_interval_seconds: int = 5):
-        """Remove and return the item with the highest priority."""
-        retry_time = datetime.utcnow() - timedelta(seconds=retry_interval_seconds)
-        result = self.queue_collection.find_one_and_delete(
-            filter=self._filter(retry_time), sort=[("priority", ASCENDING), ("created_at", ASCENDING)]
+                "leased_by": None,
+                "lease_expires": None,
+                "next_attempt_at": None,
+            },
+        }
+        try:
+            document = self.queue_collection.find_one_and_update(
+                job_filter, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another process inserted the same job in the meantime, so this time the update matches
+            document = self.queue_collection.find_one_and_update(
+                job_filter, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        print(f"Job with payload {document['payload']} pushed to queue.")
+        return str(document["_id"])
+
+    def push_many(self, endpoint: EndpointType, detail_ids: list[int], priority: int = 0) -> dict[int, str]:
+        """
+        Push several jobs of one endpoint with a single bulk write. Like ``push``, already queued jobs are reused and
+        their priority is raised. New jobs of the same priority are claimed in the order of ``detail_ids``.
+        :return: Mapping of detail_id to job ID
+        """
+        detail_ids = list(dict.fromkeys(detail_ids))
+        if not detail_ids:
+            return {}
+        now = datetime.utcnow()
+        requests = [
+            UpdateOne(
+                {"payload.endpoint": endpoint.value, "payload.detail_id": detail_id},
+                {
+                    "$min": {"priority": priority, "effective_priority": priority},
+                    "$setOnInsert": {
+                        "created_at": now + timedelta(milliseconds=i),  # BSON dates are precise to milliseconds
+                        "attempts": 0,
+                        "last_processed": None,
+                        "leased_by": None,
+                        "lease_expires": None,
+                        "next_attempt_at": None,
+                    },
+                },
+                upsert=True,
+            )
+            for i, detail_id in enumerate(detail_ids)
+        ]
+        try:
+            self.queue_collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys of concurrent pushes: those jobs exist now, so only the priority update is missing
+            failed = [requests[x["index"]] for x in e.details["writeErrors"] if x["code"] == 11000]
+            if len(failed) != len(e.details["writeErrors"]):
+                raise
+            self.queue_collection.bulk_write(failed, ordered=False)
+        cursor = self.queue_collection.find(
+            {"payload.endpoint": endpoint.value, "payload.detail_id": {"$in": detail_ids}},
+            projection={"payload": 1},
         )
+        job_ids = {x["payload"]["detail_id"]: str(x["_id"]) for x in cursor}
+        print(f"{len(job_ids)} jobs of endpoint {endpoint.value} pushed to queue.")
+        return job_ids
+
+    def pop(self):
+        """
+        Remove and return the item with the highest priority.
+        The job is lost if it cannot be processed afterward, workers use ``claim`` instead.
+        """
+        result = self.queue_collection.find_one_and_delete(filter=self._filter(datetime.utcnow()), sort=self.SORT)
         return result
 
-    def _filter(self, retry_time: datetime):
-        return {"$or": [{"last_processed": None}, {"last_processed": {"$lt": retry_time}}]}
-
-    def next(self, retry_interval_seconds=5) -> dict | None:
-        """Return the item with the highest priority without removing it, considering retry interval."""
-        retry_time = datetime.utcnow() - timedelta(seconds=retry_interval_seconds)
+    def _filter(self, now: datetime):
+        """Jobs that are due. Jobs pushed before ``next_attempt_at`` existed have none and are due."""
+        return {"$or": [{"next_attempt_at": None}, {"next_attempt_at": {"$lte": now}}]}
+
+    def _claimable_filter(self, blocked_endpoints: Iterable[str] = (), priority_class: int = None) -> dict:
+        """
+        Jobs that are due, not of a blocked endpoint and not leased or whose lease has expired.
+        If ``priority_class`` is set, only jobs of this effective priority.
+        """
+        now = datetime.utcnow()
+        conditions = [
+            self._filter(now),
+            {"$or": [{"lease_expires": None}, {"lease_expires": {"$lt": now}}]},
+        ]
+        if blocked_endpoints:
+            conditions.append({"payload.endpoint": {"$nin": list(blocked_endpoints)}})
+        if priority_class is not None:
+            conditions.append({"effective_priority": priority_class})
+        return {"$and": conditions}
+
+    def next(self) -> dict | None:
+        """Return the item with the highest priority without removing it, considering backoff and leases."""
         result = self.queue_collection.find_one(
-            filter=self._filter(retry_time), sort=[("priority", ASCENDING), ("created_at", ASCENDING)]
+            filter=self._claimable_filter(),
+            sort=self.SORT,
         )
         return result
 
+    def claim(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        blocked_endpoints: Iterable[str] = (),
+        priority_class: int = None,
+    ) -> dict | None:
+        """
+        Atomically lease the item with the highest priority to a worker. The job stays in the queue until it is
+        deleted, so if the worker dies, the job is claimed again by another worker as soon as the lease expires.
+        Keep the lease alive with ``extend_leases`` while the job is processed.
+        :param blocked_endpoints: endpoints whose jobs must not be claimed, e.g. paused by a circuit breaker
+        :param priority_class: only claim jobs of this effective priority
+        :return: the leased job or None if no job is due
+        """
+        return self.queue_collection.find_one_and_update(
+            filter=self._claimable_filter(blocked_endpoints, priority_class),
+            update={
+                "$set": {
+                    "leased_by": worker_id,
+                    "lease_expires": datetime.utcnow() + timedelta(seconds=lease_seconds),
+                }
+            },
+            sort=self.SORT,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def age_priorities(self, aging_seconds: float):
+        """
+        Priority aging: the effective priority of a job improves by one for every ``aging_seconds`` it waits, so a
+        burst of high priority jobs cannot starve jobs of lower priority forever.
+        """
+        # Jobs pushed before aging existed
+        self.queue_collection.update_many(
+            {"effective_priority": {"$exists": False}}, [{"$set": {"effective_priority": "$priority"}}]
+        )
+        if not aging_seconds:
+            return
+        now = datetime.utcnow()
+        for priority in self.queue_collection.distinct("priority", {"priority": {"$gt": 0}}):
+            for steps in range(1, priority + 1):
+                self.queue_collection.update_many(
+                    {
+                        "priority": priority,
+                        "created_at": {"$lt": now - timedelta(seconds=steps * aging_seconds)},
+                        "effective_priority": {"$gt": priority - steps},
+                    },
+                    {"$set": {"effective_priority": priority - steps}},
+                )
+
+    def class_stats(self) -> dict[int, dict]:
+        """
+        Number of due jobs, the wait time of the oldest of them (seconds) and the number of due jobs per endpoint
+        per effective priority, e.g. ``{2: {"depth": 3, "oldest_wait": 60.0, "endpoints": {"match": 3}}}``.
+        """
+        now = datetime.utcnow()
+        pipeline = [
+            {"$match": self._filter(now)},
+            {
+                "$group": {
+                    "_id": {"priority": "$effective_priority", "endpoint": "$payload.endpoint"},
+                    "depth": {"$sum": 1},
+                    "oldest": {"$min": "$created_at"},
+                }
+            },
+        ]
+        stats = {}
+        for x in self.queue_collection.aggregate(pipeline):
+            oldest_wait = (now - x["oldest"]).total_seconds()
+            class_stats = stats.setdefault(x["_id"]["priority"], {"depth": 0, "oldest_wait": 0.0, "endpoints": {}})
+            class_stats["depth"] += x["depth"]
+            class_stats["oldest_wait"] = max(class_stats["oldest_wait"], oldest_wait)
+            class_stats["endpoints"][x["_id"]["endpoint"]] = x["depth"]
+        return stats
+
+    def extend_leases(self, job_ids: list[ObjectId], worker_id: str, lease_seconds: int):
+        """Heartbeat: extend the leases the worker still holds on the given jobs."""
+        self.queue_collection.update_many(
+            {"_id": {"$in": job_ids}, "leased_by": worker_id},
+            {"$set": {"lease_expires": datetime.utcnow() + timedelta(seconds=lease_seconds)}},
+        )
+
+    def release(
+        self,
+        job_id: ObjectId,
+        worker_id: str,
+        attempts: int = None,
+        attempt: dict = None,
+        retry_in_seconds: float = 0,
+    ):
+        """
+        Give a leased job back to the queue. If ``attempts`` is set, the job is marked as failed attempt, it is due
+        again in ``retry_in_seconds`` and ``attempt`` (see ``bury``) is appended to its ``attempt_log``.
+        """
+        update = {"$set": {"leased_by": None, "lease_expires": None}}
+        if attempts is not None:
+            now = datetime.utcnow()
+            update["$set"].update(
+                {
+                    "attempts": attempts,
+                    "last_processed": now,
+                    "next_attempt_at": now + timedelta(seconds=retry_in_seconds),
+                }
+            )
+        if attempt is not None:
+            update["$push"] = {"attempt_log": attempt}
+        self.queue_collection.update_one({"_id": job_id, "leased_by": worker_id}, update)
+
+    def bury(self, job: dict, attempt: dict):
+        """
+        Move a job that failed for the last time into the dead letters, call ``delete_entry`` afterward.
+        :param job: the job as claimed, its ``attempt_log`` holds the previous attempts
+        :param attempt: the last attempt with ``status_code``, ``latency`` (seconds), ``error`` (exception class
+            name) and ``at``
+        """
+        attempt_log = job.get("attempt_log", []) + [attempt]
+        self.dead_letter_collection.insert_one(
+            {
+                "job": {**job, "attempt_log": attempt_log},
+                "endpoint": job["payload"]["endpoint"],
+                "detail_id": job["payload"]["detail_id"],
+                "status_code": attempt["status_code"],
+                "error": attempt["error"],
+                "attempts": len(attempt_log),
+                "failed_at": datetime.utcnow(),
+            }
+        )
+
+    def dead_letter_filter(self, endpoint: EndpointType = None, failed_before: datetime = None) -> dict:
+        query = {}
+        if endpoint is not None:
+            query["endpoint"] = endpoint.value
+        if failed_before is not None:
+            query["failed_at"] = {"$lt": failed_before}
+        return query
+
+    def replay_dead_letters(self, query: dict) -> int:
+        """Push the jobs of the matching dead letters again (with their original priority) and delete the letters."""
+        letters = list(self.dead_letter_collection.find(query, projection={"endpoint": 1, "detail_id": 1, "job": 1}))
+        for endpoint in EndpointType:
+            detail_ids_by_priority = {}
+            for letter in letters:
+                if letter["endpoint"] == endpoint.value:
+                    priority = letter["job"].get("priority", 0)
+                    detail_ids_by_priority.setdefault(priority, []).append(letter["detail_id"])
+            for priority, detail_ids in detail_ids_by_priority.items():
+                self.push_many(endpoint, detail_ids, priority=priority)
+        self.dead_letter_collection.delete_many({"_id": {"$in": [x["_id"] for x in letters]}})
+        return len(letters)
+
+    def purge_dead_letters(self, query: dict) -> int:
+        return self.dead_letter_collection.delete_many(query).deleted_count
+
+    def record_attempt(self, endpoint: str, status_code: int):
+        """Count an API request of the worker in the hourly statistics of its endpoint."""
+        now = datetime.utcnow()
+        failed = status_code not in (200, 304)
+        self.attempt_stats_collection.update_one(
+            {"endpoint": endpoint, "hour": now.replace(minute=0, second=0, microsecond=0)},
+            {"$inc": {"attempts": 1, "failures": int(failed), f"status_codes.{status_code}": 1}},
+            upsert=True,
+        )
+
+    def failure_rates(self, since: datetime) -> dict[str, dict]:
+        """
+        Aggregate the attempt statistics since the given time (rounded down to the hour) per endpoint.
+        :return: e.g. ``{"match": {"attempts": 120, "failures": 30, "failure_rate": 0.25, "status_codes": {...}}}``
+        """
+        since = since.replace(minute=0, second=0, microsecond=0)
+        rates = {}
+        for stats in self.attempt_stats_collection.find({"hour": {"$gte": since}}):
+            rate = rates.setdefault(stats["endpoint"], {"attempts": 0, "failures": 0, "status_codes": {}})
+            rate["attempts"] += stats["attempts"]
+            rate["failures"] += stats["failures"]
+            for status_code, count in stats.get("status_codes", {}).items():
+                rate["status_codes"][status_code] = rate["status_codes"].get(status_code, 0) + count
+        for rate in rates.values():
+            rate["failure_rate"] = rate["failures"] / rate["attempts"] if rate["attempts"] else 0
+        return rates
+
+    def record_cache_lookups(self, endpoint: str, results: dict[str, int]):
+        """
+        Count lookups of the ``RequestQueueProvider`` in the hourly statistics of their endpoint. The providers run in
+        the updater and bot processes, so the counts are shared here and exported by the worker.
+        :param results: number of lookups per result, e.g. ``{"hit": 3, "miss": 1}``
+        """
+        now = datetime.utcnow()
+        self.cache_stats_collection.update_one(
+            {"endpoint": endpoint, "hour": now.replace(minute=0, second=0, microsecond=0)},
+            {"$inc": {f"results.{result}": count for result, count in results.items()}},
+            upsert=True,
+        )
+
+    def cache_lookups(self, since: datetime) -> dict[str, dict[str, int]]:
+        """
+        Aggregate the lookup statistics since the given time (rounded down to the hour) per endpoint.
+        :return: e.g. ``{"match": {"hit": 90, "stale": 5, "miss": 25}}``
+        """
+        since = since.replace(minute=0, second=0, microsecond=0)
+        lookups = {}
+        for stats in self.cache_stats_collection.find({"hour": {"$gte": since}}):
+            results = lookups.setdefault(stats["endpoint"], {})
+            for result, count in stats.get("results", {}).items():
+                results[result] = results.get(result, 0) + count
+        return lookups
+
     def delete_entry(self, entry_id: str):
         """Delete an entry from the queue."""
         self.queue_collection.delete_one({"_id": entry_id})
@@ -97,100 +424,402 @@ class RequestQueue:
     def get_response(self, endpoint: EndpointType, detail_id: int) -> dict | None:
         return self.response_collection.find_one({"endpoint": endpoint.value, "detail_id": detail_id})
 
-    def job_is_queued(self, job_id: str) -> bool:
-        return self.queue_collection.find_one({"_id": ObjectId(job_id)}) is not None
+    def get_responses(self, endpoint: EndpointType, detail_ids: list[int]) -> dict[int, dict]:
+        """Return the latest responses of several detail IDs with one query. Missing responses are omitted."""
+        cursor = self.response_collection.find({"endpoint": endpoint.value, "detail_id": {"$in": detail_ids}})
+        return {x["detail_id"]: x for x in cursor}
+
+    def save_response(
+        self,
+        endpoint: str,
+        detail_id: int,
+        data,
+        status_code: int,
+        validators: dict = None,
+        raw: bool = False,
+        fields: dict = None,
+    ):
+        now = datetime.utcnow()
+        validators = validators or {}
+        raw = raw and data is not None
+        self.response_collection.update_one(
+            filter={"endpoint": endpoint, "detail_id": detail_id},
+            update={
+                "$set": {
+                    **(fields or {}),
+                    "payload": None if raw else data,
+                    "payload_raw": fast_json.dumps(data) if raw else None,
+                    "payload_hash": payload_hash(data),
+                    "status_code": status_code,
+                    "last_crawled": now,
+                    "last_changed": now,
+                    "etag": validators.get("etag"),
+                    "last_modified": validators.get("last_modified"),
+                },
+                "$setOnInsert": {
+                    "endpoint": endpoint,
+                    "detail_id": detail_id,
+                },
+            },
+            upsert=True,
+        )
+
+    def touch_response(self, endpoint: str, detail_id: int, validators: dict):
+        self.response_collection.update_one(
+            filter={"endpoint": endpoint, "detail_id": detail_id},
+            update={
+                "$set": {
+                    "last_crawled": datetime.utcnow(),
+                    "etag": validators.get("etag"),
+                    "last_modified": validators.get("last_modified"),
+                }
+            },
+        )
+
+    def retain_responses(self, endpoint: EndpointType, detail_ids: Iterable[int]) -> int:
+        """
+        Keep the responses of ``detail_ids`` and let all other responses of the endpoint expire
+        ``settings.REQUEST_QUEUE_RESPONSE_RETENTION`` seconds after their last crawl (TTL index on ``last_crawled``).
+        A response that is retained again before it expired is kept.
+        :return: number of responses that were marked to expire
+        """
+        detail_ids = list(detail_ids)
+        self.response_collection.update_many(
+            {"endpoint": endpoint.value, "detail_id": {"$in": detail_ids}, "retained": {"$ne": True}},
+            {"$set": {"retained": True}},
+        )
+        result = self.response_collection.update_many(
+            {"endpoint": endpoint.value, "detail_id": {"$nin": detail_ids}, "retained": {"$ne": False}},
+            {"$set": {"retained": False}},
+        )
+        return result.modified_count
+
+    def queued_jobs(self, job_ids: Iterable[str]) -> set[str]:
+        """Return the subset of job IDs that are still queued."""
+        cursor = self.queue_collection.find({"_id": {"$in": [ObjectId(x) for x in job_ids]}}, projection={"_id": 1})
+        return {str(x["_id"]) for x in cursor}
+
+    def close(self):
+        self.connector.close()
+
+
+def get_queue() -> QueueBackend:
+    """Let the settings decide which backend stores the queue."""
+    if settings.REQUEST_QUEUE_BACKEND == "memory":
+        return MemoryRequestQueue()
+    return RequestQueue()
+
 
+IDLE_SLEEP_SECONDS: int = 1
+MAINTENANCE_SECONDS: int = 5
 
-MAXIMUM_SLEEP: int = 1
+QUEUE_DEPTH = REGISTRY.gauge(
+    "request_queue_depth", "Due jobs per effective priority and endpoint", labels=("priority", "endpoint")
+)
+QUEUE_OLDEST_WAIT = REGISTRY.gauge(
+    "request_queue_oldest_wait_seconds", "Wait time of the oldest due job per effective priority", labels=("priority",)
+)
+CLAIMED_WAIT = REGISTRY.gauge(
+    "request_queue_claimed_wait_seconds",
+    "Wait time of the last job the worker claimed per effective priority",
+    labels=("priority",),
+)
 
+CIRCUIT_OPENED = REGISTRY.counter(
+    "request_queue_circuit_opened_total",
+    "Times the dispatch of an endpoint was paused after consecutive server or connection errors",
+    labels=("endpoint",),
+)
+JOB_ATTEMPTS = REGISTRY.counter(
+    "request_queue_attempts_total",
+    "API requests of the worker by endpoint and status code (304 if unchanged, 400/404/500 if failed)",
+    labels=("endpoint", "status_code"),
+)
+JOB_RETRIES = REGISTRY.counter(
+    "request_queue_retries_total", "Failed jobs that were released for another attempt", labels=("endpoint",)
+)
+DEAD_LETTERS = REGISTRY.counter(
+    "request_queue_dead_letters_total", "Jobs that failed for the last time", labels=("endpoint",)
+)
+JOB_WAIT = REGISTRY.histogram(
+    "request_queue_job_wait_seconds",
+    "Time from pushing a job to claiming it per effective priority",
+    labels=("priority",),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "request_queue_upstream_latency_seconds",
+    "Duration of the API requests of the worker by endpoint",
+    labels=("endpoint",),
+)
+RATE_LIMIT_SLEEP = REGISTRY.counter(
+    "request_queue_rate_limit_sleep_seconds_total", "Time the worker waited for the rate limiter"
+)
+JOBS_IN_FLIGHT = REGISTRY.gauge("request_queue_jobs_in_flight", "Jobs the worker is processing")
+PROVIDER_CACHE_LOOKUPS = REGISTRY.gauge(
+    "provider_cache_lookups",
+    "Lookups of the RequestQueueProvider of all processes in the current and the last hour "
+    "(hit, stale, miss or bypass if forced)",
+    labels=("endpoint", "result"),
+)
 
-def __call_api(payload: dict[str, str | int]) -> Tuple[int, dict | None]:
+
+def __call_api(payload: dict[str, str | int], validators: dict[str, str]) -> Tuple[int, dict | None, dict, str | None]:
+    """
+    Request the API conditionally with the validators of the last response.
+    :return: status code, data and validators of the response and the class name of the exception if the request
+        failed. The status code is 304 if the data is unchanged.
+    """
     endpoint = payload["endpoint"]
     detail_id = payload["detail_id"]
     if endpoint == EndpointType.MATCH.value:
-        func = PrimeLeagueProvider().get_match
+        func = PrimeLeagueProvider().get_match_if_modified
     else:
-        func = PrimeLeagueProvider().get_team
+        func = PrimeLeagueProvider().get_team_if_modified
     try:
-        resp: dict = func(detail_id)
-    except PrimeLeagueParseException:
-        return 400, None
-    except TeamWebsite404Exception:
-        return 404, None
-    except Match404Exception:
-        return 404, None
-    except PrimeLeagueConnectionException:
-        return 500, None
-    else:
-        return 200, resp
-
-
-def __save_to_db(endpoint: str, detail_id: int, data, status_code):
-    queue = RequestQueue()
-    queue.response_collection.update_one(
-        filter={"endpoint": endpoint, "detail_id": detail_id},
-        update={
-            "$set": {
-                "payload": data,
-                "status_code": status_code,
-                "last_crawled": datetime.utcnow(),
-            },
-            "$setOnInsert": {
-                "endpoint": endpoint,
-                "detail_id": detail_id,
-            },
-        },
-        upsert=True,
-    )
+        resp, validators = func(detail_id, **validators)
+    except PrimeLeagueParseException as e:
+        return 400, None, {}, type(e).__name__
+    except (TeamWebsite404Exception, Match404Exception) as e:
+        return 404, None, {}, type(e).__name__
+    except PrimeLeagueConnectionException as e:
+        return 500, None, {}, type(e).__name__
+    if resp is None:
+        return 304, None, validators, None
+    return 200, resp, validators, None
+
+
+def __validators(response: dict | None) -> dict[str, str]:
+    """Validators of a stored response, only successful responses can be revalidated."""
+    if response is None or response["status_code"] != 200:
+        return {}
+    if response.get("payload") is None and response.get("payload_raw") is None:
+        return {}
+    return {key: response[key] for key in ("etag", "last_modified") if response.get(key)}
 
 
-def __process_job(job):
+def __raw_payloads() -> bool:
+    """Whether payloads are stored as encoded JSON, see ``settings.REQUEST_QUEUE_RAW_PAYLOADS``."""
+    return settings.REQUEST_QUEUE_RAW_PAYLOADS and fast_json.ACCELERATED
+
+
+def __cached_fields(endpoint: str, data: dict) -> dict:
+    """Fields of the payload the response cache reads (see ``response_ttl``), so it does not decode raw payloads."""
+    if endpoint != EndpointType.MATCH.value:
+        return {}
+    return {"match_time": ((data or {}).get("match") or {}).get("match_time")}
+
+
+def __process_job_safely(job, breaker: CircuitBreaker = None):
+    try:
+        __process_job(job, breaker=breaker)
+    except Exception as e:
+        print(f"Failed to process job: {e}")
+        if breaker is not None:
+            breaker.abandoned(job["payload"]["endpoint"])
+        JOB_RETRIES.inc(endpoint=job["payload"]["endpoint"])
+        get_queue().release(job["_id"], worker_id=job["leased_by"])
+
+
+def __process_job(job, breaker: CircuitBreaker = None):
     print(f"Processing job {job['payload']}...")
     current_attempts = job.get("attempts", 0)
-    status_code, data = __call_api(job["payload"])
     endpoint = job["payload"]["endpoint"]
     detail_id = job["payload"]["detail_id"]
-    queue = RequestQueue()
+    queue = get_queue()
+    validators = __validators(queue.get_response(EndpointType(endpoint), detail_id))
+    started = time.monotonic()
+    status_code, data, validators, error = __call_api(job["payload"], validators)
+    attempt = {
+        "status_code": status_code,
+        "latency": time.monotonic() - started,
+        "error": error,
+        "at": datetime.utcnow(),
+    }
+    queue.record_attempt(endpoint, status_code)
+    JOB_ATTEMPTS.inc(endpoint=endpoint, status_code=status_code)
+    UPSTREAM_LATENCY.observe(attempt["latency"], endpoint=endpoint)
+    # Only server and connection errors mean the upstream is in trouble
+    if breaker is not None and breaker.record(endpoint, failed=status_code == 500):
+        print(f"Too many failures of endpoint {endpoint}, pausing it for {breaker.cooldown} seconds.")
+        CIRCUIT_OPENED.inc(endpoint=endpoint)
+    if status_code == 304:
+        print(f"Successfully processed job {job['payload']}, data is unchanged.")
+        queue.touch_response(endpoint, detail_id, validators)
+        queue.delete_entry(job["_id"])
+        queue.notify_completion(job["_id"])
+        return
     if status_code == 200:
         print(f"Successfully processed job {job['payload']}!")
-        __save_to_db(endpoint, detail_id, data, status_code)
+        queue.save_response(
+            endpoint,
+            detail_id,
+            data,
+            status_code,
+            validators,
+            raw=__raw_payloads(),
+            fields=__cached_fields(endpoint, data),
+        )
         queue.delete_entry(job["_id"])
+        queue.notify_completion(job["_id"])
         return
     current_attempts += 1
-    max_attempts = 3
+    max_attempts = settings.REQUEST_QUEUE_MAX_ATTEMPTS
     if current_attempts >= max_attempts:
         print(f"Failed to process job after {current_attempts} attempts.")
-        __save_to_db(endpoint, detail_id, data, status_code)
+        queue.save_response(endpoint, detail_id, data, status_code)
+        queue.bury(job, attempt)
+        DEAD_LETTERS.inc(endpoint=endpoint)
         queue.delete_entry(job["_id"])
+        queue.notify_completion(job["_id"])
         return
-    print(f"{endpoint}: {detail_id} - Attempt {current_attempts}/{max_attempts} failed. Retrying...")
-    queue.queue_collection.update_one(
-        {"_id": job["_id"]}, {"$set": {"attempts": current_attempts, "last_processed": datetime.utcnow()}}
+    retry_in_seconds = backoff_seconds(
+        current_attempts, base=settings.REQUEST_QUEUE_BACKOFF_BASE, maximum=settings.REQUEST_QUEUE_BACKOFF_MAX
     )
+    print(
+        f"{endpoint}: {detail_id} - Attempt {current_attempts}/{max_attempts} failed. "
+        f"Retrying in {retry_in_seconds:.1f} seconds..."
+    )
+    JOB_RETRIES.inc(endpoint=endpoint)
+    queue.release(
+        job["_id"],
+        worker_id=job["leased_by"],
+        attempts=current_attempts,
+        attempt=attempt,
+        retry_in_seconds=retry_in_seconds,
+    )
+
+
+def __claim_fairly(queue: QueueBackend, fair_share: FairShare, **claim_kwargs) -> dict | None:
+    """Claim a job of the most underserved priority class that has due jobs."""
+    for priority_class in fair_share.order():
+        job = queue.claim(priority_class=priority_class, **claim_kwargs)
+        if job is not None:
+            fair_share.served(priority_class)
+            return job
+        fair_share.idle(priority_class)
+    # Jobs of priorities without a weight
+    return queue.claim(**claim_kwargs)
+
 
+def __worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
-def run():
-    queue = RequestQueue()
 
+def run(concurrency: int = None, rate: float = None, burst: int = None, metrics_port: int = None):
+    """
+    Process jobs ordered by priority. Up to ``concurrency`` jobs are processed at the same time, so a slow response
+    does not stall the queue. New requests are started at no more than ``rate`` requests per second with bursts of
+    up to ``burst`` requests.
+    Jobs are leased, so several workers can run at the same time. Leases of jobs in flight are extended by a
+    heartbeat. Jobs of a crashed worker are processed again after their lease expired (at-least-once).
+    Failed jobs are retried with exponential backoff. After consecutive server or connection errors of an endpoint,
+    its jobs are not dispatched until a circuit breaker lets a trial job through.
+    Priority classes share the worker by ``settings.REQUEST_QUEUE_PRIORITY_WEIGHTS`` and waiting jobs are aged into
+    better classes, so background jobs are not starved by interactive ones.
+    If ``metrics_port`` (default: ``settings.REQUEST_QUEUE_METRICS_PORT``) is set, the metrics of the worker are
+    served at ``/metrics`` on this port in the Prometheus text format.
+    """
+    concurrency = concurrency if concurrency is not None else settings.REQUEST_QUEUE_CONCURRENCY
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    limiter = TokenBucket(
+        rate=rate if rate is not None else settings.REQUEST_QUEUE_RATE,
+        burst=burst if burst is not None else settings.REQUEST_QUEUE_BURST,
+    )
+    lease_seconds = settings.REQUEST_QUEUE_LEASE_SECONDS
+    breaker = CircuitBreaker(
+        threshold=settings.REQUEST_QUEUE_BREAKER_THRESHOLD, cooldown=settings.REQUEST_QUEUE_BREAKER_COOLDOWN
+    )
+    fair_share = FairShare(settings.REQUEST_QUEUE_PRIORITY_WEIGHTS)
+    worker_id = __worker_id()
+    queue = get_queue()
+    queue.ensure_indexes(migrate=True)
+    if settings.REQUEST_QUEUE_RAW_PAYLOADS and not fast_json.ACCELERATED:
+        print("REQUEST_QUEUE_RAW_PAYLOADS is ignored, raw payloads are slower than BSON without orjson installed.")
+    free_slots = threading.Semaphore(concurrency)
+    in_flight: set[ObjectId] = set()
+    in_flight_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def on_done(job_id: ObjectId):
+        with in_flight_lock:
+            in_flight.discard(job_id)
+            JOBS_IN_FLIGHT.set(len(in_flight))
+        free_slots.release()
+
+    def send_heartbeats():
+        while not stopped.wait(lease_seconds / 3):
+            with in_flight_lock:
+                job_ids = list(in_flight)
+            if not job_ids:
+                continue
+            try:
+                queue.extend_leases(job_ids, worker_id=worker_id, lease_seconds=lease_seconds)
+            except Exception as e:
+                print(f"Failed to send heartbeat: {e}")
+
+    def maintain():
+        while not stopped.wait(MAINTENANCE_SECONDS):
+            try:
+                queue.age_priorities(settings.REQUEST_QUEUE_AGING_SECONDS)
+                stats = queue.class_stats()
+                cache_lookups = queue.cache_lookups(since=datetime.utcnow() - timedelta(hours=1))
+            except Exception as e:
+                print(f"Failed to maintain queue: {e}")
+                continue
+            QUEUE_DEPTH.clear()
+            QUEUE_OLDEST_WAIT.clear()
+            for priority, class_stats in stats.items():
+                for endpoint, depth in class_stats["endpoints"].items():
+                    QUEUE_DEPTH.set(depth, priority=priority, endpoint=endpoint)
+                QUEUE_OLDEST_WAIT.set(class_stats["oldest_wait"], priority=priority)
+            PROVIDER_CACHE_LOOKUPS.clear()
+            for endpoint, results in cache_lookups.items():
+                for result, count in results.items():
+                    PROVIDER_CACHE_LOOKUPS.set(count, endpoint=endpoint, result=result)
+
+    metrics_port = metrics_port if metrics_port is not None else settings.REQUEST_QUEUE_METRICS_PORT
+    metrics_server = serve_metrics(metrics_port) if metrics_port else None
+    print(f"Worker {worker_id} started.")
+    queue.age_priorities(settings.REQUEST_QUEUE_AGING_SECONDS)
+    threading.Thread(target=send_heartbeats, name="request-queue-heartbeat", daemon=True).start()
+    threading.Thread(target=maintain, name="request-queue-maintenance", daemon=True).start()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="request-queue")
     try:
         while True:
-            start_time = time.time()
-            job = queue.next(retry_interval_seconds=5)
-
-            if job:
-                try:
-                    __process_job(job)
-                except Exception as e:
-                    print(f"Failed to process job: {e}")
-            else:
+            free_slots.acquire()
+            RATE_LIMIT_SLEEP.inc(limiter.acquire())
+            job = __claim_fairly(
+                queue,
+                fair_share,
+                worker_id=worker_id,
+                lease_seconds=lease_seconds,
+                blocked_endpoints=breaker.blocked(),
+            )
+
+            if job is None:
+                limiter.refund()
+                free_slots.release()
                 print("No jobs in the queue. Waiting...")
-
-            elapsed_time = time.time() - start_time
-            if elapsed_time < MAXIMUM_SLEEP:
-                # Sleep for the remaining time to ensure 1 request per second
-                time.sleep(MAXIMUM_SLEEP - elapsed_time)
+                time.sleep(IDLE_SLEEP_SECONDS)
+                continue
+
+            breaker.dispatched(job["payload"]["endpoint"])
+            wait_seconds = (datetime.utcnow() - job["created_at"]).total_seconds()
+            CLAIMED_WAIT.set(wait_seconds, priority=job.get("effective_priority"))
+            JOB_WAIT.observe(wait_seconds, priority=job.get("effective_priority"))
+            with in_flight_lock:
+                in_flight.add(job["_id"])
+                JOBS_IN_FLIGHT.set(len(in_flight))
+            future = executor.submit(__process_job_safely, job, breaker)
+            future.add_done_callback(lambda _, job_id=job["_id"]: on_done(job_id))
     except KeyboardInterrupt:
         print("Keyboard interrupt. Closing queue...")
     finally:
-        queue.connector.close()
+        executor.shutdown(wait=True)
+        stopped.set()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        queue.close()
         print("Queue closed.")
@@ -0,0 +1,113 @@
+"""
+Indexes of the request queue collections.
+``INDEXES`` declares every index the queries of ``RequestQueue`` need, ``migrate_indexes`` creates missing or changed
+indexes and drops all other indexes of these collections (with ``create_only``, missing indexes are only created).
+Add an index here instead of creating it somewhere else, otherwise it is dropped on the next migration.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexSpec:
+    collection: str
+    keys: list[tuple[str, int]]
+    options: dict = field(default_factory=dict)  # e.g. unique, expireAfterSeconds
+    name: str = None  # defaults to the name MongoDB generates, e.g. "created_at_1"
+
+    def __post_init__(self):
+        if self.name is None:
+            self.name = "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+
+# Order in which jobs are claimed, aged jobs are sorted after jobs that were pushed with the same priority
+CLAIM_ORDER = [("effective_priority", ASCENDING), ("priority", ASCENDING), ("created_at", ASCENDING)]
+
+INDEXES = [
+    # push, push_many: one job per endpoint and detail_id
+    IndexSpec(
+        "request_queue",
+        [("payload.endpoint", ASCENDING), ("payload.detail_id", ASCENDING)],
+        {"unique": True},
+        name="unique_payload",
+    ),
+    # claim, next, pop: equality on the priority class, then sorted by CLAIM_ORDER. Due and lease filters are
+    # checked while walking the index, the first matching entry is the result.
+    IndexSpec("request_queue", CLAIM_ORDER),
+    # class_stats: due jobs
+    IndexSpec("request_queue", [("next_attempt_at", ASCENDING)]),
+    # get_response, get_responses
+    IndexSpec("responses", [("endpoint", ASCENDING), ("detail_id", ASCENDING)]),
+    # Retention: responses marked as not retained by retain_responses expire after their last crawl
+    IndexSpec(
+        "responses",
+        [("last_crawled", ASCENDING)],
+        {
+            "expireAfterSeconds": settings.REQUEST_QUEUE_RESPONSE_RETENTION,
+            "partialFilterExpression": {"retained": False},
+        },
+    ),
+    # deadletters command: filter by endpoint and age
+    IndexSpec("dead_letters", [("endpoint", ASCENDING), ("failed_at", ASCENDING)]),
+    # record_attempt: one document per endpoint and hour
+    IndexSpec("attempt_stats", [("endpoint", ASCENDING), ("hour", ASCENDING)], {"unique": True}),
+    # record_cache_lookups: one document per endpoint and hour
+    IndexSpec("cache_stats", [("endpoint", ASCENDING), ("hour", ASCENDING)], {"unique": True}),
+]
+
+_COMPARED_OPTIONS = ("unique", "expireAfterSeconds", "partialFilterExpression", "sparse")
+
+
+def _matches(spec: IndexSpec, existing: dict) -> bool:
+    if list(existing["key"].items()) != spec.keys:
+        return False
+    return all(existing.get(option) == spec.options.get(option) for option in _COMPARED_OPTIONS)
+
+
+def migrate_indexes(db, indexes: list[IndexSpec] = None, dry_run: bool = False, create_only: bool = False) -> list[str]:
+    """
+    Bring the indexes of all collections in ``indexes`` in line with their declaration. Idempotent: if everything
+    is up to date, nothing is done.
+    :param create_only: only create indexes that do not exist, stale and changed indexes are kept. Safe to run in
+        every process, while a full migration should only run in one process at a time (e.g. the worker's start).
+    :return: the actions taken (or that would be taken if ``dry_run``), e.g. ``["drop request_queue.priority_1"]``
+    """
+    indexes = INDEXES if indexes is None else indexes
+    actions = []
+    for collection_name in dict.fromkeys(x.collection for x in indexes):
+        collection = db[collection_name]
+        specs = {x.name: x for x in indexes if x.collection == collection_name}
+        existing = {x["name"]: x for x in collection.list_indexes()}
+
+        for name, index in existing.items():
+            if create_only or name == "_id_":
+                continue
+            if name not in specs or not _matches(specs[name], index):
+                actions.append(f"drop {collection_name}.{name}")
+                if dry_run:
+                    continue
+                try:
+                    collection.drop_index(name)
+                except OperationFailure as e:
+                    # e.g. dropped by another process in the meantime
+                    logger.warning(f"Could not drop index {collection_name}.{name}: {e}")
+
+        for name, spec in specs.items():
+            if name in existing and (create_only or _matches(spec, existing[name])):
+                continue
+            actions.append(f"create {collection_name}.{name}")
+            if dry_run:
+                continue
+            try:
+                collection.create_index(spec.keys, name=name, **spec.options)
+            except OperationFailure as e:
+                # e.g. duplicates queued before jobs were coalesced
+                logger.warning(f"Could not create index {collection_name}.{name}: {e}")
+    return actions
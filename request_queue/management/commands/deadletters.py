@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from django.core.management import BaseCommand, CommandError
+
+from request_queue.cluster import EndpointType, RequestQueue
+
+
+class Command(BaseCommand):
+    help = "Inspect, replay or purge jobs of the request queue that failed for the last time"
+    requires_system_checks = []
+    requires_migrations_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["list", "stats", "replay", "purge"],
+            help="list dead letters, show failure rates per endpoint, push the jobs again or delete the letters",
+        )
+        parser.add_argument("--endpoint", choices=[x.value for x in EndpointType], help="Only this endpoint")
+        parser.add_argument("--older-than", type=int, metavar="HOURS", help="Only letters older than HOURS")
+        parser.add_argument("--hours", type=int, default=24, help="Time window of stats (default: 24)")
+        parser.add_argument("--limit", type=int, default=50, help="Maximum letters to list (default: 50)")
+
+    def handle(self, *args, **options):
+        queue = RequestQueue()
+        failed_before = None
+        if options["older_than"] is not None:
+            failed_before = datetime.utcnow() - timedelta(hours=options["older_than"])
+        endpoint = EndpointType(options["endpoint"]) if options["endpoint"] else None
+        query = queue.dead_letter_filter(endpoint=endpoint, failed_before=failed_before)
+
+        if options["action"] == "list":
+            letters = queue.dead_letter_collection.find(query).sort("failed_at", -1).limit(options["limit"])
+            for letter in letters:
+                self.stdout.write(
+                    f"{letter['failed_at']:%Y-%m-%d %H:%M:%S} {letter['endpoint']} {letter['detail_id']}: "
+                    f"{letter['status_code']} {letter['error']} after {letter['attempts']} attempts"
+                )
+        elif options["action"] == "stats":
+            since = datetime.utcnow() - timedelta(hours=options["hours"])
+            rates = queue.failure_rates(since)
+            if not rates:
+                self.stdout.write(f"No requests in the last {options['hours']} hours.")
+            for name, rate in sorted(rates.items()):
+                if endpoint is not None and name != endpoint.value:
+                    continue
+                status_codes = ", ".join(f"{code}: {count}" for code, count in sorted(rate["status_codes"].items()))
+                self.stdout.write(
+                    f"{name}: {rate['failures']}/{rate['attempts']} failed ({rate['failure_rate']:.1%}) "
+                    f"- {status_codes}"
+                )
+            dead = queue.dead_letter_collection.count_documents(query)
+            self.stdout.write(f"Dead letters: {dead}")
+        elif options["action"] == "replay":
+            self.stdout.write(self.style.SUCCESS(f"Replayed {queue.replay_dead_letters(query)} dead letters."))
+        elif options["action"] == "purge":
+            self.stdout.write(self.style.SUCCESS(f"Purged {queue.purge_dead_letters(query)} dead letters."))
+        else:
+            raise CommandError(f"Unknown action {options['action']}")
@@ -8,5 +8,33 @@ class Command(BaseCommand):
     requires_system_checks = []
     requires_migrations_checks = False
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Number of requests in flight at the same time (default: settings.REQUEST_QUEUE_CONCURRENCY)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Sustained requests per second (default: settings.REQUEST_QUEUE_RATE)",
+        )
+        parser.add_argument(
+            "--burst",
+            type=int,
+            help="Maximum burst of requests (default: settings.REQUEST_QUEUE_BURST)",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            help="Serve Prometheus metrics at /metrics on this port, 0: off "
+            "(default: settings.REQUEST_QUEUE_METRICS_PORT)",
+        )
+
     def handle(self, *args, **options):
-        run()
+        run(
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            burst=options["burst"],
+            metrics_port=options["metrics_port"],
+        )
@@ -0,0 +1,108 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.core.management import BaseCommand, CommandError
+
+from request_queue.cluster import EndpointType, RequestQueue
+from request_queue.indexes import migrate_indexes
+from request_queue.mongo import MongoConnector
+
+
+def _winning_stages(plan: dict) -> list[str]:
+    stages = [plan["stage"]]
+    for child in plan.get("inputStages", [plan["inputStage"]] if "inputStage" in plan else []):
+        stages += _winning_stages(child)
+    return stages
+
+
+class Command(BaseCommand):
+    help = "Seed a separate database with jobs and measure how long the queue needs to find the next job"
+    requires_system_checks = []
+    requires_migrations_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=100_000, help="Number of seeded jobs (default: 100000)")
+        parser.add_argument("--runs", type=int, default=200, help="Measured queries per shape (default: 200)")
+        parser.add_argument("--max-ms", type=float, default=5.0, help="Maximum allowed p95 latency (default: 5)")
+        parser.add_argument("--database", default="request_queue_benchmark", help="Database that is seeded")
+        parser.add_argument("--keep", action="store_true", help="Do not drop the database afterward")
+
+    def handle(self, *args, **options):
+        client = MongoConnector().client
+        if options["database"] == MongoConnector().db.name:
+            raise CommandError("Refusing to seed the database of the request queue.")
+        client.drop_database(options["database"])
+        db = client[options["database"]]
+        try:
+            self._seed(db, options["jobs"])
+            for action in migrate_indexes(db):
+                self.stdout.write(action)
+            queue = RequestQueue.on_database(db)
+            shapes = {"next": lambda: queue.next()}
+            for priority_class in range(3):
+                shapes[f"next of class {priority_class}"] = lambda x=priority_class: queue.queue_collection.find_one(
+                    filter=queue._claimable_filter(priority_class=x), sort=queue.SORT
+                )
+            too_slow = []
+            for name, query in shapes.items():
+                p50, p95 = self._measure(query, options["runs"])
+                self.stdout.write(f"{name}: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+                if p95 > options["max_ms"]:
+                    too_slow.append(name)
+            for priority_class in (None, 2):
+                explanation = (
+                    queue.queue_collection.find(queue._claimable_filter(priority_class=priority_class))
+                    .sort(queue.SORT)
+                    .limit(1)
+                    .explain()
+                )
+                stages = _winning_stages(explanation["queryPlanner"]["winningPlan"])
+                self.stdout.write(f"Plan of class {priority_class}: {' <- '.join(stages)}")
+                if "SORT" in stages or "COLLSCAN" in stages:
+                    raise CommandError(f"The claim of class {priority_class} does not use the index: {stages}")
+            if too_slow:
+                raise CommandError(f"p95 above {options['max_ms']} ms: {', '.join(too_slow)}")
+            self.stdout.write(self.style.SUCCESS("All queries are fast enough."))
+        finally:
+            if not options["keep"]:
+                client.drop_database(options["database"])
+
+    def _seed(self, db, jobs: int, chunk_size: int = 10_000):
+        """
+        Jobs of all priority classes, most of them of the lowest priority like after the nightly update. Some are
+        leased or waiting for a retry, so the claim has to skip index entries.
+        """
+        now = datetime.utcnow()
+        endpoints = [x.value for x in EndpointType]
+        for start in range(0, jobs, chunk_size):
+            documents = []
+            for i in range(start, min(start + chunk_size, jobs)):
+                priority = random.choices([0, 1, 2], weights=[1, 10, 89])[0]
+                leased = random.random() < 0.05
+                documents.append(
+                    {
+                        "payload": {"endpoint": endpoints[i % len(endpoints)], "detail_id": i},
+                        "priority": priority,
+                        "effective_priority": priority,
+                        "created_at": now - timedelta(seconds=random.randint(0, 3600)),
+                        "attempts": 0,
+                        "last_processed": None,
+                        "leased_by": "benchmark" if leased else None,
+                        "lease_expires": now + timedelta(minutes=5) if leased else None,
+                        "next_attempt_at": now + timedelta(minutes=5) if random.random() < 0.05 else None,
+                    }
+                )
+            db[RequestQueue.REQUEST_COL_NAME].insert_many(documents, ordered=False)
+        self.stdout.write(f"Seeded {jobs} jobs.")
+
+    @staticmethod
+    def _measure(query, runs: int) -> tuple[float, float]:
+        query()  # warm up
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            query()
+            durations.append((time.perf_counter() - start) * 1000)
+        return statistics.median(durations), statistics.quantiles(durations, n=20)[-1]
@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from request_queue.indexes import migrate_indexes
+from request_queue.mongo import MongoConnector
+
+
+class Command(BaseCommand):
+    help = "Create the declared indexes of the request queue and drop stale ones"
+    requires_system_checks = []
+    requires_migrations_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only show what would be created or dropped")
+
+    def handle(self, *args, **options):
+        actions = migrate_indexes(MongoConnector().db, dry_run=options["dry_run"])
+        for action in actions:
+            self.stdout.write(action)
+        if not actions:
+            self.stdout.write(self.style.SUCCESS("Indexes are up to date."))
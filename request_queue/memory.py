@@ -0,0 +1,353 @@
+import copy
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from bson import ObjectId
+from django.conf import settings
+
+from core.providers.base import payload_hash
+from utils import fast_json
+
+from .base import EndpointType, QueueBackend
+from .notifier import CompletionNotifier, WaitStrategy
+
+
+class MemoryRequestQueue(QueueBackend):
+    """
+    Request queue in the memory of the process, for load tests and benchmarks of the update pipeline on one machine
+    or small deployments without MongoDB. The worker must run in the same process as the providers, e.g. in a
+    thread, and nothing survives a restart.
+    Jobs are kept in one heap per effective priority, ordered like ``CLAIM_ORDER`` of the MongoDB queue. Entries of
+    deleted jobs or jobs whose priority changed are skipped when they come up.
+    """
+
+    _instance = None
+
+    def __init__(self):
+        if getattr(self, "_initialized", False):
+            return
+        self._jobs: dict[ObjectId, dict] = {}
+        self._job_ids: dict[tuple[str, int], ObjectId] = {}
+        self._heaps: dict[int, list[tuple]] = {}
+        self._sequence = itertools.count()
+        self._responses: dict[tuple[str, int], dict] = {}
+        self._attempt_stats: dict[tuple[str, datetime], dict] = {}
+        self._cache_stats: dict[tuple[str, datetime], dict[str, int]] = {}
+        self.dead_letters: list[dict] = []
+        self._lock = threading.RLock()
+        self.notifier = CompletionNotifier(
+            None,
+            strategy=WaitStrategy.LOCAL,
+            poll_interval=settings.REQUEST_QUEUE_POLL_INTERVAL,
+            fallback_interval=settings.REQUEST_QUEUE_FALLBACK_POLL_INTERVAL,
+        )
+        self._initialized = True
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def _index(self, job: dict):
+        entry = (job["effective_priority"], job["priority"], job["created_at"], next(self._sequence), job["_id"])
+        heapq.heappush(self._heaps.setdefault(job["effective_priority"], []), entry)
+
+    def _is_current(self, entry: tuple) -> bool:
+        job = self._jobs.get(entry[-1])
+        return job is not None and (job["effective_priority"], job["priority"]) == entry[:2]
+
+    @staticmethod
+    def _is_claimable(job: dict, now: datetime, blocked_endpoints: Iterable[str]) -> bool:
+        return (
+            (job["next_attempt_at"] is None or job["next_attempt_at"] <= now)
+            and (job["lease_expires"] is None or job["lease_expires"] < now)
+            and job["payload"]["endpoint"] not in blocked_endpoints
+        )
+
+    def _find(self, blocked_endpoints: Iterable[str] = (), priority_class: int = None) -> dict | None:
+        """The first claimable job in claim order, call with the lock held."""
+        now = datetime.utcnow()
+        blocked_endpoints = set(blocked_endpoints)
+        classes = sorted(self._heaps) if priority_class is None else [priority_class]
+        for effective_priority in classes:
+            heap = self._heaps.get(effective_priority, [])
+            skipped = []
+            found = None
+            while heap:
+                entry = heapq.heappop(heap)
+                if not self._is_current(entry):
+                    continue
+                skipped.append(entry)
+                job = self._jobs[entry[-1]]
+                if self._is_claimable(job, now, blocked_endpoints):
+                    found = job
+                    break
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            if found is not None:
+                return found
+        return None
+
+    def _push(self, endpoint: EndpointType, detail_id, priority: int, created_at: datetime) -> dict:
+        key = (endpoint.value, detail_id)
+        job = self._jobs.get(self._job_ids.get(key))
+        if job is None:
+            job = {
+                "_id": ObjectId(),
+                "payload": {"endpoint": endpoint.value, "detail_id": detail_id},
+                "priority": priority,
+                "effective_priority": priority,
+                "created_at": created_at,
+                "attempts": 0,
+                "last_processed": None,
+                "leased_by": None,
+                "lease_expires": None,
+                "next_attempt_at": None,
+            }
+            self._jobs[job["_id"]] = job
+            self._job_ids[key] = job["_id"]
+            self._index(job)
+        elif priority < job["priority"] or priority < job["effective_priority"]:
+            job["priority"] = min(job["priority"], priority)
+            job["effective_priority"] = min(job["effective_priority"], priority)
+            self._index(job)
+        return job
+
+    def push(self, endpoint: EndpointType, detail_id, priority: int = 0) -> str:
+        with self._lock:
+            job = self._push(endpoint, detail_id, priority, datetime.utcnow())
+        print(f"Job with payload {job['payload']} pushed to queue.")
+        return str(job["_id"])
+
+    def push_many(self, endpoint: EndpointType, detail_ids: list[int], priority: int = 0) -> dict[int, str]:
+        now = datetime.utcnow()
+        with self._lock:
+            job_ids = {
+                x: str(self._push(endpoint, x, priority, now + timedelta(milliseconds=i))["_id"])
+                for i, x in enumerate(dict.fromkeys(detail_ids))
+            }
+        print(f"{len(job_ids)} jobs of endpoint {endpoint.value} pushed to queue.")
+        return job_ids
+
+    def next(self) -> dict | None:
+        with self._lock:
+            return copy.deepcopy(self._find())
+
+    def claim(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        blocked_endpoints: Iterable[str] = (),
+        priority_class: int = None,
+    ) -> dict | None:
+        with self._lock:
+            job = self._find(blocked_endpoints, priority_class)
+            if job is None:
+                return None
+            job["leased_by"] = worker_id
+            job["lease_expires"] = datetime.utcnow() + timedelta(seconds=lease_seconds)
+            return copy.deepcopy(job)
+
+    def extend_leases(self, job_ids: list[ObjectId], worker_id: str, lease_seconds: int):
+        lease_expires = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job["leased_by"] == worker_id:
+                    job["lease_expires"] = lease_expires
+
+    def release(
+        self,
+        job_id: ObjectId,
+        worker_id: str,
+        attempts: int = None,
+        attempt: dict = None,
+        retry_in_seconds: float = 0,
+    ):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["leased_by"] != worker_id:
+                return
+            job["leased_by"] = None
+            job["lease_expires"] = None
+            if attempts is not None:
+                now = datetime.utcnow()
+                job["attempts"] = attempts
+                job["last_processed"] = now
+                job["next_attempt_at"] = now + timedelta(seconds=retry_in_seconds)
+            if attempt is not None:
+                job.setdefault("attempt_log", []).append(attempt)
+
+    def bury(self, job: dict, attempt: dict):
+        attempt_log = job.get("attempt_log", []) + [attempt]
+        with self._lock:
+            self.dead_letters.append(
+                {
+                    "job": {**job, "attempt_log": attempt_log},
+                    "endpoint": job["payload"]["endpoint"],
+                    "detail_id": job["payload"]["detail_id"],
+                    "status_code": attempt["status_code"],
+                    "error": attempt["error"],
+                    "attempts": len(attempt_log),
+                    "failed_at": datetime.utcnow(),
+                }
+            )
+
+    def delete_entry(self, entry_id: ObjectId):
+        with self._lock:
+            job = self._jobs.pop(ObjectId(entry_id), None)
+            if job is not None:
+                self._job_ids.pop((job["payload"]["endpoint"], job["payload"]["detail_id"]), None)
+
+    def age_priorities(self, aging_seconds: float):
+        if not aging_seconds:
+            return
+        now = datetime.utcnow()
+        with self._lock:
+            for job in self._jobs.values():
+                steps = int((now - job["created_at"]).total_seconds() // aging_seconds)
+                effective_priority = max(job["priority"] - steps, 0)
+                if effective_priority < job["effective_priority"]:
+                    job["effective_priority"] = effective_priority
+                    self._index(job)
+
+    def class_stats(self) -> dict[int, dict]:
+        now = datetime.utcnow()
+        stats = {}
+        with self._lock:
+            for job in self._jobs.values():
+                if job["next_attempt_at"] is not None and job["next_attempt_at"] > now:
+                    continue
+                class_stats = stats.setdefault(
+                    job["effective_priority"], {"depth": 0, "oldest_wait": 0.0, "endpoints": {}}
+                )
+                class_stats["depth"] += 1
+                class_stats["oldest_wait"] = max(class_stats["oldest_wait"], (now - job["created_at"]).total_seconds())
+                endpoint = job["payload"]["endpoint"]
+                class_stats["endpoints"][endpoint] = class_stats["endpoints"].get(endpoint, 0) + 1
+        return stats
+
+    def record_attempt(self, endpoint: str, status_code: int):
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            stats = self._attempt_stats.setdefault(
+                (endpoint, hour), {"endpoint": endpoint, "hour": hour, "attempts": 0, "failures": 0, "status_codes": {}}
+            )
+            stats["attempts"] += 1
+            stats["failures"] += int(status_code not in (200, 304))
+            stats["status_codes"][str(status_code)] = stats["status_codes"].get(str(status_code), 0) + 1
+
+    def failure_rates(self, since: datetime) -> dict[str, dict]:
+        since = since.replace(minute=0, second=0, microsecond=0)
+        rates = {}
+        with self._lock:
+            for stats in self._attempt_stats.values():
+                if stats["hour"] < since:
+                    continue
+                rate = rates.setdefault(stats["endpoint"], {"attempts": 0, "failures": 0, "status_codes": {}})
+                rate["attempts"] += stats["attempts"]
+                rate["failures"] += stats["failures"]
+                for status_code, count in stats["status_codes"].items():
+                    rate["status_codes"][status_code] = rate["status_codes"].get(status_code, 0) + count
+        for rate in rates.values():
+            rate["failure_rate"] = rate["failures"] / rate["attempts"] if rate["attempts"] else 0
+        return rates
+
+    def record_cache_lookups(self, endpoint: str, results: dict[str, int]):
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            stats = self._cache_stats.setdefault((endpoint, hour), {})
+            for result, count in results.items():
+                stats[result] = stats.get(result, 0) + count
+
+    def cache_lookups(self, since: datetime) -> dict[str, dict[str, int]]:
+        since = since.replace(minute=0, second=0, microsecond=0)
+        lookups = {}
+        with self._lock:
+            for (endpoint, hour), stats in self._cache_stats.items():
+                if hour < since:
+                    continue
+                results = lookups.setdefault(endpoint, {})
+                for result, count in stats.items():
+                    results[result] = results.get(result, 0) + count
+        return lookups
+
+    def get_response(self, endpoint: EndpointType, detail_id: int) -> dict | None:
+        with self._lock:
+            return copy.deepcopy(self._responses.get((endpoint.value, detail_id)))
+
+    def get_responses(self, endpoint: EndpointType, detail_ids: list[int]) -> dict[int, dict]:
+        with self._lock:
+            return {
+                x: copy.deepcopy(self._responses[(endpoint.value, x)])
+                for x in detail_ids
+                if (endpoint.value, x) in self._responses
+            }
+
+    def save_response(
+        self,
+        endpoint: str,
+        detail_id: int,
+        data,
+        status_code: int,
+        validators: dict = None,
+        raw: bool = False,
+        fields: dict = None,
+    ):
+        now = datetime.utcnow()
+        validators = validators or {}
+        raw = raw and data is not None
+        with self._lock:
+            response = self._responses.setdefault((endpoint, detail_id), {"endpoint": endpoint, "detail_id": detail_id})
+            response.update(
+                {
+                    **(fields or {}),
+                    "payload": None if raw else data,
+                    "payload_raw": fast_json.dumps(data) if raw else None,
+                    "payload_hash": payload_hash(data),
+                    "status_code": status_code,
+                    "last_crawled": now,
+                    "last_changed": now,
+                    "etag": validators.get("etag"),
+                    "last_modified": validators.get("last_modified"),
+                }
+            )
+
+    def touch_response(self, endpoint: str, detail_id: int, validators: dict):
+        with self._lock:
+            response = self._responses.get((endpoint, detail_id))
+            if response is not None:
+                response.update(
+                    {
+                        "last_crawled": datetime.utcnow(),
+                        "etag": validators.get("etag"),
+                        "last_modified": validators.get("last_modified"),
+                    }
+                )
+
+    def retain_responses(self, endpoint: EndpointType, detail_ids: Iterable[int]) -> int:
+        """
+        Like ``RequestQueue.retain_responses``. There is no TTL monitor, so expired responses that are not retained
+        are deleted here.
+        """
+        detail_ids = set(detail_ids)
+        expired_before = datetime.utcnow() - timedelta(seconds=settings.REQUEST_QUEUE_RESPONSE_RETENTION)
+        marked = 0
+        with self._lock:
+            for key, response in list(self._responses.items()):
+                if key[0] != endpoint.value:
+                    continue
+                retained = key[1] in detail_ids
+                if not retained and response.get("retained") is not False:
+                    marked += 1
+                response["retained"] = retained
+                if not retained and response["last_crawled"] < expired_before:
+                    del self._responses[key]
+        return marked
+
+    def queued_jobs(self, job_ids: Iterable[str]) -> set[str]:
+        with self._lock:
+            return {x for x in job_ids if ObjectId(x) in self._jobs}
@@ -0,0 +1,216 @@
+"""
+Process-local metrics of the request queue and its providers.
+Metrics are registered once at import time and are updated by any thread of the process. ``Registry.render`` formats
+them in the Prometheus text format, ``serve`` exposes them over HTTP.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds, from cached lookups to slow upstream responses
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[x]) for x in self.labels)
+
+    @abstractmethod
+    def samples(self) -> list[tuple[dict[str, str], float]]:
+        pass
+
+    def render(self) -> list[str]:
+        """Lines of the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.samples()]
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing value, optionally split by labels."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[tuple[dict[str, str], float]]:
+        with self._lock:
+            return [(dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally split by labels."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        """Remove all values, e.g. before setting the values of all labels again."""
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values, e.g. latencies, optionally split by labels. Values are counted in cumulative
+    buckets of upper bounds like in Prometheus, so quantiles can be estimated across processes.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: dict[tuple, list[int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, **labels) -> dict:
+        """Count, sum and cumulative bucket counts (upper bound to count) of the observed values."""
+        key = self._key(labels)
+        with self._lock:
+            counts = list(self._counts.get(key, [0] * len(self.buckets)))
+            total = self._values.get(key, 0)
+        cumulative = [sum(counts[: i + 1]) for i in range(len(counts))]
+        return {"count": cumulative[-1], "sum": total, "buckets": dict(zip(self.buckets, cumulative))}
+
+    def samples(self) -> list[tuple[dict[str, str], float]]:
+        """Cumulative bucket counts, the upper bound is the label ``le``."""
+        with self._lock:
+            keys = list(self._counts)
+        samples = []
+        for key in keys:
+            labels = dict(zip(self.labels, key))
+            for bound, count in self.get(**labels)["buckets"].items():
+                samples.append(({**labels, "le": _format_value(bound)}, count))
+        return samples
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            keys = list(self._counts)
+        for key in keys:
+            labels = dict(zip(self.labels, key))
+            values = self.get(**labels)
+            for bound, count in values["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(values['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {values['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class: type, name: str, documentation: str, labels: tuple[str, ...], **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = metric_class(name, documentation, labels, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        """Return the counter with the given name, it is created on first use."""
+        return self._get_or_create(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Gauge:
+        """Return the gauge with the given name, it is created on first use."""
+        return self._get_or_create(Gauge, name, documentation, labels)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Return the histogram with the given name, it is created on first use."""
+        return self._get_or_create(Histogram, name, documentation, labels, buckets=buckets)
+
+    def snapshot(self) -> dict[str, list[tuple[dict[str, str], float]]]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {x.name: x.samples() for x in metrics}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda x: x.name)
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+
+REGISTRY = Registry()
+
+
+def serve(port: int, registry: Registry = REGISTRY, host: str = "") -> ThreadingHTTPServer:
+    """
+    Serve the metrics of the registry in the Prometheus text format at ``http://<host>:<port>/metrics`` in a daemon
+    thread. Call ``shutdown`` on the returned server to stop it.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scraped every few seconds
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="request-queue-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Iterable
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class WaitStrategy(Enum):
+    TAILABLE = "tailable"
+    LOCAL = "local"
+    POLLING = "polling"
+
+
+class CompletionNotifier:
+    """
+    Wakes up threads that wait for a queued job as soon as the worker finished it.
+
+    The worker writes every completed job ID into a capped collection. Each process that waits for jobs tails this
+    collection in a background thread (change streams would require a replica set). Waiters in the same process as
+    the worker are woken up directly. Waiters still re-check the queue every ``fallback_interval`` seconds, so a lost
+    notification only delays a waiter but never blocks it.
+    """
+
+    COL_NAME = "completions"
+    COL_SIZE = 1024 * 1024  # bytes, old completions are overwritten
+    LISTENER_RESTART_SECONDS = 1
+    RECENT_COMPLETIONS = 4096  # completions remembered to not wake waiters again when the cursor is recreated
+
+    def __init__(self, db, strategy: WaitStrategy, poll_interval: float, fallback_interval: float):
+        self.strategy = strategy
+        self.collection = self._get_or_create_collection(db) if strategy == WaitStrategy.TAILABLE else None
+        self.wait_interval = poll_interval if strategy == WaitStrategy.POLLING else fallback_interval
+        self._events: dict[str, set[threading.Event]] = {}
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+
+    def _get_or_create_collection(self, db):
+        try:
+            return db.create_collection(self.COL_NAME, capped=True, size=self.COL_SIZE)
+        except CollectionInvalid:
+            return db[self.COL_NAME]
+
+    def subscribe(self, job_ids: Iterable[str]) -> threading.Event:
+        """
+        Return an event that is set as soon as any of the jobs is completed.
+        Call ``unsubscribe`` with the same job IDs and the event when done.
+        """
+        if self.strategy == WaitStrategy.TAILABLE:
+            self._ensure_listener()
+        event = threading.Event()
+        with self._lock:
+            for job_id in job_ids:
+                self._events.setdefault(job_id, set()).add(event)
+        return event
+
+    def unsubscribe(self, job_ids: Iterable[str], event: threading.Event):
+        with self._lock:
+            for job_id in job_ids:
+                events = self._events.get(job_id, set())
+                events.discard(event)
+                if not events:
+                    self._events.pop(job_id, None)
+
+    def notify(self, job_id: str):
+        """Publish that the job is completed. The response must be saved and the job deleted before."""
+        self._wake(job_id)
+        if self.collection is not None:
+            self.collection.insert_one({"job_id": job_id, "completed_at": datetime.utcnow()})
+
+    def _wake(self, job_id: str):
+        with self._lock:
+            events = list(self._events.get(job_id, ()))
+        for event in events:
+            event.set()
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name="request-queue-completions", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        # The cursor is recreated from the start of the collection instead of after the last seen _id, because the
+        # ObjectIds of different workers are not ordered and a completion with a smaller _id would be skipped.
+        # Recently seen completions are skipped, older ones only wake waiters of jobs that are already completed.
+        recent = deque(maxlen=self.RECENT_COMPLETIONS)
+        seen = set()
+        while True:
+            try:
+                cursor = self.collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    for doc in cursor:
+                        if doc["_id"] in seen:
+                            continue
+                        if len(recent) == recent.maxlen:
+                            seen.discard(recent[0])
+                        recent.append(doc["_id"])
+                        seen.add(doc["_id"])
+                        self._wake(doc["job_id"])
+            except PyMongoError as e:
+                logger.warning(f"Completion listener lost its cursor: {e}")
+            # A tailable cursor dies immediately on an empty collection
+            time.sleep(self.LISTENER_RESTART_SECONDS)
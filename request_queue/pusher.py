@@ -1,13 +1,13 @@
-from request_queue import EndpointType, RequestQueue
+from request_queue import EndpointType, get_queue
 
 
 def push(endpoint: EndpointType, detail_id: int, priority: int = 0) -> str:
     """
-    Push a job to the request queue.
+    Push a job to the request queue. If the same job is already queued, the existing job is reused.
     :param endpoint:
     :param detail_id:
     :param priority:
     :return: the job id
     """
-    q = RequestQueue()
+    q = get_queue()
     return q.push(endpoint, detail_id, priority)
@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    ``rate`` tokens are added per second, up to ``burst`` tokens. Every request has to take one token.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available and take it.
+        :return: seconds slept while waiting for the token
+        """
+        slept = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return slept
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            slept += wait
+
+    def refund(self):
+        """Give back a token that was acquired but not used for a request."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
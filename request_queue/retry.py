@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+
+
+def backoff_seconds(attempts: int, base: float, maximum: float) -> float:
+    """
+    Delay before the next attempt of a job that failed ``attempts`` times: exponential backoff with equal jitter,
+    i.e. a random delay between half and all of ``base * 2 ** (attempts - 1)`` (capped at ``maximum``). The jitter
+    spreads the retries of jobs that failed together, e.g. during an outage.
+    """
+    delay = min(maximum, base * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """
+    Pauses the dispatch of an endpoint after ``threshold`` consecutive failures. After ``cooldown`` seconds, a single
+    trial job is dispatched: if it succeeds, the endpoint is closed again, otherwise it is paused for another
+    ``cooldown`` seconds. Jobs of a paused endpoint stay in the queue and do not use up their attempts.
+    Thread-safe, the state is local to the worker process.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._trial_in_flight: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _is_half_open(self, endpoint: str, now: float) -> bool:
+        return endpoint in self._opened_at and now - self._opened_at[endpoint] >= self.cooldown
+
+    def blocked(self) -> list[str]:
+        """Endpoints whose jobs must not be dispatched now."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                endpoint
+                for endpoint in self._opened_at
+                if not self._is_half_open(endpoint, now) or endpoint in self._trial_in_flight
+            ]
+
+    def dispatched(self, endpoint: str):
+        """Call when a job is dispatched, the first job after the cooldown is the trial."""
+        with self._lock:
+            if self._is_half_open(endpoint, time.monotonic()):
+                self._trial_in_flight.add(endpoint)
+
+    def abandoned(self, endpoint: str):
+        """
+        Call when a job could not be processed for another reason than the upstream, e.g. a database error. A trial
+        is given up without a result, so the next job of the endpoint is the trial.
+        """
+        with self._lock:
+            self._trial_in_flight.discard(endpoint)
+
+    def record(self, endpoint: str, failed: bool) -> bool:
+        """
+        Record the result of a job.
+        :return: True if the endpoint was paused by this result
+        """
+        with self._lock:
+            self._trial_in_flight.discard(endpoint)
+            if not failed:
+                self._failures.pop(endpoint, None)
+                self._opened_at.pop(endpoint, None)
+                return False
+            self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+            if endpoint in self._opened_at or self._failures[endpoint] >= self.threshold:
+                self._opened_at[endpoint] = time.monotonic()
+                return True
+            return False
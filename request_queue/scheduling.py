@@ -0,0 +1,36 @@
+import threading
+
+
+class FairShare:
+    """
+    Weighted fair share between priority classes: over time, every class that has jobs is served in proportion to
+    its weight, e.g. with weights ``{0: 8, 2: 1}`` eight interactive jobs are processed per background job while
+    both classes are busy. A class that had no jobs does not save up its share for later.
+    Thread-safe, the state is local to the worker process.
+    """
+
+    def __init__(self, weights: dict[int, float]):
+        self.weights = weights
+        self._finish = {priority: 0.0 for priority in weights}  # virtual time the class has been served until
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    def order(self) -> list[int]:
+        """Priority classes in the order they should be tried, the most underserved class first."""
+        with self._lock:
+            return sorted(self.weights, key=lambda priority: (self._finish[priority], priority))
+
+    def served(self, priority: int):
+        """Call when a job of the class was dispatched."""
+        with self._lock:
+            if priority not in self.weights:
+                return
+            start = max(self._finish[priority], self._virtual_time)
+            self._virtual_time = start
+            self._finish[priority] = start + 1 / self.weights[priority]
+
+    def idle(self, priority: int):
+        """Call when the class had no job to dispatch, so it does not get credit for the idle time."""
+        with self._lock:
+            if priority in self.weights:
+                self._finish[priority] = max(self._finish[priority], self._virtual_time)
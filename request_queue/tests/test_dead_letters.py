@@ -0,0 +1,66 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase
+
+from request_queue import EndpointType, RequestQueue
+
+
+def queue_without_connection() -> RequestQueue:
+    queue = object.__new__(RequestQueue)
+    queue.queue_collection = MagicMock()
+    queue.dead_letter_collection = MagicMock()
+    queue.attempt_stats_collection = MagicMock()
+    queue.cache_stats_collection = MagicMock()
+    return queue
+
+
+class DeadLetterTest(SimpleTestCase):
+    def test_bury_keeps_attempt_log(self):
+        queue = queue_without_connection()
+        first = {"status_code": 500, "latency": 1.0, "error": "PrimeLeagueConnectionException", "at": None}
+        last = {**first, "status_code": 400, "error": "PrimeLeagueParseException"}
+        job = {"payload": {"endpoint": "match", "detail_id": 3}, "priority": 2, "attempt_log": [first]}
+
+        queue.bury(job, last)
+
+        letter = queue.dead_letter_collection.insert_one.call_args.args[0]
+        self.assertEqual(letter["job"]["attempt_log"], [first, last])
+        self.assertEqual((letter["endpoint"], letter["detail_id"]), ("match", 3))
+        self.assertEqual((letter["status_code"], letter["error"], letter["attempts"]), (400, last["error"], 2))
+
+    def test_replay_pushes_by_endpoint_and_priority(self):
+        queue = queue_without_connection()
+        queue.push_many = MagicMock()
+        queue.dead_letter_collection.find.return_value = [
+            {"_id": 1, "endpoint": "match", "detail_id": 3, "job": {"priority": 2}},
+            {"_id": 2, "endpoint": "match", "detail_id": 4, "job": {"priority": 2}},
+            {"_id": 3, "endpoint": "team", "detail_id": 5, "job": {"priority": 0}},
+        ]
+
+        self.assertEqual(queue.replay_dead_letters({}), 3)
+
+        queue.push_many.assert_any_call(EndpointType.MATCH, [3, 4], priority=2)
+        queue.push_many.assert_any_call(EndpointType.TEAM, [5], priority=0)
+        queue.dead_letter_collection.delete_many.assert_called_once_with({"_id": {"$in": [1, 2, 3]}})
+
+    def test_failure_rates(self):
+        queue = queue_without_connection()
+        queue.attempt_stats_collection.find.return_value = [
+            {"endpoint": "match", "attempts": 6, "failures": 3, "status_codes": {"200": 3, "500": 3}},
+            {"endpoint": "match", "attempts": 2, "failures": 1, "status_codes": {"304": 1, "500": 1}},
+        ]
+
+        rates = queue.failure_rates(datetime.utcnow())
+
+        self.assertEqual(rates["match"]["failure_rate"], 0.5)
+        self.assertEqual(rates["match"]["status_codes"], {"200": 3, "304": 1, "500": 4})
+
+    def test_cache_lookups(self):
+        queue = queue_without_connection()
+        queue.cache_stats_collection.find.return_value = [
+            {"endpoint": "match", "results": {"hit": 3, "miss": 1}},
+            {"endpoint": "match", "results": {"hit": 1, "stale": 2}},
+        ]
+
+        self.assertEqual(queue.cache_lookups(datetime.utcnow()), {"match": {"hit": 4, "miss": 1, "stale": 2}})
@@ -0,0 +1,113 @@
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase
+from pymongo.errors import OperationFailure
+
+from request_queue import EndpointType, RequestQueue
+from request_queue.indexes import CLAIM_ORDER, INDEXES, IndexSpec, migrate_indexes
+
+
+class FakeCollection:
+    """Keeps the indexes like MongoDB, including the ``_id_`` index."""
+
+    def __init__(self, indexes: list[dict] = None):
+        self.indexes = {"_id_": {"name": "_id_", "key": {"_id": 1}}}
+        for index in indexes or []:
+            self.indexes[index["name"]] = index
+
+    def list_indexes(self):
+        return list(self.indexes.values())
+
+    def create_index(self, keys, name, **options):
+        self.indexes[name] = {"name": name, "key": dict(keys), **options}
+
+    def drop_index(self, name):
+        del self.indexes[name]
+
+
+class MigrateIndexesTest(SimpleTestCase):
+    def setUp(self):
+        self.specs = [
+            IndexSpec("jobs", [("payload.endpoint", 1), ("payload.detail_id", 1)], {"unique": True}, name="unique"),
+            IndexSpec("jobs", CLAIM_ORDER),
+        ]
+        self.collection = FakeCollection()
+        self.db = MagicMock()
+        self.db.__getitem__.return_value = self.collection
+
+    def test_default_name_is_generated_like_mongodb(self):
+        self.assertEqual(IndexSpec("jobs", CLAIM_ORDER).name, "effective_priority_1_priority_1_created_at_1")
+
+    def test_creates_missing_indexes(self):
+        actions = migrate_indexes(self.db, self.specs)
+
+        self.assertEqual(actions, ["create jobs.unique", "create jobs.effective_priority_1_priority_1_created_at_1"])
+        self.assertEqual(self.collection.indexes["unique"]["unique"], True)
+
+    def test_is_idempotent(self):
+        migrate_indexes(self.db, self.specs)
+
+        self.assertEqual(migrate_indexes(self.db, self.specs), [])
+
+    def test_drops_stale_and_changed_indexes(self):
+        self.collection.create_index([("priority", 1), ("created_at", 1)], name="priority_1_created_at_1")
+        self.collection.create_index([("payload.endpoint", 1), ("payload.detail_id", 1)], name="unique")
+
+        actions = migrate_indexes(self.db, self.specs)
+
+        self.assertIn("drop jobs.priority_1_created_at_1", actions)
+        self.assertIn("drop jobs.unique", actions)
+        self.assertIn("create jobs.unique", actions)
+        self.assertNotIn("priority_1_created_at_1", self.collection.indexes)
+        self.assertIn("_id_", self.collection.indexes)
+        self.assertEqual(self.collection.indexes["unique"]["unique"], True)
+
+    def test_create_only_keeps_stale_and_changed_indexes(self):
+        self.collection.create_index([("priority", 1)], name="priority_1")
+        self.collection.create_index([("payload.endpoint", 1), ("payload.detail_id", 1)], name="unique")
+
+        actions = migrate_indexes(self.db, self.specs, create_only=True)
+
+        self.assertEqual(actions, ["create jobs.effective_priority_1_priority_1_created_at_1"])
+        self.assertEqual(set(self.collection.indexes), {"_id_", "priority_1", "unique", self.specs[1].name})
+
+    def test_drop_of_missing_index_is_ignored(self):
+        self.collection.create_index([("priority", 1)], name="priority_1")
+        self.collection.drop_index = MagicMock(side_effect=OperationFailure("index not found"))
+
+        actions = migrate_indexes(self.db, self.specs)
+
+        self.assertIn("drop jobs.priority_1", actions)
+        self.assertIn("create jobs.unique", actions)
+
+    def test_dry_run_changes_nothing(self):
+        self.collection.create_index([("priority", 1)], name="priority_1")
+
+        actions = migrate_indexes(self.db, self.specs, dry_run=True)
+
+        self.assertEqual(len(actions), 3)
+        self.assertEqual(set(self.collection.indexes), {"_id_", "priority_1"})
+
+
+class ResponseRetentionTest(SimpleTestCase):
+    def test_only_responses_not_retained_expire(self):
+        ttl = next(x for x in INDEXES if x.collection == "responses" and "expireAfterSeconds" in x.options)
+
+        self.assertEqual(ttl.keys, [("last_crawled", 1)])
+        self.assertEqual(ttl.options["partialFilterExpression"], {"retained": False})
+
+    def test_retain_marks_other_responses_of_the_endpoint(self):
+        queue = object.__new__(RequestQueue)
+        queue.response_collection = MagicMock()
+        queue.response_collection.update_many.return_value.modified_count = 4
+
+        self.assertEqual(queue.retain_responses(EndpointType.TEAM, iter([1, 2])), 4)
+
+        (retained, retained_update), (expiring, expiring_update) = [
+            x.args for x in queue.response_collection.update_many.call_args_list
+        ]
+        self.assertEqual(retained["detail_id"], {"$in": [1, 2]})
+        self.assertEqual(retained_update, {"$set": {"retained": True}})
+        self.assertEqual(expiring["detail_id"], {"$nin": [1, 2]})
+        self.assertEqual(expiring["endpoint"], "team")
+        self.assertEqual(expiring_update, {"$set": {"retained": False}})
@@ -0,0 +1,112 @@
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from request_queue import EndpointType, cluster, get_queue
+from request_queue.base import response_payload
+from request_queue.memory import MemoryRequestQueue
+
+process_job = getattr(cluster, "__process_job")
+
+
+class MemoryRequestQueueTest(SimpleTestCase):
+    def setUp(self):
+        MemoryRequestQueue._instance = None
+        self.addCleanup(setattr, MemoryRequestQueue, "_instance", None)
+        self.queue = MemoryRequestQueue()
+
+    def test_selected_by_settings(self):
+        with override_settings(REQUEST_QUEUE_BACKEND="memory"):
+            self.assertIs(get_queue(), self.queue)
+
+    def test_push_coalesces_and_raises_priority(self):
+        job_id = self.queue.push(EndpointType.TEAM, 1, priority=2)
+
+        self.assertEqual(self.queue.push(EndpointType.TEAM, 1, priority=0), job_id)
+        self.assertEqual(self.queue.push_many(EndpointType.TEAM, [1, 2, 2]).keys(), {1, 2})
+        job = self.queue.next()
+        self.assertEqual(str(job["_id"]), job_id)
+        self.assertEqual((job["priority"], job["effective_priority"]), (0, 0))
+
+    def test_push_many_keeps_order(self):
+        self.queue.push_many(EndpointType.MATCH, [3, 1, 2], priority=2)
+
+        claimed = [self.queue.claim("w", lease_seconds=60)["payload"]["detail_id"] for _ in range(3)]
+
+        self.assertEqual(claimed, [3, 1, 2])
+
+    def test_claim_order_leases_and_backoff(self):
+        self.queue.push(EndpointType.MATCH, 1, priority=2)
+        self.queue.push(EndpointType.MATCH, 2, priority=1)
+        self.queue.push(EndpointType.TEAM, 3, priority=1)
+
+        first = self.queue.claim("w", lease_seconds=60)
+        self.assertEqual(first["payload"]["detail_id"], 2)
+        second = self.queue.claim("w", lease_seconds=60, blocked_endpoints=["team"])
+        self.assertEqual(second["payload"]["detail_id"], 1)
+        self.assertIsNone(self.queue.claim("w", lease_seconds=60, priority_class=2))
+
+        self.queue.release(first["_id"], "w", attempts=1, retry_in_seconds=60)
+        self.assertEqual(self.queue.claim("w", lease_seconds=60)["payload"]["detail_id"], 3)
+        self.assertIsNone(self.queue.claim("w", lease_seconds=60))
+        self.assertEqual(self.queue.class_stats()[1]["depth"], 1)
+
+    def test_aging_moves_jobs_into_better_classes(self):
+        self.queue.push(EndpointType.MATCH, 1, priority=2)
+        self.queue._jobs[self.queue.next()["_id"]]["created_at"] -= timedelta(seconds=150)
+
+        self.queue.age_priorities(aging_seconds=120)
+
+        self.assertEqual(self.queue.claim("w", lease_seconds=60, priority_class=1)["payload"]["detail_id"], 1)
+
+    def test_waiters_wake_up_when_worker_completes_job(self):
+        job_id = self.queue.push(EndpointType.MATCH, 1)
+        provider = MagicMock()
+        provider.get_match_if_modified.return_value = {"id": 1}, {"etag": '"a"'}
+        waiter = threading.Thread(target=self.queue.wait_for_job, args=(job_id,))
+        waiter.start()
+
+        with (
+            override_settings(REQUEST_QUEUE_BACKEND="memory"),
+            patch("request_queue.cluster.PrimeLeagueProvider", return_value=provider),
+        ):
+            process_job(self.queue.claim("w", lease_seconds=60))
+
+        waiter.join(timeout=5)
+        self.assertFalse(waiter.is_alive())
+        self.assertFalse(self.queue.job_is_queued(job_id))
+        response = self.queue.get_response(EndpointType.MATCH, 1)
+        self.assertEqual((response["payload"], response["status_code"], response["etag"]), ({"id": 1}, 200, '"a"'))
+
+    def test_raw_payload(self):
+        self.queue.save_response("match", 1, {"match": {"match_time": 5}}, 200, raw=True, fields={"match_time": 5})
+
+        response = self.queue.get_response(EndpointType.MATCH, 1)
+
+        self.assertIsNone(response["payload"])
+        self.assertIsInstance(response["payload_raw"], bytes)
+        self.assertEqual(response["match_time"], 5)
+        self.assertEqual(response_payload(response), {"match": {"match_time": 5}})
+
+    @override_settings(REQUEST_QUEUE_RESPONSE_RETENTION=60)
+    def test_responses_not_retained_expire(self):
+        self.queue.save_response("team", 1, {"id": 1}, 200)
+        self.queue.save_response("team", 2, {"id": 2}, 200)
+        self.queue._responses[("team", 2)]["last_crawled"] = datetime.utcnow() - timedelta(minutes=5)
+
+        self.assertEqual(self.queue.retain_responses(EndpointType.TEAM, [1]), 1)
+
+        self.assertEqual(self.queue.get_responses(EndpointType.TEAM, [1, 2]).keys(), {1})
+
+    def test_cache_lookups_of_providers_are_aggregated(self):
+        self.queue.record_cache_lookups("team", {"hit": 2, "miss": 1})
+        self.queue.record_cache_lookups("team", {"hit": 1})
+        self.queue.record_cache_lookups("match", {"bypass": 3})
+
+        self.assertEqual(
+            self.queue.cache_lookups(since=datetime.utcnow()),
+            {"team": {"hit": 3, "miss": 1}, "match": {"bypass": 3}},
+        )
+        self.assertEqual(self.queue.cache_lookups(since=datetime.utcnow() + timedelta(hours=2)), {})
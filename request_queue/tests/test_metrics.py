@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import niquests
+from django.test import SimpleTestCase
+
+from request_queue import RequestQueue
+from request_queue.metrics import Registry, serve
+
+
+class HistogramTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.histogram = self.registry.histogram("latency_seconds", "Latency", labels=("endpoint",), buckets=(1, 5))
+
+    def test_buckets_are_cumulative(self):
+        for value in (0.5, 1, 3, 10):
+            self.histogram.observe(value, endpoint="match")
+
+        values = self.histogram.get(endpoint="match")
+
+        self.assertEqual(values["buckets"], {1: 2, 5: 3, float("inf"): 4})
+        self.assertEqual((values["count"], values["sum"]), (4, 14.5))
+
+    def test_render_prometheus_text(self):
+        self.registry.counter("requests_total", "Requests", labels=("status_code",)).inc(status_code=200)
+        self.histogram.observe(0.5, endpoint='a"b')
+
+        lines = self.registry.render().splitlines()
+
+        self.assertIn("# TYPE latency_seconds histogram", lines)
+        self.assertIn('latency_seconds_bucket{endpoint="a\\"b",le="1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="a\\"b",le="+Inf"} 1', lines)
+        self.assertIn('latency_seconds_sum{endpoint="a\\"b"} 0.5', lines)
+        self.assertIn('latency_seconds_count{endpoint="a\\"b"} 1', lines)
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{status_code="200"} 1', lines)
+
+    def test_serve_metrics_over_http(self):
+        self.histogram.observe(2, endpoint="team")
+        server = serve(0, registry=self.registry, host="127.0.0.1")
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with niquests.Session() as session:
+            response = session.get(f"{url}/metrics")
+            missing = session.get(f"{url}/other")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('latency_seconds_count{endpoint="team"} 1', response.text)
+        self.assertEqual(missing.status_code, 404)
+
+
+class ClassStatsTest(SimpleTestCase):
+    def test_depth_per_priority_and_endpoint(self):
+        now = datetime.utcnow()
+        queue = object.__new__(RequestQueue)
+        queue.queue_collection = MagicMock()
+        queue.queue_collection.aggregate.return_value = [
+            {"_id": {"priority": 2, "endpoint": "match"}, "depth": 3, "oldest": now - timedelta(seconds=60)},
+            {"_id": {"priority": 2, "endpoint": "team"}, "depth": 1, "oldest": now - timedelta(seconds=600)},
+            {"_id": {"priority": 0, "endpoint": "team"}, "depth": 1, "oldest": now},
+        ]
+
+        stats = queue.class_stats()
+
+        self.assertEqual(stats[2]["depth"], 4)
+        self.assertEqual(stats[2]["endpoints"], {"match": 3, "team": 1})
+        self.assertAlmostEqual(stats[2]["oldest_wait"], 600, delta=5)
+        self.assertEqual(stats[0]["endpoints"], {"team": 1})
@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+from django.test import SimpleTestCase
+
+from request_queue.notifier import CompletionNotifier, WaitStrategy
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.alive = True
+
+    def __iter__(self):
+        self.alive = False
+        return iter(self.docs)
+
+
+class StopListening(Exception):
+    pass
+
+
+class ListenTest(SimpleTestCase):
+    @patch("request_queue.notifier.time.sleep", side_effect=[None, StopListening])
+    def test_completions_of_other_workers_are_not_skipped(self, sleep):
+        db = MagicMock()
+        notifier = CompletionNotifier(db, WaitStrategy.TAILABLE, poll_interval=1, fallback_interval=5)
+        older, newer = ObjectId(), ObjectId()
+        # The older ObjectId of another worker is inserted after the newer one
+        db.create_collection.return_value.find.side_effect = [
+            FakeCursor([{"_id": newer, "job_id": "b"}]),
+            FakeCursor([{"_id": newer, "job_id": "b"}, {"_id": older, "job_id": "a"}]),
+        ]
+        notifier._wake = MagicMock()
+
+        with self.assertRaises(StopListening):
+            notifier._listen()
+
+        self.assertEqual([x.args[0] for x in notifier._wake.call_args_list], ["b", "a"])
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from request_queue.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("request_queue.rate_limit.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_is_available_immediately(self):
+        bucket = TokenBucket(rate=1, burst=3)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.clock.now, 0)
+
+    def test_sustained_rate(self):
+        bucket = TokenBucket(rate=2, burst=1)
+        bucket.acquire()
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+    def test_tokens_do_not_exceed_burst(self):
+        bucket = TokenBucket(rate=1, burst=2)
+        self.clock.now = 100
+        bucket.acquire()
+        bucket.acquire()
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+    def test_refund(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        bucket.acquire()
+        bucket.refund()
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=1, burst=0)
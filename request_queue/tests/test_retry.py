@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from request_queue.retry import CircuitBreaker, backoff_seconds
+from request_queue.tests.test_rate_limit import FakeClock
+
+
+class BackoffTest(SimpleTestCase):
+    def test_delay_doubles_with_jitter(self):
+        for attempts, low, high in [(1, 5, 10), (2, 10, 20), (3, 20, 40)]:
+            delays = [backoff_seconds(attempts, base=10, maximum=300) for _ in range(50)]
+            self.assertTrue(all(low <= x <= high for x in delays), delays)
+            self.assertGreater(len(set(delays)), 1)
+
+    def test_delay_is_capped(self):
+        self.assertLessEqual(backoff_seconds(20, base=10, maximum=60), 60)
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("request_queue.retry.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(threshold=3, cooldown=60)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record("match", failed=True)
+        self.breaker.record("match", failed=False)
+        self.assertEqual([self.breaker.record("match", failed=True) for _ in range(3)], [False, False, True])
+        self.assertEqual(self.breaker.blocked(), ["match"])
+
+    def test_single_trial_after_cooldown(self):
+        for _ in range(3):
+            self.breaker.record("team", failed=True)
+        self.clock.sleep(60)
+        self.assertEqual(self.breaker.blocked(), [])
+        self.breaker.dispatched("team")
+        self.assertEqual(self.breaker.blocked(), ["team"])
+
+        self.assertTrue(self.breaker.record("team", failed=True))
+        self.clock.sleep(30)
+        self.assertEqual(self.breaker.blocked(), ["team"])
+        self.clock.sleep(30)
+        self.breaker.dispatched("team")
+        self.breaker.record("team", failed=False)
+        self.assertEqual(self.breaker.blocked(), [])
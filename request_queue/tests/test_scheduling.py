@@ -0,0 +1,50 @@
+from collections import Counter
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase
+
+from request_queue import cluster
+from request_queue.scheduling import FairShare
+
+claim_fairly = getattr(cluster, "__claim_fairly")
+
+
+class FairShareTest(SimpleTestCase):
+    def dispatch(self, fair_share: FairShare, busy: set[int], jobs: int) -> Counter:
+        served = Counter()
+        for _ in range(jobs):
+            for priority in fair_share.order():
+                if priority in busy:
+                    fair_share.served(priority)
+                    served[priority] += 1
+                    break
+                fair_share.idle(priority)
+        return served
+
+    def test_classes_are_served_by_weight(self):
+        served = self.dispatch(FairShare({0: 8, 2: 1}), busy={0, 2}, jobs=90)
+        self.assertEqual(served, Counter({0: 80, 2: 10}))
+
+    def test_idle_class_does_not_save_up_its_share(self):
+        fair_share = FairShare({0: 8, 2: 1})
+        self.dispatch(fair_share, busy={0}, jobs=400)
+        served = self.dispatch(fair_share, busy={0, 2}, jobs=90)
+        self.assertIn(served[2], (10, 11))
+
+
+class ClaimFairlyTest(SimpleTestCase):
+    def test_underserved_class_is_claimed_first(self):
+        queue = MagicMock()
+        queue.claim.side_effect = lambda priority_class=None, **kwargs: {"class": priority_class}
+        fair_share = FairShare({0: 1, 2: 1})
+        fair_share.served(0)
+
+        job = claim_fairly(queue, fair_share, worker_id="w", lease_seconds=60, blocked_endpoints=[])
+
+        self.assertEqual(job, {"class": 2})
+
+    def test_falls_back_to_priorities_without_weight(self):
+        queue = MagicMock()
+        queue.claim.side_effect = lambda priority_class=None, **kwargs: None if priority_class is not None else {}
+        self.assertEqual(claim_fairly(queue, FairShare({0: 1}), worker_id="w", lease_seconds=60), {})
+        self.assertEqual(queue.claim.call_count, 2)
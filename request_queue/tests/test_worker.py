@@ -0,0 +1,143 @@
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+from django.test import SimpleTestCase, override_settings
+
+from request_queue import cluster
+from request_queue.cluster import JOB_RETRIES
+from request_queue.retry import CircuitBreaker
+from utils.exceptions import PrimeLeagueConnectionException
+
+process_job = getattr(cluster, "__process_job")
+process_job_safely = getattr(cluster, "__process_job_safely")
+
+
+class ConditionalRequestTest(SimpleTestCase):
+    def setUp(self):
+        self.queue = MagicMock()
+        self.provider = MagicMock()
+        patchers = [
+            patch("request_queue.cluster.get_queue", return_value=self.queue),
+            patch("request_queue.cluster.PrimeLeagueProvider", return_value=self.provider),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.job = {"_id": ObjectId(), "payload": {"endpoint": "match", "detail_id": 1}, "leased_by": "w"}
+
+    def test_not_modified_keeps_payload(self):
+        self.queue.get_response.return_value = {"status_code": 200, "payload": {"a": 1}, "etag": '"a"'}
+        self.provider.get_match_if_modified.return_value = None, {"etag": '"a"', "last_modified": None}
+        process_job(self.job)
+        self.provider.get_match_if_modified.assert_called_once_with(1, etag='"a"')
+        self.queue.touch_response.assert_called_once_with("match", 1, {"etag": '"a"', "last_modified": None})
+        self.queue.save_response.assert_not_called()
+        self.queue.delete_entry.assert_called_once_with(self.job["_id"])
+        self.queue.notify_completion.assert_called_once_with(self.job["_id"])
+
+    def test_failed_response_is_not_revalidated(self):
+        self.queue.get_response.return_value = {"status_code": 500, "payload": None, "etag": '"a"'}
+        self.provider.get_match_if_modified.return_value = {"b": 2}, {"etag": '"b"', "last_modified": None}
+        process_job(self.job)
+        self.provider.get_match_if_modified.assert_called_once_with(1)
+        args = self.queue.save_response.call_args.args
+        self.assertEqual(args, ("match", 1, {"b": 2}, 200, {"etag": '"b"', "last_modified": None}))
+
+    @override_settings(REQUEST_QUEUE_RAW_PAYLOADS=True)
+    def test_raw_payloads_need_orjson(self):
+        self.queue.get_response.return_value = None
+        self.provider.get_match_if_modified.return_value = {"b": 2}, {}
+        for accelerated in (True, False):
+            with patch("request_queue.cluster.fast_json.ACCELERATED", accelerated):
+                process_job(self.job)
+            self.assertEqual(self.queue.save_response.call_args.kwargs["raw"], accelerated)
+
+
+class DeadLetterTest(SimpleTestCase):
+    def setUp(self):
+        self.queue = MagicMock()
+        self.queue.get_response.return_value = None
+        self.provider = MagicMock()
+        self.provider.get_team_if_modified.side_effect = PrimeLeagueConnectionException()
+        patchers = [
+            patch("request_queue.cluster.get_queue", return_value=self.queue),
+            patch("request_queue.cluster.PrimeLeagueProvider", return_value=self.provider),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def job(self, attempts):
+        return {
+            "_id": ObjectId(),
+            "payload": {"endpoint": "team", "detail_id": 1},
+            "leased_by": "w",
+            "attempts": attempts,
+        }
+
+    def test_failed_attempt_is_logged(self):
+        job = self.job(attempts=0)
+        process_job(job)
+        self.queue.record_attempt.assert_called_once_with("team", 500)
+        attempt = self.queue.release.call_args.kwargs["attempt"]
+        self.assertEqual(attempt["error"], "PrimeLeagueConnectionException")
+        self.assertGreater(self.queue.release.call_args.kwargs["retry_in_seconds"], 0)
+        self.queue.bury.assert_not_called()
+
+    def test_last_attempt_is_buried(self):
+        job = self.job(attempts=2)
+        process_job(job)
+        self.queue.bury.assert_called_once()
+        buried_job, attempt = self.queue.bury.call_args.args
+        self.assertEqual(buried_job, job)
+        self.assertEqual(attempt["status_code"], 500)
+        self.queue.delete_entry.assert_called_once_with(job["_id"])
+        self.queue.release.assert_not_called()
+
+    def test_server_errors_open_circuit_breaker(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        process_job(self.job(attempts=0), breaker=breaker)
+        process_job(self.job(attempts=0), breaker=breaker)
+        self.assertEqual(breaker.blocked(), ["team"])
+
+
+class ProcessJobSafelyTest(SimpleTestCase):
+    def setUp(self):
+        self.queue = MagicMock()
+        patcher = patch("request_queue.cluster.get_queue", return_value=self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.job = {"_id": ObjectId(), "payload": {"endpoint": "match", "detail_id": 1}, "leased_by": "w"}
+
+    @patch("request_queue.retry.time")
+    def test_failed_trial_unblocks_endpoint(self, clock):
+        clock.monotonic.return_value = 0
+        breaker = CircuitBreaker(threshold=1, cooldown=60)
+        breaker.record("match", failed=True)
+        clock.monotonic.return_value = 60
+        breaker.dispatched("match")
+        self.assertEqual(breaker.blocked(), ["match"])
+
+        self.queue.get_response.side_effect = Exception("database")
+        process_job_safely(self.job, breaker)
+        self.queue.release.assert_called_once_with(self.job["_id"], worker_id="w")
+        # The next job of the endpoint is the trial
+        self.assertEqual(breaker.blocked(), [])
+
+    def test_release_is_counted_as_retry(self):
+        retries = JOB_RETRIES.get(endpoint="match")
+        self.queue.get_response.side_effect = Exception("database")
+        process_job_safely(self.job)
+        self.assertEqual(JOB_RETRIES.get(endpoint="match"), retries + 1)
+
+
+@patch("request_queue.cluster.get_queue")
+class RunArgumentsTest(SimpleTestCase):
+    def test_explicit_zero_is_not_replaced_by_default(self, get_queue):
+        with self.assertRaisesMessage(ValueError, "rate must be positive"):
+            cluster.run(rate=0)
+        with self.assertRaisesMessage(ValueError, "burst must be at least 1"):
+            cluster.run(burst=0)
+        with self.assertRaisesMessage(ValueError, "concurrency must be at least 1"):
+            cluster.run(concurrency=0)
+        get_queue.assert_not_called()
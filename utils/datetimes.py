@@ -0,0 +1,35 @@
+"""
+Conversion of the timestamps and date strings of the Prime League API to timezone-aware UTC datetimes.
+The UTC tzinfo is created once, timestamps are converted directly instead of through the local time and parsed
+date strings are memoized, because the same suggestion and confirmation times occur in many logs and updates.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+UTC = ZoneInfo("UTC")
+
+RFC_2822 = "%a, %d %b %Y %H:%M:%S %z"  # e.g. "Sun, 03 Oct 2021 15:00:00 +0200"
+
+
+def timestamp_to_datetime(x) -> datetime:
+    """:param x: unix timestamp, as int or string"""
+    return datetime.fromtimestamp(x if isinstance(x, int) else int(x), tz=UTC)
+
+
+def timestamps_to_datetimes(timestamps: Iterable) -> list[datetime | None]:
+    """Like ``timestamp_to_datetime`` for several timestamps at once, None stays None."""
+    fromtimestamp = datetime.fromtimestamp
+    return [None if x is None else fromtimestamp(x if isinstance(x, int) else int(x), tz=UTC) for x in timestamps]
+
+
+@lru_cache(maxsize=4096)
+def _parse(x: str, timestamp_format: str) -> datetime:
+    return datetime.strptime(x, timestamp_format).astimezone(UTC)
+
+
+def string_to_datetime(x, timestamp_format=RFC_2822) -> datetime:
+    """:param x: date string in ``timestamp_format`` or unix timestamp"""
+    return _parse(x, timestamp_format) if isinstance(x, str) else timestamp_to_datetime(x)
@@ -0,0 +1,27 @@
+"""
+JSON encoding and decoding with orjson if it is installed, otherwise with the standard library. orjson is several
+times faster, both return the same objects.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Decoding with the standard library is slower than decoding BSON, raw payloads only pay off with orjson
+ACCELERATED = orjson is not None
+
+
+def dumps(obj) -> bytes:
+    """Compact UTF-8 encoded JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,42 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+
+from utils.datetimes import UTC, string_to_datetime, timestamp_to_datetime, timestamps_to_datetimes
+
+
+class TimestampTest(SimpleTestCase):
+    def test_timestamp_to_datetime(self):
+        expected = datetime(2021, 10, 3, 13, 0, tzinfo=ZoneInfo("UTC"))
+        self.assertEqual(timestamp_to_datetime(1633266000), expected)
+        self.assertEqual(timestamp_to_datetime("1633266000"), expected)
+        self.assertIs(timestamp_to_datetime(1633266000).tzinfo, UTC)
+
+    def test_batch(self):
+        self.assertEqual(
+            timestamps_to_datetimes([1633266000, None, "1633269600"]),
+            [timestamp_to_datetime(1633266000), None, timestamp_to_datetime(1633269600)],
+        )
+        self.assertEqual(timestamps_to_datetimes([]), [])
+
+
+class StringTest(SimpleTestCase):
+    def test_rfc_2822(self):
+        expected = datetime(2021, 10, 3, 13, 0, tzinfo=ZoneInfo("UTC"))
+        self.assertEqual(string_to_datetime("Sun, 03 Oct 2021 15:00:00 +0200"), expected)
+        # Memoized
+        self.assertIs(
+            string_to_datetime("Sun, 03 Oct 2021 15:00:00 +0200"), string_to_datetime("Sun, 03 Oct 2021 15:00:00 +0200")
+        )
+
+    def test_format(self):
+        self.assertEqual(
+            string_to_datetime("2021-10-04 15:00 +0200", timestamp_format="%Y-%m-%d %H:%M %z"),
+            datetime(2021, 10, 4, 13, 0, tzinfo=ZoneInfo("UTC")),
+        )
+        with self.assertRaises(ValueError):
+            string_to_datetime("2021-10-04 15:00")
+
+    def test_timestamp(self):
+        self.assertEqual(string_to_datetime(1633266000), timestamp_to_datetime(1633266000))
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from utils.exceptions import CouldNotParseURLException, Div1orDiv2TeamException
+from utils.validation import get_valid_team_id, get_valid_team_ids, is_url
+
+
+class IsUrlTest(SimpleTestCase):
+    def test_urls(self):
+        self.assertTrue(is_url("https://www.primeleague.gg/de/leagues/teams/105959-team"))
+        self.assertTrue(is_url("HTTP://localhost:8000/"))
+        self.assertFalse(is_url("105959"))
+        self.assertFalse(is_url("www.primeleague.gg/de/leagues/teams/105959"))
+        self.assertFalse(is_url("https://not a url"))
+        self.assertFalse(is_url(105959))
+
+
+class TeamIdTest(SimpleTestCase):
+    def test_valid(self):
+        self.assertEqual(get_valid_team_id("https://www.primeleague.gg/de/leagues/teams/105959-team"), 105959)
+        self.assertEqual(get_valid_team_id("105959"), 105959)
+        self.assertEqual(get_valid_team_id(105959), 105959)
+
+    def test_invalid(self):
+        with self.assertRaises(Div1orDiv2TeamException):
+            get_valid_team_id("https://www.primeleague.gg/de/teams/105959-team")
+        # Failures are not cached
+        with self.assertRaises(CouldNotParseURLException):
+            get_valid_team_id("team")
+        with self.assertRaises(CouldNotParseURLException):
+            get_valid_team_id("team")
+
+    def test_bulk(self):
+        results = get_valid_team_ids(["105959", "https://www.primeleague.gg/de/leagues/teams/1-a", "team"])
+        self.assertEqual(results[:2], [("105959", 105959), ("https://www.primeleague.gg/de/leagues/teams/1-a", 1)])
+        self.assertEqual(results[2][0], "team")
+        self.assertIsInstance(results[2][1], CouldNotParseURLException)
@@ -1,29 +1,14 @@
 import hashlib
-import re
 from datetime import date, datetime
-from typing import Tuple, Union
-from zoneinfo import ZoneInfo
+from typing import Tuple
 
 from babel import dates as babel
 from django.conf import settings
 from django.utils import translation
 from django.utils.translation import ngettext
 
-from utils.exceptions import CouldNotParseURLException, Div1orDiv2TeamException
-
-
-def string_to_datetime(x, timestamp_format='%a, %d %b %Y %H:%M:%S %z'):
-    return (
-        datetime.strptime(x, timestamp_format).astimezone(ZoneInfo("UTC"))
-        if isinstance(x, str)
-        else timestamp_to_datetime(x)
-    )
-
-
-def timestamp_to_datetime(x):
-    if not isinstance(x, int):
-        x = int(x)
-    return datetime.fromtimestamp(x).astimezone(ZoneInfo("UTC"))
+from utils.datetimes import string_to_datetime, timestamp_to_datetime  # noqa: F401
+from utils.validation import get_valid_team_id, is_url  # noqa: F401
 
 
 def diff_to_hh_mm(lower_dt, upper_dt):
@@ -48,42 +33,6 @@ def count_weeks(split_start: date, another: date):
     return match_day
 
 
-def get_valid_team_id(value: Union[str, int]) -> int:
-    """
-    Try to convert value to integer. If it fails, check if "/leagues/" is in value (div 1 and div 2 teams
-    cannot be registered, raises Div1orDiv2TeamException). After that try to parse the team ID from the given string.
-    Args:
-        value: URL string or TeamID
-
-    Returns: int: Team ID
-    Raises: CouldNotParseURLException, Div1orDiv2TeamException
-    """
-    if is_url(value=value):
-        if "/leagues/" not in value:
-            raise Div1orDiv2TeamException
-        try:
-            return int(value.split("/teams/")[-1].split("-")[0])
-        except Exception:
-            raise CouldNotParseURLException()
-    try:
-        return int(value)
-    except ValueError:
-        raise CouldNotParseURLException()
-
-
-def is_url(value):
-    regex = re.compile(
-        r'^(?:http|ftp)s?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$',
-        re.IGNORECASE,
-    )
-    return re.match(regex, value) is not None
-
-
 class Encoder:
     __hash_func = hashlib.sha256
     _encoding = "utf-8"
@@ -0,0 +1,73 @@
+"""
+Validation of user input, e.g. the team URL or ID of the registration commands. The regular expressions are compiled
+once, recently parsed values are cached.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable
+
+from utils.exceptions import CouldNotParseURLException, Div1orDiv2TeamException
+
+URL_REGEX = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$',
+    re.IGNORECASE,
+)
+
+_URL_SCHEMES = ("http://", "https://", "ftp://", "ftps://")
+
+TeamIdResult = tuple[str | int, int | Exception]
+
+
+def is_url(value) -> bool:
+    # Most values are team IDs, they are rejected by the scheme before the full regex is tried
+    return isinstance(value, str) and value[:8].lower().startswith(_URL_SCHEMES) and URL_REGEX.match(value) is not None
+
+
+@lru_cache(maxsize=1024)
+def _parse_team_id(value: str) -> int:
+    if is_url(value=value):
+        if "/leagues/" not in value:
+            raise Div1orDiv2TeamException
+        try:
+            return int(value.split("/teams/")[-1].split("-")[0])
+        except Exception:
+            raise CouldNotParseURLException()
+    try:
+        return int(value)
+    except ValueError:
+        raise CouldNotParseURLException()
+
+
+def get_valid_team_id(value: str | int) -> int:
+    """
+    Try to convert value to integer. If it fails, check if "/leagues/" is in value (div 1 and div 2 teams
+    cannot be registered, raises Div1orDiv2TeamException). After that try to parse the team ID from the given string.
+    Args:
+        value: URL string or TeamID
+
+    Returns: int: Team ID
+    Raises: CouldNotParseURLException, Div1orDiv2TeamException
+    """
+    if isinstance(value, int):
+        return value
+    return _parse_team_id(value)
+
+
+def get_valid_team_ids(values: Iterable[str | int]) -> list[TeamIdResult]:
+    """
+    Like ``get_valid_team_id`` for many values at once, e.g. an import of team URLs.
+    :return: ``(value, team ID)`` per value, or ``(value, exception)`` if the value is not valid
+    """
+    results = []
+    for value in values:
+        try:
+            results.append((value, get_valid_team_id(value)))
+        except (CouldNotParseURLException, Div1orDiv2TeamException) as e:
+            results.append((value, e))
+    return results